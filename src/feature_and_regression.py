@@ -4,8 +4,17 @@ import numpy as np
 # Statistics
 import statsmodels.api as sm
 from statsmodels.stats.outliers_influence import variance_inflation_factor
+# Matching
+try:
+    from psmpy import PsmPy
+except ImportError:
+    PsmPy = None
+# Data
+from utils.movie_dataset import MovieDataset
 
 # Constants
+DATA_PATH = "../data"
+
 CONTINENT_ID = {"North America and Australia": [1,0,0,0,0,0],
 "Central and South America": [0,1,0,0,0,0],
 "Western Europe": [0,0,1,0,0,0],
@@ -966,25 +975,26 @@ def format_regression_df(dataframe: pd.DataFrame, decades: list,
 
 # Pipelines
 
-def get_raw_regression_df() -> pd.DataFrame:
+def get_raw_regression_df(dataset=None) -> pd.DataFrame:
     """
     Create a pandas DataFrame with the basic crafted features for regression.
 
+    :param dataset: MovieDataset giving access to the tables, default on DATA_PATH.
+
     :return: Pandas DataFrame with raw data for regression.
 
     """
     # Load Data
-   
-    comes_from_df = pd.read_pickle("../data/post_processing/comes_from_df.pkl")
-    is_of_type_df = pd.read_pickle("../data/post_processing/is_of_type_df.pkl")
-    spoken_languages_df = pd.read_pickle("../data/post_processing/spoken_languages_df.pkl")
-    character_df = pd.read_pickle("../data/post_processing/character_df.pkl")
-    actor_df = pd.read_pickle("../data/post_processing/actor_df.pkl")
-    movie_df = pd.read_pickle("../data/post_processing/movie_df.pkl")
-    belongs_to_df = pd.read_pickle("../data/post_processing/belongs_to_df.pkl")
-    appears_in_df = pd.read_pickle("../data/post_processing/appears_in_df.pkl")
-    is_directed_by_df = pd.read_pickle("../data/post_processing/is_directed_by_df.pkl")
-  
+    dataset = MovieDataset(DATA_PATH) if dataset is None else dataset
+    comes_from_df = dataset.comes_from_df
+    is_of_type_df = dataset.is_of_type_df
+    spoken_languages_df = dataset.spoken_languages_df
+    character_df = dataset.character_df
+    actor_df = dataset.actor_df
+    movie_df = dataset.movie_df
+    belongs_to_df = dataset.belongs_to_df
+    appears_in_df = dataset.appears_in_df
+    is_directed_by_df = dataset.is_directed_by_df
     # Create DataFrame
     movie_regression_df = movie_df.copy()
     movie_regression_df.drop(["freebase_id","plot"],axis=1,inplace=True)
@@ -1094,7 +1104,8 @@ def simple_regression(raw_regression_df: pd.DataFrame, decades: list,
     processed_df, target, binary_target, num_votes = format_regression_df(raw_regression_df,decades,
                                                     parameters=parameters,
                                                     target_threshold=target_threshold,bad_movies=bad_movies)
-    features = forward_selection(processed_df, target, ignored_features=[], alpha=alpha, show=show)
+    features = forward_selection(processed_df, target, binary_target, ignored_features=[],
+                                 alpha=alpha, show=show)
     model = sm.OLS(target, sm.add_constant(processed_df[features])).fit()
     print(model.summary())
     return model
@@ -1119,7 +1130,7 @@ def decade_pipeline(raw_regression_df: pd.DataFrame, decades: list,
     """
     decade_results = dict()
     for decade in decades:
-        model = simple_regression(raw_regression_df,decades,parameters=parameters,
+        model = simple_regression(raw_regression_df,[decade],parameters=parameters,
                                     target_threshold=target_threshold,bad_movies=bad_movies,
                                     alpha=alpha,show=show)
         decade_results[decade] = model.rsquared
@@ -1127,3 +1138,105 @@ def decade_pipeline(raw_regression_df: pd.DataFrame, decades: list,
                                     columns=["r-squared"]).sort_index()
     return decade_results_df
 
+def binarize_treatment(processed_dataframe: pd.DataFrame,
+                       treatment: str, threshold: float, method="greater"):
+    """
+    Binarize a treatment covariate with respect to a threshold, inplace.
+
+    :param processed_dataframe: Pandas DataFrame containing the data for regression.
+    :param treatment: Covariate used as treament.
+    :param threshold: Threshold value for the binarization.
+    :param method: Method for binarization with respect to the threshold.
+    """
+    if method == "greater":
+        f = lambda l: l > threshold
+    elif method == "smaller":
+        f = lambda l: l < threshold
+    elif method == "equal":
+        f = lambda l: l == threshold
+    elif method == "unequal":
+        f = lambda l: l != threshold
+    else:
+        raise ValueError("Please provide a method in [greater,smaller,equal,unequal].")
+    processed_dataframe[treatment] = processed_dataframe[treatment].apply(f)
+    processed_dataframe[treatment] = processed_dataframe[treatment].replace({True: 1, False: 0})
+
+def temporal_obs_study(raw_regression_df: pd.DataFrame, treatment: str,
+                       decades: list, parameters=DEFAULT_PARAMETERS,
+                       target_threshold=SUCCESS_THRESHOLD, bad_movies=False,
+                       binarize=False, balance=True, threshold=0, method="greater",
+                       alpha=0.05, log_reg=False) -> tuple:
+    """
+    Perform observational study accross the decades provided.
+
+    The output will be a dictionnary containing the model for both regular
+    regression on the formated dataframe (i.e. with all samples in the decade)
+    and another model with only the pairs matched on their propensity score.
+    The second element in the tuple is a Pandas DataFrame which gives the result
+    of the signficance and coefficient values for regular regression and with
+    matched pairs. It allows to detect difference that arise from bias and
+    confounds in the data.
+
+    :param raw_regression_df: Pandas DataFrame with raw data for regression.
+    :param treatment: Covariate used as treament (should be binary).
+    :param decades: List of decades for which the function will perform the analysis.
+    :param parameters: Parameter dictionnary to process the dataframe.
+    :param target_threshold: Threshold from which we consider a movie as successful.
+    :param bad_movies: Indicator if the binary target should be one for movie under threshold.
+    :param binarize: Indicator if a binirazation of the treatment is necessary.
+    :param balance: Indicator if the logistic regression model should be balanced.
+    :param threshold: Threshold value for the binarization.
+    :param method: Method for binarization with respect to the threshold.
+    :param alpha: Significance level, default 0.05.
+    :param log_reg: Indicator to perform a logistic regression instead of linear regression.
+
+    :return: Tuple with dictionnary with the model for each decade, and a summary dataframe.
+    """
+    if PsmPy is None:
+        raise ImportError("The propensity score matching requires the psmpy package.")
+    decades_models = dict()
+    decade_significance = dict()
+    for decade in decades:
+        processed_df, target, binary_target, num_votes = format_regression_df(
+            raw_regression_df, [decade], parameters=dict(parameters),
+            target_threshold=target_threshold, bad_movies=bad_movies)
+        # If necessary, binarize treatment
+        if binarize:
+            binarize_treatment(processed_df, treatment, threshold, method=method)
+        if (processed_df[treatment].sum() == 0 or
+            processed_df[treatment].sum() == len(processed_df)):
+            print("Sample have all undergoe same treatment in data.")
+            decade_significance[decade] = (False, None, False, None)
+            continue
+        # Compute propensity scores
+        psm = PsmPy(processed_df.reset_index(), treatment=treatment, indx='movie_id')
+        psm.logistic_ps(balance=balance)
+        # Creates matching
+        psm.knn_matched(matcher='propensity_score', replacement=False, caliper=None)
+        matched_ids = set(psm.matched_ids["movie_id"]).union(psm.matched_ids["matched_ID"])
+        is_matched = processed_df.index.isin(matched_ids)
+        matched_df = processed_df[is_matched]
+        regression_target = binary_target if log_reg else target
+        matched_targets = regression_target[is_matched]
+        matched_binary_targets = binary_target[is_matched]
+        # Regressions
+        features_regular = forward_selection(processed_df, target, binary_target, alpha=alpha, log_reg=log_reg)
+        features_matched = forward_selection(matched_df, matched_targets, matched_binary_targets,
+                                             alpha=alpha, log_reg=log_reg)
+        regression_model = sm.Logit if log_reg else sm.OLS
+        model_regular = regression_model(regression_target, sm.add_constant(processed_df[features_regular])).fit()
+        model_matched = regression_model(matched_targets, sm.add_constant(matched_df[features_matched])).fit()
+        # Update results
+        decades_models[decade] = (model_matched,model_regular)
+        reg_sig, reg_coeff, matched_sig, matched_coeff = False, None, False, None
+        if treatment in model_regular.pvalues:
+            reg_sig, reg_coeff = (model_regular.pvalues[treatment] < alpha,
+                                  model_regular.params[treatment])
+        if treatment in model_matched.pvalues:
+            matched_sig, matched_coeff = (model_matched.pvalues[treatment] < alpha,
+                                          model_matched.params[treatment])
+        decade_significance[decade] = (reg_sig, reg_coeff, matched_sig, matched_coeff)
+    decade_results_df = pd.DataFrame(decade_significance.values(),index=decade_significance.keys(),
+                                    columns=["regular_treatment_significant","regular_coeff",
+                                             "matched_treatment_significant","matched_coeff"]).sort_index()
+    return decades_models, decade_results_df
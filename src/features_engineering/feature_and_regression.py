@@ -4,8 +4,15 @@ import numpy as np
 # Statistics
 import statsmodels.api as sm
 from statsmodels.stats.outliers_influence import variance_inflation_factor
+# Data
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from utils.movie_dataset import MovieDataset
 
 # Constants
+DATA_PATH = "../../data"
+
 CONTINENT_ID = {"North America and Australia": [1,0,0,0,0,0],
 "Central and South America": [0,1,0,0,0,0],
 "Western Europe": [0,0,1,0,0,0],
@@ -762,29 +769,26 @@ def format_regression_df(dataframe: pd.DataFrame, decades: list,
 
 # Pipelines
 
-def get_raw_regression_df() -> pd.DataFrame:
+def get_raw_regression_df(dataset=None) -> pd.DataFrame:
     """
     Create a pandas DataFrame with the basic crafted features for regression.
 
+    :param dataset: MovieDataset giving access to the tables, default on DATA_PATH.
+
     :return: Pandas DataFrame with raw data for regression.
 
     """
     # Load Data
-    country_df = pd.read_pickle("../../data/post_processing//country_df.pkl")
-    comes_from_df = pd.read_pickle("../../data/post_processing/comes_from_df.pkl")
-    genre_df = pd.read_pickle("../../data/post_processing/genre_df.pkl")
-    is_of_type_df = pd.read_pickle("../../data/post_processing/is_of_type_df.pkl")
-    language_df = pd.read_pickle("../../data/post_processing/language_df.pkl")
-    spoken_languages_df = pd.read_pickle("../../data/post_processing/spoken_languages_df.pkl")
-    character_df = pd.read_pickle("../../data/post_processing/character_df.pkl")
-    actor_df = pd.read_pickle("../../data/post_processing/actor_df.pkl")
-    movie_df = pd.read_pickle("../../data/post_processing/movie_df.pkl")
-    belongs_to_df = pd.read_pickle("../../data/post_processing/belongs_to_df.pkl")
-    play_df = pd.read_pickle("../../data/post_processing/play_df.pkl")
-    appears_in_df = pd.read_pickle("../../data/post_processing/appears_in_df.pkl")
-    wikipedia_imdb_mapping_table = pd.read_pickle("../../data/generated/wikipedia_imdb_mapping_df.pkl")
-    is_directed_by_df = pd.read_pickle("../../data/post_processing/is_directed_by_df.pkl")
-    director_df = pd.read_pickle("../../data/post_processing/director_df.pkl")
+    dataset = MovieDataset(DATA_PATH) if dataset is None else dataset
+    comes_from_df = dataset.comes_from_df
+    is_of_type_df = dataset.is_of_type_df
+    spoken_languages_df = dataset.spoken_languages_df
+    character_df = dataset.character_df
+    actor_df = dataset.actor_df
+    movie_df = dataset.movie_df
+    belongs_to_df = dataset.belongs_to_df
+    appears_in_df = dataset.appears_in_df
+    is_directed_by_df = dataset.is_directed_by_df
     # Create DataFrame
     movie_regression_df = movie_df.copy()
     movie_regression_df.drop(["freebase_id","plot"],axis=1,inplace=True)
@@ -5,12 +5,21 @@ import pickle
 # Statistics
 import statsmodels.api as sm
 from statsmodels.stats.outliers_influence import variance_inflation_factor
+# Data
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from utils.movie_dataset import MovieDataset
+# Observational study pipeline, shared with run_analysis.py
+from feature_and_regression import binarize_treatment, temporal_obs_study
 # Sparse Matrix
 from scipy.sparse import csr_matrix
 from scipy.sparse import save_npz
 from scipy.sparse import load_npz
 
 # Constants
+DATA_PATH = "../../data"
+
 CONTINENT_ID = {"North America and Australia": [1,0,0,0,0,0],
 "Central and South America": [0,1,0,0,0,0],
 "Western Europe": [0,0,1,0,0,0],
@@ -792,7 +801,7 @@ def format_regression_df(dataframe: pd.DataFrame, decades: list,
 
 # Pipelines
 
-def get_raw_regression_df(words_to_add: dict) -> pd.DataFrame:
+def get_raw_regression_df(words_to_add: dict, dataset=None) -> pd.DataFrame:
     """
     Create a pandas DataFrame with the basic crafted features for regression.
 
@@ -800,32 +809,25 @@ def get_raw_regression_df(words_to_add: dict) -> pd.DataFrame:
                             as covariates and as values if their occurence should be binarized.
                             We refer to the 'add_word_to_regression' function for detail about
                             words occurence integration for regression.
+    :param dataset: MovieDataset giving access to the tables, default on DATA_PATH.
 
     :return: Pandas DataFrame with raw data for regression.
 
     """
     # Load Data
-    country_df = pd.read_pickle("../../data/post_processing/country_df.pkl")
-    comes_from_df = pd.read_pickle("../../data/post_processing/comes_from_df.pkl")
-    genre_df = pd.read_pickle("../../data/post_processing/genre_df.pkl")
-    is_of_type_df = pd.read_pickle("../../data/post_processing/is_of_type_df.pkl")
-    language_df = pd.read_pickle("../../data/post_processing/language_df.pkl")
-    spoken_languages_df = pd.read_pickle("../../data/post_processing/spoken_languages_df.pkl")
-    character_df = pd.read_pickle("../../data/post_processing/character_df.pkl")
-    actor_df = pd.read_pickle("../../data/post_processing/actor_df.pkl")
-    movie_df = pd.read_pickle("../../data/post_processing/movie_df.pkl")
-    belongs_to_df = pd.read_pickle("../../data/post_processing/belongs_to_df.pkl")
-    play_df = pd.read_pickle("../../data/post_processing/play_df.pkl")
-    appears_in_df = pd.read_pickle("../../data/post_processing/appears_in_df.pkl")
-    wikipedia_imdb_mapping_table = pd.read_pickle("../../data/generated/wikipedia_imdb_mapping_df.pkl")
-    is_directed_by_df = pd.read_pickle("../../data/post_processing/is_directed_by_df.pkl")
-    director_df = pd.read_pickle("../../data/post_processing/director_df.pkl")
+    dataset = MovieDataset(DATA_PATH) if dataset is None else dataset
+    comes_from_df = dataset.comes_from_df
+    is_of_type_df = dataset.is_of_type_df
+    spoken_languages_df = dataset.spoken_languages_df
+    character_df = dataset.character_df
+    actor_df = dataset.actor_df
+    movie_df = dataset.movie_df
+    belongs_to_df = dataset.belongs_to_df
+    appears_in_df = dataset.appears_in_df
+    is_directed_by_df = dataset.is_directed_by_df
     # Load Plot Data
-    plot_data_df = pd.read_pickle("../../data/post_processing/plot_df.pkl")
-    BOW_matrix = load_npz("../../data/post_processing/BOW_matrix.npz")
-    with open("../../data/post_processing/BOW_mapping.pkl", 'rb') as handle:
-        BOW_dict = pickle.load(handle)
-    reversed_BOW_dict = {v:k for k,v in BOW_dict.items()}
+    plot_data_df = dataset.plot_df
+    BOW_dict = dataset.BOW_dict
     # Create DataFrame
     movie_regression_df = movie_df.copy()
     movie_regression_df.drop(["freebase_id","plot"],axis=1,inplace=True)
@@ -970,4 +972,5 @@ def decade_pipeline(raw_regression_df: pd.DataFrame, decades: list,
         decade_results[decade] = model.rsquared
     decade_results_df = pd.DataFrame(decade_results.values(),index=decade_results.keys(),
                                     columns=["r-squared"]).sort_index()
-    return decade_results_df
\ No newline at end of file
+    return decade_results_df
+
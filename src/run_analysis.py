@@ -0,0 +1,246 @@
+"""
+Run the whole analysis unattended, from the raw TSVs to the regression and propensity
+matching results, and report the cost of every stage.
+
+The data stages are the ones of utils.pipeline, followed by the regression features,
+the regressions per decade and the observational studies. Only stale stages are run,
+see utils.pipeline.run_pipeline.
+
+Usage:
+    python run_analysis.py --config analysis_config.json --report report.json
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import datetime
+import subprocess
+import pandas as pd
+
+from utils import pipeline
+from utils.movie_dataset import MovieDataset
+import feature_and_regression as feat_and_reg
+
+# Constants
+DEFAULT_CONFIG_PATH = os.path.join(pipeline.SRC_PATH, "analysis_config.json")
+FOLDER_RESULTS = "results"
+FOLDER_REPORTS = "reports"
+
+RAW_REGRESSION_FILE = f"{FOLDER_RESULTS}/raw_regression_df.pkl"
+DECADE_REGRESSION_FILE = f"{FOLDER_RESULTS}/decade_regression_df.pkl"
+OBSERVATIONAL_STUDIES_FILE = f"{FOLDER_RESULTS}/observational_studies_df.pkl"
+
+REGRESSION_TABLES = ["comes_from_df", "is_of_type_df", "spoken_languages_df", "character_df",
+                     "actor_df", "movie_df", "belongs_to_df", "appears_in_df", "is_directed_by_df"]
+
+# Default value of every configuration entry
+#
+#   parameters: Entries overriding feat_and_reg.DEFAULT_PARAMETERS.
+#   decades: List of decades on which the regressions and the studies are performed.
+#   success_threshold: Threshold from which we consider a movie as successful.
+#   bad_movies: Indicator if the binary target should be one for movie under threshold.
+#   alpha: Significance level.
+#   treatments: List of keyword arguments of feat_and_reg.temporal_obs_study, one per study.
+#   stage_params: Parameters overriding the ones of the data stages, e.g. notebook constants.
+DEFAULT_CONFIG = {"parameters": {},
+                  "decades": [],
+                  "success_threshold": feat_and_reg.SUCCESS_THRESHOLD,
+                  "bad_movies": False,
+                  "alpha": 0.05,
+                  "treatments": [],
+                  "stage_params": {}}
+
+
+# Stage functions, run in the pipeline workers
+
+def build_regression_features(output: str):
+    """
+    Compute the raw regression dataframe from the formatted tables.
+
+    :param output: Path of the pickle to write, relative to the data folder.
+    """
+    dataset = MovieDataset(pipeline.get_data_folder())
+    feat_and_reg.get_raw_regression_df(dataset).to_pickle(pipeline.get_data_file_path(output))
+
+
+def run_decade_regressions(source: str, output: str, decades: list, parameters: dict,
+                           success_threshold: float, bad_movies: bool, alpha: float):
+    """
+    Fit a regression per decade and save their r-squared scores.
+
+    :param source: Path of the raw regression dataframe, relative to the data folder.
+    :param output: Path of the pickle to write, relative to the data folder.
+    :param decades: List of decades on which to apply the regression.
+    :param parameters: Parameter dictionnary to process the dataframe.
+    :param success_threshold: Threshold from which we consider a movie as successful.
+    :param bad_movies: Indicator if the binary target should be one for movie under threshold.
+    :param alpha: Significance level.
+    """
+    raw_regression_df = pd.read_pickle(pipeline.get_data_file_path(source))
+    decade_results_df = feat_and_reg.decade_pipeline(raw_regression_df, decades, parameters=parameters,
+                                                     target_threshold=success_threshold,
+                                                     bad_movies=bad_movies, alpha=alpha)
+    decade_results_df.to_pickle(pipeline.get_data_file_path(output))
+
+
+def run_observational_studies(source: str, output: str, treatments: list, decades: list,
+                              parameters: dict, success_threshold: float, bad_movies: bool,
+                              alpha: float):
+    """
+    Perform the propensity matching studies of every treatment and save their summaries.
+
+    :param source: Path of the raw regression dataframe, relative to the data folder.
+    :param output: Path of the pickle to write, relative to the data folder.
+    :param treatments: List of keyword arguments of feat_and_reg.temporal_obs_study.
+    :param decades: List of decades on which to perform the studies.
+    :param parameters: Parameter dictionnary to process the dataframe.
+    :param success_threshold: Threshold from which we consider a movie as successful.
+    :param bad_movies: Indicator if the binary target should be one for movie under threshold.
+    :param alpha: Significance level.
+    """
+    raw_regression_df = pd.read_pickle(pipeline.get_data_file_path(source))
+    study_dfs = []
+    for study in treatments:
+        study = {"decades": decades, "parameters": parameters, "target_threshold": success_threshold,
+                 "bad_movies": bad_movies, "alpha": alpha, **study}
+        _, decade_results_df = feat_and_reg.temporal_obs_study(raw_regression_df, **study)
+        decade_results_df.insert(0, "treatment", study["treatment"])
+        study_dfs.append(decade_results_df.rename_axis("decade").reset_index())
+    pd.concat(study_dfs, ignore_index=True).to_pickle(pipeline.get_data_file_path(output))
+
+
+# Helpers
+
+def load_config(config_path: str) -> dict:
+    """
+    Load a JSON configuration file, completed by the default values.
+
+    :param config_path: Path to the configuration file.
+
+    :return: The configuration dictionnary.
+    """
+    with open(config_path, encoding="utf-8") as handle:
+        config = json.load(handle)
+    unknown_entries = set(config) - set(DEFAULT_CONFIG)
+    if len(unknown_entries) > 0:
+        raise ValueError(f"Unknown configuration entries {sorted(unknown_entries)}.")
+    return {**DEFAULT_CONFIG, **config}
+
+
+def build_analysis_stages(config: dict) -> dict:
+    """
+    Declare the analysis stages following the data stages.
+
+    :param config: The configuration dictionnary.
+
+    :return: Dictionnary of all the stage declarations, in topological order.
+    """
+    parameters = {**feat_and_reg.DEFAULT_PARAMETERS, **config["parameters"]}
+    analysis_params = {"decades": config["decades"], "parameters": parameters,
+                       "success_threshold": config["success_threshold"],
+                       "bad_movies": config["bad_movies"], "alpha": config["alpha"]}
+    return {
+        **pipeline.PIPELINE_STAGES,
+        "regression_features": {
+            "function": "run_analysis.build_regression_features",
+            "params": {"output": RAW_REGRESSION_FILE},
+            "inputs": [f"post_processing/{table}.pkl" for table in REGRESSION_TABLES],
+            "outputs": [RAW_REGRESSION_FILE],
+            "modules": ["feature_and_regression.py", "utils/movie_dataset.py"]},
+        "decade_regression": {
+            "function": "run_analysis.run_decade_regressions",
+            "params": {"source": RAW_REGRESSION_FILE, "output": DECADE_REGRESSION_FILE, **analysis_params},
+            "inputs": [RAW_REGRESSION_FILE],
+            "outputs": [DECADE_REGRESSION_FILE],
+            "modules": ["feature_and_regression.py"]},
+        "observational_studies": {
+            "function": "run_analysis.run_observational_studies",
+            "params": {"source": RAW_REGRESSION_FILE, "output": OBSERVATIONAL_STUDIES_FILE,
+                       "treatments": config["treatments"], **analysis_params},
+            "inputs": [RAW_REGRESSION_FILE],
+            "outputs": [OBSERVATIONAL_STUDIES_FILE],
+            "modules": ["feature_and_regression.py"]},
+    }
+
+
+def get_revision():
+    """
+    Return the git revision of the code, to compare the reports across versions.
+
+    :return: The commit hash, None outside of a git repository.
+    """
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=pipeline.SRC_PATH, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def get_default_report_path(started_at: datetime.datetime) -> str:
+    """
+    Return the default report path, one report per run in the pipeline folder.
+
+    :param started_at: Start time of the run.
+
+    :return: Path to the report.
+    """
+    return os.path.join(pipeline.get_data_folder(), pipeline.FOLDER_PIPELINE, FOLDER_REPORTS,
+                        f"{started_at.strftime('%Y%m%dT%H%M%SZ')}.json")
+
+
+def parse_arguments(arguments: list) -> argparse.Namespace:
+    """
+    Parse the command-line arguments.
+
+    :param arguments: List of the arguments, without the program name.
+
+    :return: The parsed arguments.
+    """
+    parser = argparse.ArgumentParser(description="Run the analysis from the raw data to the results.")
+    parser.add_argument("--config", default=DEFAULT_CONFIG_PATH, help="Path to the JSON configuration file.")
+    parser.add_argument("--report", default=None, help="Path of the JSON report, default in data/pipeline/reports.")
+    parser.add_argument("--targets", nargs="*", default=None, help="Stages to bring up to date, default all.")
+    parser.add_argument("--force", nargs="*", default=[], help="Stages to run even if up to date.")
+    parser.add_argument("--no-cache", action="store_true", help="Do not restore nor store cached outputs.")
+    parser.add_argument("--workers", type=int, default=pipeline.MAX_WORKERS,
+                        help="Maximum number of stages running at the same time.")
+    return parser.parse_args(arguments)
+
+
+# Entry point
+
+def main(arguments: list) -> dict:
+    """
+    Run the analysis and write its report.
+
+    :param arguments: List of the command-line arguments, without the program name.
+
+    :return: The report, with the wall time, peak memory and row counts of every stage.
+    """
+    arguments = parse_arguments(arguments)
+    started_at = datetime.datetime.now(datetime.timezone.utc)
+    config = load_config(arguments.config)
+    start_time = time.perf_counter()
+    stage_reports = pipeline.run_pipeline(build_analysis_stages(config), targets=arguments.targets,
+                                          params=config["stage_params"], force=arguments.force,
+                                          use_cache=not arguments.no_cache, max_workers=arguments.workers)
+    report = {"started_at": started_at.isoformat(),
+              "revision": get_revision(),
+              "config": config,
+              "wall_time_s": time.perf_counter() - start_time,
+              "stages": stage_reports}
+    report_path = get_default_report_path(started_at) if arguments.report is None else arguments.report
+    os.makedirs(os.path.dirname(os.path.abspath(report_path)), exist_ok=True)
+    with open(report_path, "w", encoding="utf-8") as handle:
+        json.dump(report, handle, indent=1, default=repr)
+    for stage_name, stage_report in stage_reports.items():
+        print(f"{stage_name:<30} {stage_report['status']:<7} {stage_report['wall_time_s']:>10.1f}s "
+              f"{stage_report['peak_memory_mb']:>10.0f}MB")
+    print(f"Report written to {report_path}")
+    return report
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,194 @@
+"""
+Contain the logic for checkpointing long-running enrichment jobs in append-only JSONL files.
+
+Every processed id is appended as one JSON line, {"id": ..., "data": ...}, the data being
+None for the ids that could not be processed. Lines are flushed as soon as written and
+synced to disk periodically, so that a crash loses at most the line being written, which
+is dropped when the checkpoint is reopened. A job resumes by skipping the ids already in
+its checkpoint, and the results are read back by streaming the lines.
+"""
+
+import os
+import json
+
+import numpy as np
+import pandas as pd
+
+ID_KEY = "id"
+DATA_KEY = "data"
+FSYNC_INTERVAL = 100
+
+
+class CheckpointWriter:
+    """
+    Append the records of a job to its checkpoint, to use as a context manager.
+    """
+
+    def __init__(self, checkpoint_path: str, fsync_interval=FSYNC_INTERVAL):
+        self.checkpoint_path = checkpoint_path
+        self.fsync_interval = fsync_interval
+        self.unsynced_records = 0
+        self.handle = None
+
+    def __enter__(self):
+        folder = os.path.dirname(os.path.abspath(self.checkpoint_path))
+        os.makedirs(folder, exist_ok=True)
+        repair_checkpoint(self.checkpoint_path)
+        self.handle = open(self.checkpoint_path, "a", encoding="utf-8")
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.sync()
+        self.handle.close()
+        self.handle = None
+
+    def append(self, record_id, data):
+        """
+        Append the record of an id.
+
+        :param record_id: Id of the record, e.g. a Wikipedia page id.
+        :param data: JSON serializable data of the record, None if the id could not be processed.
+        """
+        if isinstance(record_id, np.generic):
+            record_id = record_id.item()
+        self.handle.write(json.dumps({ID_KEY: record_id, DATA_KEY: data}) + "\n")
+        self.handle.flush()
+        self.unsynced_records += 1
+        if self.unsynced_records >= self.fsync_interval:
+            self.sync()
+
+    def sync(self):
+        """
+        Force the records written so far to disk.
+        """
+        self.handle.flush()
+        os.fsync(self.handle.fileno())
+        self.unsynced_records = 0
+
+
+# Helpers for reading
+
+def repair_checkpoint(checkpoint_path: str):
+    """
+    Drop the partial last line left by a crash, so that new records start on a new line.
+
+    :param checkpoint_path: Path to the checkpoint.
+    """
+    if not os.path.exists(checkpoint_path):
+        return
+    with open(checkpoint_path, "rb+") as handle:
+        size = handle.seek(0, os.SEEK_END)
+        if size == 0:
+            return
+        handle.seek(size - 1)
+        if handle.read(1) == b"\n":
+            return
+        # Find the end of the last complete line
+        position = size
+        while position > 0:
+            block_start = max(0, position - 4096)
+            handle.seek(block_start)
+            block = handle.read(position - block_start)
+            newline_index = block.rfind(b"\n")
+            if newline_index >= 0:
+                handle.truncate(block_start + newline_index + 1)
+                return
+            position = block_start
+        handle.truncate(0)
+
+
+def iter_checkpoint(checkpoint_path: str):
+    """
+    Stream the records of a checkpoint, a partial last line being skipped.
+
+    :param checkpoint_path: Path to the checkpoint.
+
+    :return: A generator of tuples with the id and the data of every record.
+    """
+    if not os.path.exists(checkpoint_path):
+        return
+    with open(checkpoint_path, encoding="utf-8") as handle:
+        for line in handle:
+            if not line.endswith("\n"):
+                return
+            record = json.loads(line)
+            yield record[ID_KEY], record[DATA_KEY]
+
+
+def get_checkpoint_ids(checkpoint_path: str, include_faulty=True) -> set:
+    """
+    Return the ids already recorded in a checkpoint, i.e. the ids to skip when resuming.
+
+    :param checkpoint_path: Path to the checkpoint.
+    :param include_faulty: Indicator to include the ids that could not be processed,
+                           False to retry them.
+
+    :return: Set of the recorded ids.
+    """
+    records = {}
+    for record_id, data in iter_checkpoint(checkpoint_path):
+        records[record_id] = data is not None
+    return set(record_id for record_id, is_processed in records.items() if is_processed or include_faulty)
+
+
+def get_faulty_ids(checkpoint_path: str) -> list:
+    """
+    Return the ids that could not be processed, the later records of an id overriding
+    the earlier ones.
+
+    :param checkpoint_path: Path to the checkpoint.
+
+    :return: List of the faulty ids, in order of first record.
+    """
+    records = {}
+    for record_id, data in iter_checkpoint(checkpoint_path):
+        records[record_id] = data is not None
+    return [record_id for record_id, is_processed in records.items() if not is_processed]
+
+
+def read_checkpoint_columns(checkpoint_path: str, columns: list) -> pd.DataFrame:
+    """
+    Read only the given entries of the data of a checkpoint into a dataframe, without
+    materializing the other entries.
+
+    :param checkpoint_path: Path to the checkpoint.
+    :param columns: List of the data entries to keep.
+
+    :return: Pandas Dataframe indexed by id with one column per entry, missing entries being
+             NaN. The faulty ids are not included and the later records of an id override
+             the earlier ones.
+
+    :raise FileNotFoundError: If the checkpoint does not exist.
+    """
+    if not os.path.exists(checkpoint_path):
+        raise FileNotFoundError(f"No checkpoint at {checkpoint_path}, a legacy JSON dictionnary can be "
+                                f"converted with convert_json_dictionary.")
+    rows = {}
+    for record_id, data in iter_checkpoint(checkpoint_path):
+        if data is None:
+            rows.pop(record_id, None)
+            continue
+        rows[record_id] = [data.get(col, float("nan")) for col in columns]
+    return pd.DataFrame.from_dict(rows, orient="index", columns=columns)
+
+
+def convert_json_dictionary(json_path: str, checkpoint_path: str, faulty_ids=()) -> int:
+    """
+    Convert a JSON dictionnary mapping the ids to their data, the format used before the
+    checkpoints, into a checkpoint. The records are appended to the checkpoint.
+
+    :param json_path: Path to the JSON dictionnary.
+    :param checkpoint_path: Path to the checkpoint.
+    :param faulty_ids: Ids that could not be processed, recorded without data.
+
+    :return: Number of records written.
+    """
+    with open(json_path, encoding="utf-8") as handle:
+        data_dict = json.load(handle)
+    with CheckpointWriter(checkpoint_path) as writer:
+        for record_id, data in data_dict.items():
+            # JSON keys are strings, the ids are written back as integers when possible
+            writer.append(int(record_id) if record_id.lstrip("-").isdigit() else record_id, data)
+        for record_id in faulty_ids:
+            writer.append(record_id, None)
+    return len(data_dict) + len(faulty_ids)
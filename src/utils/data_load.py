@@ -5,8 +5,23 @@ Contain the logic for loading data from the data folder.
 import pandas as pd
 import numpy as np
 import json
+import os
+import hashlib
+import re
+import time
+import datetime
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from dateutil.parser import parse as dateutil_parse_date
 
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.feather as feather
+except ImportError:
+    pa = None
+    pc = None
+    feather = None
+
 DATA_PATH = "../data"
 
 # CMU
@@ -58,6 +73,36 @@ DTYPES_IMDB_TITLE_PRINCIPALS = [pd.StringDtype(), pd.Int64Dtype(
 ), pd.StringDtype(), pd.StringDtype(), pd.StringDtype(), pd.StringDtype()]
 DTYPES_IMDB_RATE = [pd.StringDtype(), float, pd.Int64Dtype()]
 
+IMDB_LIST_SEPARATOR = ","
+
+# Relation name: (file name, columns, key column, list column, value column)
+IMDB_LIST_RELATIONS = {
+    "title_genre": ("title.basics.tsv.gz", COL_IMDB_TITLE_BASICS, "tconst", "genres", "genre"),
+    "title_director": ("title.crew.tsv.gz", COL_IMDB_TITLE_CREW, "tconst", "directors", "nconst"),
+    "title_writer": ("title.crew.tsv.gz", COL_IMDB_TITLE_CREW, "tconst", "writers", "nconst"),
+    "person_profession": ("name.basics.tsv.gz", COL_IMDB_NAME_BASICS, "nconst",
+                          "primary_profession", "profession"),
+    "person_known_for": ("name.basics.tsv.gz", COL_IMDB_NAME_BASICS, "nconst",
+                         "known_for_titles", "tconst"),
+}
+
+
+# Streaming
+
+CHUNK_SIZE = 100_000
+
+# Compact dtypes
+
+CATEGORY_MAX_UNIQUE_RATIO = 0.5
+INTEGER_DTYPES = [np.int8, np.int16, np.int32, np.int64]
+
+# Cache
+
+FOLDER_CACHE = "cache"
+CACHE_EXTENSION = "feather"
+CACHE_KEY_LENGTH = 16
+# Version of the parsed frames, to bump whenever the output of a reader changes
+CACHE_SCHEMA_VERSION = 2
 
 # CMU Jeremy
 
@@ -72,13 +117,24 @@ COL_NAMES_RAW_CMU_CHARACTER = ["wikipedia_movie_id", "freebase_movie_id",
                                "actor_gender", "actor_height", "actor_ethnicity", "actor_name",
                                "actor_age_at_release_date", "freebase_map_id", "freebase_character_id",
                                "freebase_actor_id"]
+# Same dtypes as inferred on the whole file, so that all the chunks share them
+DTYPES_RAW_CMU_CHARACTER = [np.int64, object, object, object, object, object, float, object, object,
+                            float, object, object, object]
 INDEX_COL_NAME_RAW_CMU_CHARACTER = "freebase_character_id"
 
 FREEBASE_EXTRA_SUFFIX = "language"
 
+FREEBASE_CODE_COL_NAME = "freebase_code"
+FREEBASE_LABEL_COL_NAME = "label"
+JSON_STRING_PATTERN = r'"((?:[^"\\]|\\.)*)"'
+FREEBASE_DICT_PATTERN = r'"(?P<freebase_code>[^"]+)"\s*:\s*"(?P<label>(?:[^"\\]|\\.)*)"'
+TVTROPES_MAP_KEYS = ["char", "movie", "id", "actor"]
+
 ACTOR_BIRTHDATE_MIN_LENGTH = 4
 ACTOR_BIRTHDATE_COL_NAME = "birth_date"
 ACTOR_NAME_COL_NAME = "name"
+ACTOR_ID_COL_NAME = "actor_id"
+CANONICAL_ACTOR_ID_COL_NAME = "canonical_actor_id"
 
 
 # Wikipedia
@@ -88,11 +144,26 @@ DEFAULT_DATE = ""
 YEAR_FORMAT = "%Y"
 YEAR_MONTH_FORMAT = "%Y-%m"
 YEAR_MONTH_DAY_FORMAT = "%Y-%m-%d"
-
-# IMDB Jeremy
-
-MOVIE_ID_COL_NAME = "movie_id"
-LAST_DUPLICATES_ID_LIST = [1,2,5,7,9,11,13,15,17,18,21]
+DATE_COL_NAME = "date"
+PRECISION_COL_NAME = "precision"
+DATE_PRECISIONS = {4: "year", 7: "month", 10: "day"}
+ISO_DATE_PATTERN = re.compile(r"(\d{4})-(\d{2})(?:-(\d{2}))?")
+YEAR_PATTERN = re.compile(r"\d{4}")
+TEXT_DATE_PATTERN = re.compile(r"([A-Za-z]+) (\d{1,2}),? (\d{4})")
+MONTH_NUMBERS = {**{datetime.date(2000, month, 1).strftime("%B").lower(): month for month in range(1, 13)},
+                 **{datetime.date(2000, month, 1).strftime("%b").lower(): month for month in range(1, 13)}}
+# Parsed dates of the cleaned date fields, shared by all the calls of parse_dates
+PARSED_DATES_CACHE = dict()
+
+# Id interning
+
+FOLDER_GENERATED = "generated"
+ID_DICTIONARY_FILE_NAME = "id_dictionary_df.pkl"
+MISSING_ID_KEY = -1
+ID_COLUMN_NAMESPACES = {"actor_id": "actor", "freebase_actor_id": "actor",
+                        "character_id": "character", "freebase_character_id": "character",
+                        "tconst": "title", "nconst": "person", "director_id": "person",
+                        "writer_id": "person"}
 
 # Helpers for CMU dataset extraction and parsing
 
@@ -125,10 +196,35 @@ def get_raw_character_dataframe(character_metadata_path: str):
     """
     character_meta_data = pd.read_csv(character_metadata_path, sep="\t",
                                       names=COL_NAMES_RAW_CMU_CHARACTER,
+                                      dtype=dtypes_map(DTYPES_RAW_CMU_CHARACTER,
+                                                       COL_NAMES_RAW_CMU_CHARACTER),
                                       index_col=INDEX_COL_NAME_RAW_CMU_CHARACTER)
     return character_meta_data
 
 
+def iter_raw_character_dataframe(character_metadata_path: str, chunk_size=CHUNK_SIZE,
+                                 columns=None, row_filter=None):
+    """
+    Stream the raw character metadata of the CMU dataset by chunks.
+
+    The chunks are indexed by the freebase character id like in get_raw_character_dataframe,
+    which allows to build the relation tables without loading the whole file.
+
+    :param character_metadata_path: Path to the CMU character dataset.
+    :param chunk_size: Number of raw rows parsed per chunk.
+    :param columns: Columns to keep in addition to the index, all the columns if None.
+    :param row_filter: Function mapping a chunk to a boolean mask of the rows to keep.
+
+    :return: A generator of dataframes with the metadata for the characters.
+    """
+    if columns is not None:
+        columns = list(columns) + [INDEX_COL_NAME_RAW_CMU_CHARACTER]
+    dtypes = dtypes_map(DTYPES_RAW_CMU_CHARACTER, COL_NAMES_RAW_CMU_CHARACTER)
+    for chunk in iter_tsv_chunks(character_metadata_path, COL_NAMES_RAW_CMU_CHARACTER, dtypes,
+                                 chunk_size=chunk_size, columns=columns, row_filter=row_filter):
+        yield chunk.set_index(INDEX_COL_NAME_RAW_CMU_CHARACTER)
+
+
 def freebase_dict_parser_python(entry: str) -> list:
     """ 
     Parse the entry of the given raw data freebase based entry using built-in python functions. 
@@ -160,38 +256,45 @@ def apply_entry_level_filter(entry: str, filter_dict: dict) -> str:
     return new_entry
 
 
-def freebase_dict_parser(entry: str, filter_dict: dict) -> list:
-    """ 
-    Parse the entry of the given raw data freebase based entry using json format. 
+def apply_column_level_filter(column: pd.Series, filter_dict: dict) -> pd.Series:
+    """
+    Replace in a whole column the different terms in the filter dictionnary.
 
-    :param entry: Non parsed freebase data entry.
+    :param column: Series of freebase data entries.
     :param filter_dict: Dictionnary with mapping for terms to be replaced.
 
-    :return: List containing the parsed information from the raw freebase entry.
+    :return: The newly filtered column.
     """
-    entry_dict = json.loads(entry)
-    if len(entry_dict) > 0:
-        return list(set([apply_entry_level_filter(s.lower(), filter_dict)
-                         for s in entry_dict.values()]))
-    else:
-        return []
+    for old, new in filter_dict.items():
+        column = column.str.replace(old, new, regex=False)
+    return column
 
 
-def create_flat_movie_entry_list(entry_name: str, movie_raw_df: pd.DataFrame, filter_dict: dict) -> list:
-    """ 
-    Create a flat list with the movie ids together with the given entry type. 
+def build_relation_table(column: pd.Series, entry_id_name: str, movie_id_name: str,
+                         filter_dict=dict()) -> pd.DataFrame:
+    """
+    Build the relation table between the movies and the entries of a raw freebase column.
 
-    :param entry_name: Name of the type of entry to be parsed.
-    :param movie_raw_df: Dataframe with the raw metadata and plots for the CMU dataset movies.
+    The column is exploded in a single vectorized pass, the entries are lower cased and
+    filtered at the column level, and the duplicated pairs are removed on categorical codes.
+
+    :param column: Series of raw freebase entries indexed by the movie ids.
+    :param entry_id_name: Name of the entry column in the relation table.
+    :param movie_id_name: Name of the movie id column in the relation table.
     :param filter_dict: Dictionnary with mapping for terms to be replaced.
 
-    :return: Flat list of tuples with the movie_id and a corresponding data entry.
+    :return: Dataframe with one row per distinct (movie, entry) pair.
     """
-    flat_entry_list = [(idx, entry) for idx, entry_list in
-                       movie_raw_df[entry_name].apply(
-                           lambda e: freebase_dict_parser(e, filter_dict)).to_dict().items()
-                       for entry in entry_list]
-    return list(set(flat_entry_list))
+    movie_ids = column.index.to_series(index=pd.RangeIndex(len(column)))
+    exploded_df = parse_freebase_dict_column(column.reset_index(drop=True), movie_ids,
+                                             id_name=movie_id_name)
+    entries = apply_column_level_filter(
+        exploded_df[FREEBASE_LABEL_COL_NAME].str.lower(), filter_dict)
+    entry_relation_df = pd.DataFrame({movie_id_name: exploded_df[movie_id_name],
+                                      entry_id_name: entries.astype("category")})
+    entry_relation_df = entry_relation_df.drop_duplicates().reset_index(drop=True)
+    entry_relation_df[entry_id_name] = entry_relation_df[entry_id_name].astype(object)
+    return entry_relation_df
 
 
 def create_entry_and_relation_table(movie_raw_df: pd.DataFrame, entry_name: str,
@@ -208,13 +311,38 @@ def create_entry_and_relation_table(movie_raw_df: pd.DataFrame, entry_name: str,
     :return: One dataframe containing the different entry values and one dataframe containing the 
              between the movies and these values.
     """
-    entry_relation_df = pd.DataFrame(create_flat_movie_entry_list(
-        entry_name, movie_raw_df, filter_dict), columns=[movie_id_name, entry_id_name])
+    entry_relation_df = build_relation_table(movie_raw_df[entry_name], entry_id_name,
+                                             movie_id_name, filter_dict)
     entry_df = pd.DataFrame(
         {entry_id_name: entry_relation_df[entry_id_name].unique()}).set_index([entry_id_name])
     return entry_df, entry_relation_df
 
 
+def create_entry_and_relation_tables(movie_raw_df: pd.DataFrame, entry_specs: list[tuple],
+                                     movie_id_name: str, workers=1) -> dict:
+    """
+    Creates the entity and relation tables for several entry types, possibly in parallel.
+
+    :param movie_raw_df: Dataframe with the raw metadata and plots for the CMU dataset movies.
+    :param entry_specs: List of (entry_name, entry_id_name, filter_dict) tuples.
+    :param movie_id_name: Name of the wikipedia movie id in the raw movie dataframe.
+    :param workers: Number of processes used, the entry types are processed sequentially if 1.
+
+    :return: Dictionnary mapping each entry name to its entity and relation dataframes.
+    """
+    if workers <= 1:
+        return {entry_name: create_entry_and_relation_table(movie_raw_df, entry_name, entry_id_name,
+                                                            movie_id_name, filter_dict)
+                for entry_name, entry_id_name, filter_dict in entry_specs}
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        # Only the parsed column is sent to the workers, not the whole movie dataframe.
+        futures = {entry_name: executor.submit(create_entry_and_relation_table,
+                                               movie_raw_df[[entry_name]], entry_name,
+                                               entry_id_name, movie_id_name, filter_dict)
+                   for entry_name, entry_id_name, filter_dict in entry_specs}
+        return {entry_name: future.result() for entry_name, future in futures.items()}
+
+
 # Helpers for actor duplication handling
 
 def retrieve_duplicated_actors_ids(actor_dataframe: pd.DataFrame) -> list:
@@ -227,63 +355,118 @@ def retrieve_duplicated_actors_ids(actor_dataframe: pd.DataFrame) -> list:
 
     :param actor_dataframe: Pandas Dataframe containing actor information.
 
-    :return: List of tuples of duplicated actors ids.
+    :return: List of lists of duplicated actors ids, one list per cluster of duplicates.
     """
-    duplicated_actors_df = actor_dataframe[
-        actor_dataframe.duplicated(keep=False)]
     # We stick to defined actors, the row containing only missing values cannot be
     # Assimilated one to another.
-    duplicated_actors_df = duplicated_actors_df[~duplicated_actors_df.isna()]
-    duplicated_actors_df = duplicated_actors_df.reset_index()
-    duplicated_actors_df = duplicated_actors_df[
-        ~duplicated_actors_df[ACTOR_BIRTHDATE_COL_NAME].isna()]
-    duplicated_actors_df = duplicated_actors_df.groupby(
-        ACTOR_NAME_COL_NAME, dropna=False)
-    duplicated_actors_dict = duplicated_actors_df[ACTOR_BIRTHDATE_COL_NAME].apply(
-        list).to_dict()
-    # Filter actors
-    duplicated_actors_ids = []
-    for actor_name, birth_dates in duplicated_actors_dict.items():
-        first_date, second_date = birth_dates[0], birth_dates[1]
-        # We filter actors which do not have only the first same
-        # birth year but the same birth date.
-        if first_date == second_date and len(first_date) > ACTOR_BIRTHDATE_MIN_LENGTH:
-            duplicated_actors_ids.append(
-                actor_dataframe[(actor_dataframe[ACTOR_NAME_COL_NAME] == actor_name)
-                                & (actor_dataframe[ACTOR_BIRTHDATE_COL_NAME] == first_date)
-                                ].index.to_list())
-    return duplicated_actors_ids
-
-
-def rematch_duplicated_actor_ids(duplicated_ids: list[int], actor_dataframe: pd.DataFrame,
-                                 relationship_dataframes: pd.DataFrame):
+    birth_dates = actor_dataframe[ACTOR_BIRTHDATE_COL_NAME]
+    is_defined = birth_dates.notna() & (birth_dates.astype(str).str.len() > ACTOR_BIRTHDATE_MIN_LENGTH)
+    defined_actors_df = actor_dataframe[is_defined & actor_dataframe.duplicated(keep=False)]
+    cluster_ids = defined_actors_df.groupby(list(defined_actors_df.columns), dropna=False,
+                                            sort=False).ngroup()
+    clusters = pd.Series(defined_actors_df.index, index=defined_actors_df.index).groupby(
+        cluster_ids.to_numpy(), sort=False).apply(list)
+    return [cluster for cluster in clusters if len(cluster) > 1]
+
+
+def resolve_duplicate_clusters(ids: pd.Index, duplicated_ids: list) -> pd.Series:
+    """
+    Resolve clusters of duplicated ids into canonical ids with a union-find.
+
+    Clusters may have any size and may overlap, e.g. when they come from several
+    criteria, in which case they are merged transitively. The canonical id of a
+    cluster is its first id in the given order of ids.
+
+    :param ids: Index of all the ids.
+    :param duplicated_ids: List of lists of duplicated ids.
+
+    :return: Series mapping every non canonical id to its canonical id.
+
+    :raise KeyError: If a duplicated id is not in the ids.
+    """
+    first_ids = [cluster[0] for cluster in duplicated_ids for _ in cluster[1:]]
+    other_ids = [duplicate for cluster in duplicated_ids for duplicate in cluster[1:]]
+    first_positions, other_positions = ids.get_indexer(first_ids), ids.get_indexer(other_ids)
+    is_missing = np.concatenate([first_positions, other_positions]) == -1
+    if is_missing.any():
+        missing_ids = np.concatenate([np.asarray(first_ids, dtype=object),
+                                      np.asarray(other_ids, dtype=object)])[is_missing]
+        raise KeyError(f"Unknown duplicated ids {sorted(set(missing_ids.tolist()), key=str)}.")
+    # Each id points to the smallest position of its cluster found so far, the
+    # pointers are then shortcut until no pointer changes.
+    labels = np.arange(len(ids))
+    while True:
+        new_labels = labels.copy()
+        smallest = np.minimum(labels[first_positions], labels[other_positions])
+        np.minimum.at(new_labels, first_positions, smallest)
+        np.minimum.at(new_labels, other_positions, smallest)
+        new_labels = new_labels[new_labels]
+        if (new_labels == labels).all():
+            break
+        labels = new_labels
+    is_duplicate = labels != np.arange(len(ids))
+    return pd.Series(ids[labels[is_duplicate]], index=ids[is_duplicate].rename(ACTOR_ID_COL_NAME),
+                     name=CANONICAL_ACTOR_ID_COL_NAME)
+
+
+def remap_ids(relation_dataframe: pd.DataFrame, id_mapping: pd.Series, id_column: str):
+    """
+    Replace inplace the mapped ids of a relation table and drop the duplicated rows.
+
+    :param relation_dataframe: Pandas Dataframe with an id column.
+    :param id_mapping: Series mapping old ids to new ids.
+    :param id_column: Name of the id column.
+    """
+    if len(id_mapping) == 0:
+        return
+    values = relation_dataframe[id_column].to_numpy()
+    positions = id_mapping.index.get_indexer(values)
+    is_mapped = positions >= 0
+    new_values = values.copy()
+    new_values[is_mapped] = id_mapping.to_numpy()[positions[is_mapped]]
+    relation_dataframe[id_column] = new_values.astype(values.dtype)
+    relation_dataframe.drop_duplicates(inplace=True)
+
+
+def rematch_duplicated_actor_ids(duplicated_ids: list, actor_dataframe: pd.DataFrame,
+                                 relationship_dataframes: pd.DataFrame) -> pd.Series:
     """ 
     Merge the different duplicated ids in the given dataframes inplace. 
 
-    :param duplicated_ids: List of tuples of duplicated actors ids.
+    :param duplicated_ids: List of lists of duplicated actors ids.
     :param actor_dataframe: Pandas Dataframe containing actor information.
     :param relationship_dataframes: List of dataframes where actors are involved.
+
+    :return: Series mapping every removed actor id to its canonical actor id.
     """
-    for conserved_id, thrown_id in duplicated_ids:
-        actor_dataframe.drop(thrown_id, inplace=True)
-        for relation_df in relationship_dataframes:
-            relation_df["actor_id"] = relation_df["actor_id"].apply(
-                lambda idx: conserved_id if idx == thrown_id else idx)
-            relation_df.drop_duplicates(inplace=True)
+    id_mapping = resolve_duplicate_clusters(actor_dataframe.index, duplicated_ids)
+    actor_dataframe.drop(id_mapping.index, inplace=True)
+    for relation_df in relationship_dataframes:
+        remap_ids(relation_df, id_mapping, ACTOR_ID_COL_NAME)
+    return id_mapping
 
 
 def process_duplicated_actors(actor_dataframe: pd.DataFrame,
-                              relationship_dataframes: pd.DataFrame):
+                              relationship_dataframes: pd.DataFrame) -> pd.DataFrame:
     """ 
     Identify duplicated actors entries and merge inplace the different entries together. 
 
+    Duplicates are the actors sharing the same normalized name and full birth date, found
+    by hashing, see utils.person_matching.find_duplicate_actor_clusters.
+
     :param actor_dataframe: Pandas Dataframe containing actor information.
     :param relationship_dataframes:List of dataframes where actors are involved.
+
+    :return: Pandas Dataframe mapping every removed actor id to its canonical actor id,
+             to be saved with the other tables.
     """
-    duplicated_ids = retrieve_duplicated_actors_ids(actor_dataframe)
-    rematch_duplicated_actor_ids(
-        duplicated_ids, actor_dataframe, relationship_dataframes)
-    
+    # Imported here since person_matching depends on this module
+    from utils import person_matching
+    duplicated_ids = person_matching.find_duplicate_actor_clusters(actor_dataframe)
+    return rematch_duplicated_actor_ids(
+        duplicated_ids, actor_dataframe, relationship_dataframes).to_frame()
+
+
 # Helpers for Wikipedia data loading, parsing and integration
         
 def clean_date_entry(date_field: list[str]) -> list[str]:
@@ -292,12 +475,12 @@ def clean_date_entry(date_field: list[str]) -> list[str]:
     
     :param date_field: List of data information for a single movie.
     
-    :return: A list of cleaned date information for the given movie.
+    :return: A list of cleaned date information for the given movie, in order of appearance.
     
     """
     if type(date_field) != list:
         date_field = [str(date_field)]
-    clean_date = list(set([s.replace("(","").replace(")","") for s in date_field if s != '\xa0(']))
+    clean_date = list(dict.fromkeys([s.replace("(","").replace(")","") for s in date_field if s != '\xa0(']))
     return clean_date
 
 def parse_date_columns(wikipedia_dataframe: pd.DataFrame,
@@ -310,8 +493,90 @@ def parse_date_columns(wikipedia_dataframe: pd.DataFrame,
     
     """
     for col in date_columns:
-        wikipedia_dataframe[col] = wikipedia_dataframe[col].apply(lambda d: clean_date_entry(d))
-        wikipedia_dataframe[col] = wikipedia_dataframe[col].apply(lambda d: parse_date(d))
+        wikipedia_dataframe[col] = parse_dates(wikipedia_dataframe[col])[DATE_COL_NAME]
+
+def parse_date_fast(date_field: tuple):
+    """
+    Parse a cleaned date field with the regular expressions of the common date shapes,
+    i.e. YYYY, YYYY-MM(-DD) and Month D, YYYY, following the same cascade as parse_date.
+
+    :param date_field: Cleaned wikipedia date entry.
+
+    :return: Date parsed, or None if the field requires the general parser.
+    """
+    try:
+        for entry in date_field:
+            if "-" in entry and "," not in entry:
+                match = ISO_DATE_PATTERN.fullmatch(entry)
+                if match is None:
+                    return None
+                year, month, day = match.groups()
+                datetime.date(int(year), int(month), int(day or 1))
+                return entry
+        if len(date_field) == 1 and YEAR_PATTERN.fullmatch(date_field[0]) is not None:
+            return date_field[0]
+        for entry in date_field:
+            splitted_entry = entry.split(" ")
+            if splitted_entry[-1] == "":
+                splitted_entry = splitted_entry[:-1]
+            if len(date_field) > 1 and len(splitted_entry) != 3:
+                continue
+            match = TEXT_DATE_PATTERN.fullmatch(entry)
+            if match is None or match.group(1).lower() not in MONTH_NUMBERS:
+                return None
+            month_name, day, year = match.groups()
+            return datetime.date(int(year), MONTH_NUMBERS[month_name.lower()], int(day)).strftime(
+                YEAR_MONTH_DAY_FORMAT)
+    except ValueError:
+        return None
+    return None
+
+def parse_dates(date_series: pd.Series) -> pd.DataFrame:
+    """
+    Parse a whole series of date fields into standard date format.
+
+    Identical fields are parsed once, the common shapes are parsed by regular
+    expressions, the other ones by parse_date, and the results are cached across calls.
+
+    :param date_series: Series of date fields, lists of strings or single values.
+
+    :return: Pandas Dataframe with the dates parsed, or empty strings if unable to retrieve
+             them, and their precision ("year", "month", "day" or None), aligned with the series.
+    """
+    raw_fields = date_series.map(lambda d: tuple(d) if type(d) == list else d)
+    codes, unique_fields = pd.factorize(raw_fields, use_na_sentinel=False)
+    unique_dates = []
+    for raw_field in unique_fields:
+        date_field = tuple(clean_date_entry(list(raw_field) if type(raw_field) == tuple else raw_field))
+        date = PARSED_DATES_CACHE.get(date_field)
+        if date is None:
+            date = parse_date_fast(date_field)
+            if date is None:
+                date = parse_date(list(date_field))
+            PARSED_DATES_CACHE[date_field] = date
+        unique_dates.append(date)
+    dates = np.array(unique_dates, dtype=object)[codes]
+    precisions = np.array([DATE_PRECISIONS.get(len(date)) for date in unique_dates], dtype=object)[codes]
+    return pd.DataFrame({DATE_COL_NAME: dates, PRECISION_COL_NAME: precisions}, index=date_series.index)
+
+def dates_to_datetime(date_series: pd.Series, errors="raise") -> pd.Series:
+    """
+    Convert a series of dates of any precision to datetimes with parse_dates, the missing
+    month and day being the first ones.
+
+    :param date_series: Series of date strings.
+    :param errors: Either "raise" to fail on the unparsable dates or "coerce" to set them to NaT,
+                   the missing dates are always NaT.
+
+    :return: Series of datetimes.
+    """
+    dates = parse_dates(date_series)[DATE_COL_NAME]
+    if errors == "raise":
+        unparsable = date_series.notna() & (dates == DEFAULT_DATE)
+        if unparsable.any():
+            raise ValueError(f"Unable to parse the dates {date_series[unparsable].unique()[:5].tolist()}.")
+    padded_dates = dates.map(lambda date: date + "-01-01"[len(date) - 4:] if len(date) > 0 else None)
+    return pd.to_datetime(padded_dates, format=YEAR_MONTH_DAY_FORMAT, errors=errors)
 
 def find_appropriate_date_format(date_entry: str, split_char: str):
     date_parsed = dateutil_parse_date(date_entry)
@@ -382,36 +647,124 @@ def parse_date(date_field: list[str]) -> str:
         return DEFAULT_DATE
     
     
-# Helpers for IMDB integration
+# Helpers for id interning
 
-def get_duplicated_movie_ids(movie_dataframe: pd.DataFrame)-> pd.Series:
-    """ 
-    Retrieve the indices of duplicated rows in the given movie dataframe.
-    
-    :param dataframe: Pandas dataframe with a wikipedia movie id column.
-    
-    :return: Series containing boolean, indicator of duplicate.
-    
+def get_id_dictionary_path() -> str:
     """
-    return movie_dataframe[MOVIE_ID_COL_NAME].duplicated(keep=False)
+    Return the path where the id dictionary is persisted.
 
-def update_merged_dataframes(standard_dataframe: pd.DataFrame,
-                             duplicated_dataframe: pd.DataFrame) -> tuple:
+    :return: Path to the id dictionary file.
     """
-    Update the two given dataframes by adding non duplicates to the standard one and keeping
-    only duplicates for the duplicated dataframe.
-    
-    :param standard_dataframe: Pandas DataFrame containing the non duplicated entries.
-    :param duplicated_dataframe: Pandas DataFrame containing the duplicated entries.
-    
-    :return: The two updated dataframes.
-    
+    return f"{DATA_PATH}/{FOLDER_GENERATED}/{ID_DICTIONARY_FILE_NAME}"
+
+
+def load_id_dictionary(path=None) -> dict:
+    """
+    Load the persisted id dictionary, or an empty one if it does not exist yet.
+
+    The dictionary maps each namespace (actor, character, title, person) to a pandas
+    Index of external ids, the surrogate key of an id being its position in the index.
+
+    :param path: Path to the id dictionary file, default in the generated data folder.
+
+    :return: Dictionnary mapping each namespace to the Index of its external ids.
+    """
+    path = get_id_dictionary_path() if path is None else path
+    if not os.path.exists(path):
+        return dict()
+    id_dictionary_df = pd.read_pickle(path).sort_values(["namespace", "key"])
+    return {namespace: pd.Index(ids["external_id"].to_numpy(dtype=object))
+            for namespace, ids in id_dictionary_df.groupby("namespace")}
+
+
+def save_id_dictionary(id_dictionary: dict, path=None):
+    """
+    Persist the id dictionary as a (namespace, external_id, key) table.
+
+    :param id_dictionary: Dictionnary mapping each namespace to the Index of its external ids.
+    :param path: Path to the id dictionary file, default in the generated data folder.
+    """
+    path = get_id_dictionary_path() if path is None else path
+    id_dictionary_df = pd.concat([
+        pd.DataFrame({"namespace": namespace,
+                      "external_id": pd.Series(ids.to_numpy(), dtype=pd.StringDtype()),
+                      "key": np.arange(len(ids), dtype=np.int32)})
+        for namespace, ids in id_dictionary.items()], ignore_index=True)
+    id_dictionary_df["namespace"] = id_dictionary_df["namespace"].astype("category")
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    id_dictionary_df.to_pickle(path)
+
+
+def intern_ids(values: pd.Series, namespace: str, id_dictionary: dict) -> pd.Series:
+    """
+    Map external ids to dense int32 surrogate keys, registering the unseen ones.
+
+    Missing values are mapped to MISSING_ID_KEY.
+
+    :param values: Series of external ids.
+    :param namespace: Namespace of the ids (actor, character, title, person).
+    :param id_dictionary: Dictionnary mapping each namespace to the Index of its external ids,
+                          updated inplace with the new ids.
+
+    :return: Series of int32 keys aligned with the given values.
+    """
+    known_ids = id_dictionary.get(namespace, pd.Index([], dtype=object))
+    ids = values.to_numpy(dtype=object, na_value=None)
+    missing = pd.isna(ids)
+    keys = known_ids.get_indexer(ids)
+    unseen = (keys == -1) & ~missing
+    if unseen.any():
+        known_ids = known_ids.append(pd.Index(pd.unique(ids[unseen]), dtype=object))
+        if len(known_ids) > np.iinfo(np.int32).max:
+            raise ValueError(f"Too many ids in namespace {namespace} for int32 keys.")
+        id_dictionary[namespace] = known_ids
+        keys[unseen] = known_ids.get_indexer(ids[unseen])
+    keys[missing] = MISSING_ID_KEY
+    return pd.Series(keys.astype(np.int32), index=values.index, name=values.name)
+
+
+def resolve_ids(keys: pd.Series, namespace: str, id_dictionary: dict) -> pd.Series:
+    """
+    Map int32 surrogate keys back to their external ids.
+
+    :param keys: Series of surrogate keys.
+    :param namespace: Namespace of the ids (actor, character, title, person).
+    :param id_dictionary: Dictionnary mapping each namespace to the Index of its external ids.
+
+    :return: Series of external ids, missing for MISSING_ID_KEY.
+    """
+    known_ids = id_dictionary[namespace].to_numpy()
+    key_array = keys.to_numpy()
+    missing = key_array == MISSING_ID_KEY
+    ids = np.empty(len(key_array), dtype=object)
+    ids[~missing] = known_ids[key_array[~missing]]
+    ids[missing] = None
+    return pd.Series(ids, index=keys.index, name=keys.name, dtype=pd.StringDtype())
+
+
+def intern_table_ids(df: pd.DataFrame, id_dictionary: dict,
+                     column_namespaces=ID_COLUMN_NAMESPACES) -> pd.DataFrame:
+    """
+    Replace the external id columns, and the index, of a table by their surrogate keys.
+
+    :param df: Table with external id columns.
+    :param id_dictionary: Dictionnary mapping each namespace to the Index of its external ids,
+                          updated inplace with the new ids.
+    :param column_namespaces: Mapping between the id column names and their namespace.
+
+    :return: A copy of the table where the id columns hold int32 keys.
     """
-    duplicated_ids = get_duplicated_movie_ids(duplicated_dataframe)
-    standard_dataframe = pd.concat([
-        standard_dataframe,duplicated_dataframe[~duplicated_ids]]).reset_index().drop("index",axis=1)
-    duplicated_dataframe = duplicated_dataframe[duplicated_ids].reset_index().drop("index",axis=1)
-    return standard_dataframe, duplicated_dataframe
+    interned_df = df.copy()
+    for col in interned_df.columns:
+        if col in column_namespaces:
+            interned_df[col] = intern_ids(interned_df[col], column_namespaces[col], id_dictionary)
+    if interned_df.index.name in column_namespaces:
+        index_name = interned_df.index.name
+        interned_df.index = pd.Index(intern_ids(interned_df.index.to_series(),
+                                                column_namespaces[index_name], id_dictionary),
+                                     name=index_name)
+    return interned_df
+
 
 # Helpers for IMDB integration (Aamir)
 
@@ -437,7 +790,7 @@ def parse_dict(x) -> list:
 
     :return: A list of the values of the dictionary.
     """
-    return list(eval(x).values())
+    return list(json.loads(x).values())
 
 
 def parse_imdb_list(x) -> list:
@@ -451,101 +804,592 @@ def parse_imdb_list(x) -> list:
     return x.split(",")
 
 
-def load_cmu_char_metadata() -> pd.DataFrame:
+def unescape_json_strings(series: pd.Series) -> pd.Series:
     """
-    Load the character metadata from the CMU dataset.
+    Decode the JSON escape sequences of the given raw string values.
+
+    Only the entries containing a backslash are decoded, the others are returned as is.
+
+    :param series: Series of raw JSON string contents, without the surrounding quotes.
+
+    :return: Series with the decoded strings.
+    """
+    escaped = series.str.contains("\\", regex=False, na=False)
+    if escaped.any():
+        series = series.copy()
+        series[escaped] = series[escaped].map(lambda s: json.loads(f'"{s}"'))
+    return series
+
+
+def parse_freebase_dict_column(column: pd.Series, ids: pd.Series,
+                               id_name="wikipedia_movie_id") -> pd.DataFrame:
+    """
+    Parse a whole column of Freebase dictionaries into an exploded table in one pass.
+
+    Each entry such as '{"/m/02h40lc": "English Language"}' produces one row per
+    key/value pair. The parsing relies on a single vectorized regex extraction
+    instead of evaluating each entry.
+
+    :param column: Series of raw Freebase dictionaries in string format.
+    :param ids: Series, aligned with the column, with the id of each entry.
+    :param id_name: Name of the id column in the output table.
+
+    :return: A dataframe with the id, the freebase code and the label of each pair.
+    """
+    pairs = column.str.extractall(FREEBASE_DICT_PATTERN)
+    row_positions = column.index.get_indexer(pairs.index.get_level_values(0))
+    exploded_df = pd.DataFrame({
+        id_name: ids.to_numpy()[row_positions],
+        FREEBASE_CODE_COL_NAME: pairs[FREEBASE_CODE_COL_NAME].to_numpy(),
+        FREEBASE_LABEL_COL_NAME: unescape_json_strings(pairs[FREEBASE_LABEL_COL_NAME]).to_numpy()})
+    return exploded_df
+
+
+def freebase_table_to_lists(exploded_df: pd.DataFrame, ids: pd.Series,
+                            id_name="wikipedia_movie_id") -> pd.Series:
+    """
+    Group an exploded Freebase table back into one list of labels per id.
+
+    :param exploded_df: Table produced by parse_freebase_dict_column.
+    :param ids: Series with the ids for which a list is requested.
+    :param id_name: Name of the id column in the exploded table.
+
+    :return: Series aligned with ids containing the list of labels, empty if none.
+    """
+    labels = exploded_df.groupby(id_name, sort=False)[FREEBASE_LABEL_COL_NAME].agg(list)
+    lists = labels.reindex(ids.to_numpy())
+    lists = lists.map(lambda l: l if isinstance(l, list) else [])
+    return pd.Series(lists.to_numpy(), index=ids.index)
+
+
+def parse_json_string_fields(column: pd.Series, keys: list[str]) -> pd.DataFrame:
+    """
+    Extract the string fields of flat JSON objects stored in a column.
+
+    :param column: Series of raw JSON objects in string format.
+    :param keys: Keys of the fields to extract.
+
+    :return: A dataframe with one column per key, aligned with the given column.
+    """
+    fields = dict()
+    for key in keys:
+        raw_field = column.str.extract(f'"{key}"\\s*:\\s*' + JSON_STRING_PATTERN, expand=False)
+        fields[key] = unescape_json_strings(raw_field)
+    return pd.DataFrame(fields, index=column.index)
+
+
+def parse_json_string_array_column(column: pd.Series) -> pd.Series:
+    """
+    Explode a column of JSON arrays of strings in one vectorized pass.
+
+    :param column: Series of raw JSON arrays in string format, e.g. '["Self","Narrator"]'.
+
+    :return: Series of the decoded strings, indexed by the position of their row in the
+             column and by their position in the array.
+    """
+    values = column.str.extractall(JSON_STRING_PATTERN)[0]
+    values.index = pd.MultiIndex.from_arrays(
+        [column.index.get_indexer(values.index.get_level_values(0)),
+         values.index.get_level_values(1)], names=["row", "position"])
+    return unescape_json_strings(values)
+
+
+# Helpers for streaming the raw files by chunks
+
+
+def tsv_usecols(names: list[str], columns=None) -> list[str]:
+    """
+    Return the columns read from a raw TSV file, in the order of the file.
+
+    :param names: Names of all the columns of the file.
+    :param columns: Columns to keep, all the columns if None.
+
+    :return: List of the columns to read.
+    """
+    return names if columns is None else [c for c in names if c in set(columns)]
+
+
+def empty_tsv_chunk(names: list[str], dtypes: dict, columns=None, format_function=None) -> pd.DataFrame:
+    """
+    Build the empty chunk that iter_tsv_chunks would yield if no row was kept, i.e. with the
+    projected columns and their dtypes.
+
+    :param names: Names of all the columns of the file.
+    :param dtypes: Dictionnary mapping the columns to their dtypes.
+    :param columns: Columns to keep, all the columns if None.
+    :param format_function: Function applied on each chunk after filtering.
+
+    :return: An empty dataframe.
+    """
+    chunk = pd.DataFrame({c: pd.Series(dtype=dtypes.get(c, object)) for c in tsv_usecols(names, columns)})
+    return chunk if format_function is None else format_function(chunk)
+
+
+def iter_tsv_chunks(file_path: str, names: list[str], dtypes: dict, chunk_size=CHUNK_SIZE,
+                    columns=None, row_filter=None, format_function=None, **read_kwargs):
+    """
+    Stream a raw TSV file by typed chunks with optional projection and row filtering.
+
+    :param file_path: Path to the raw TSV file.
+    :param names: Names of all the columns of the file.
+    :param dtypes: Dictionnary mapping the columns to their dtypes.
+    :param chunk_size: Number of raw rows parsed per chunk.
+    :param columns: Columns to keep, all the columns if None.
+    :param row_filter: Function mapping a raw chunk to a boolean mask of the rows to keep.
+    :param format_function: Function applied on each chunk after filtering.
+    :param read_kwargs: Extra arguments given to pandas.read_csv.
+
+    :return: A generator of dataframes.
+    """
+    usecols = tsv_usecols(names, columns)
+    chunk_dtypes = {c: dtype for c, dtype in dtypes.items() if c in set(usecols)}
+    reader = pd.read_csv(file_path, sep="\t", names=names, usecols=usecols,
+                         dtype=chunk_dtypes, chunksize=chunk_size, **read_kwargs)
+    with reader:
+        for chunk in reader:
+            # Filter before formatting, so that only the kept rows are formatted
+            if row_filter is not None:
+                chunk = chunk[row_filter(chunk)]
+            if len(chunk) > 0:
+                yield chunk if format_function is None else format_function(chunk)
+
+
+def concat_chunks(chunks, chunk_function=None, drop_duplicates=False, empty_chunk=None) -> pd.DataFrame:
+    """
+    Build a table incrementally from a stream of chunks.
+
+    :param chunks: Iterable of dataframes, e.g. from iter_cmu_char_metadata.
+    :param chunk_function: Function turning each chunk into a partial table, identity if None.
+    :param drop_duplicates: Indicator to remove duplicated rows, both per chunk and at the end.
+    :param empty_chunk: Empty chunk with the columns and dtypes of the stream, e.g. from
+                        empty_tsv_chunk, used to build the table when no chunk is given.
+
+    :return: The concatenation of the partial tables, an empty table with the columns of the
+             partial tables if no chunk is given and empty_chunk is not None.
+    """
+    partial_tables = []
+    for chunk in chunks:
+        partial_table = chunk if chunk_function is None else chunk_function(chunk)
+        if drop_duplicates:
+            partial_table = partial_table.drop_duplicates()
+        partial_tables.append(partial_table)
+    if len(partial_tables) == 0:
+        if empty_chunk is None:
+            return pd.DataFrame()
+        return empty_chunk if chunk_function is None else chunk_function(empty_chunk)
+    table = pd.concat(partial_tables)
+    if drop_duplicates:
+        table = table.drop_duplicates()
+    return table
+
+
+# Helpers for compact dtypes
+
+
+def smallest_integer_dtype(series: pd.Series):
+    """
+    Find the smallest numpy integer dtype holding all the values of an integer series.
+
+    :param series: Series of integers, possibly with missing values.
+
+    :return: The smallest integer dtype, None if the values do not fit in any.
+    """
+    values = series.dropna()
+    if len(values) == 0:
+        return INTEGER_DTYPES[0]
+    low, high = values.min(), values.max()
+    for dtype in INTEGER_DTYPES:
+        if np.iinfo(dtype).min <= low and high <= np.iinfo(dtype).max:
+            return dtype
+    return None
+
+
+def compact_series(series: pd.Series, use_bool=True) -> pd.Series:
+    """
+    Convert a series to the most compact dtype that keeps all its values.
+
+    Strings with few distinct values become categoricals, 0/1 flags become booleans,
+    integers take the smallest integer dtype and floats become float32 when no value
+    changes. Floats with missing values are kept as floats, not nullable integers.
+
+    :param series: Series to convert.
+    :param use_bool: Indicator to turn 0/1 flags into booleans rather than int8.
+
+    :return: The converted series, or the same series if nothing is saved.
+    """
+    if isinstance(series.dtype, pd.CategoricalDtype) or pd.api.types.is_bool_dtype(series.dtype):
+        return series
+    if pd.api.types.is_object_dtype(series.dtype) or pd.api.types.is_string_dtype(series.dtype):
+        if (len(series) > 0 and pd.api.types.infer_dtype(series, skipna=True) == "string"
+                and series.nunique() <= CATEGORY_MAX_UNIQUE_RATIO * len(series)):
+            return series.astype("category")
+        return series
+    if not pd.api.types.is_numeric_dtype(series.dtype):
+        return series
+    has_na = series.isna().any()
+    if pd.api.types.is_float_dtype(series.dtype):
+        values = series.dropna()
+        if has_na or not (values == np.round(values)).all():
+            float32_series = series.astype(np.float32)
+            if (float32_series.astype(series.dtype) == series).sum() == len(values):
+                return float32_series
+            return series
+    if not has_na and series.isin([0, 1]).all():
+        return series.astype(bool if use_bool else np.int8)
+    dtype = smallest_integer_dtype(series)
+    if dtype is None:
+        return series
+    if has_na:
+        return series.astype(pd.api.types.pandas_dtype(np.dtype(dtype).name.capitalize()))
+    return series.astype(dtype)
+
+
+def compact_dtypes(df: pd.DataFrame, use_bool=True, exclude=()) -> pd.DataFrame:
+    """
+    Apply the compact dtype policy to every column of a dataframe.
+
+    :param df: The dataframe to convert.
+    :param use_bool: Indicator to turn 0/1 flags into booleans rather than int8.
+    :param exclude: Columns to keep unchanged.
+
+    :return: A new dataframe with compact dtypes.
+    """
+    return pd.DataFrame({column: df[column] if column in set(exclude)
+                         else compact_series(df[column], use_bool=use_bool)
+                         for column in df.columns}, index=df.index)
+
+
+def compact_tables(tables: dict, use_bool=True) -> tuple:
+    """
+    Apply the compact dtype policy to several tables and report the memory saved.
+
+    :param tables: Dictionnary mapping table names to dataframes.
+    :param use_bool: Indicator to turn 0/1 flags into booleans rather than int8.
+
+    :return: Tuple with the dictionnary of compacted tables and a dataframe with the
+             memory before and after, in MB, per table.
+    """
+    compacted_tables, report = dict(), []
+    for table_name, df in tables.items():
+        compacted_tables[table_name] = compact_dtypes(df, use_bool=use_bool)
+        report.append({"table": table_name,
+                       "memory_before_mb": df.memory_usage(deep=True).sum() / 2**20,
+                       "memory_mb": compacted_tables[table_name].memory_usage(deep=True).sum() / 2**20})
+    report_df = pd.DataFrame(report, columns=["table", "memory_before_mb", "memory_mb"]).set_index("table")
+    report_df["saved_ratio"] = 1 - report_df["memory_mb"] / report_df["memory_before_mb"]
+    return compacted_tables, report_df
+
+
+# Helpers for the on-disk cache of the loaders
+
+
+def get_cache_path(source_path: str, read_function=None) -> str:
+    """
+    Compute the path of the columnar cache file for the given source file.
+
+    The cache key is built from the absolute path, the size and the modification
+    time of the source, so that any change of the raw file invalidates the cache,
+    along with CACHE_SCHEMA_VERSION and the name of the reader, so that a change of
+    the parsed output invalidates it too.
+
+    :param source_path: Path to the raw data file.
+    :param read_function: Function parsing the raw file given its path.
+
+    :return: Path to the cache file associated to the current version of the source.
+    """
+    source_stat = os.stat(source_path)
+    reader_name = "" if read_function is None else read_function.__qualname__
+    key = (f"{os.path.abspath(source_path)}|{source_stat.st_size}|{source_stat.st_mtime_ns}"
+           f"|{CACHE_SCHEMA_VERSION}|{reader_name}")
+    digest = hashlib.sha1(key.encode("utf-8")).hexdigest()[:CACHE_KEY_LENGTH]
+    file_name = os.path.basename(source_path)
+    return f"{DATA_PATH}/{FOLDER_CACHE}/{file_name}.{digest}.{CACHE_EXTENSION}"
+
+
+def clear_stale_cache(cache_path: str):
+    """
+    Remove the cache files of previous versions of the same source file.
+
+    :param cache_path: Path to the up-to-date cache file.
+    """
+    cache_folder = os.path.dirname(cache_path)
+    file_name = os.path.basename(cache_path).rsplit(".", 2)[0]
+    for cached_file in os.listdir(cache_folder):
+        cached_path = os.path.join(cache_folder, cached_file)
+        if (cached_file.rsplit(".", 2)[0] == file_name
+                and cached_file.endswith(CACHE_EXTENSION)
+                and cached_path != cache_path):
+            os.remove(cached_path)
+
+
+def read_cache(cache_path: str) -> pd.DataFrame:
+    """
+    Memory-map a columnar cache file and convert it back to a dataframe.
+
+    :param cache_path: Path to the cache file.
+
+    :return: The cached dataframe.
+    """
+    table = feather.read_table(cache_path, memory_map=True)
+    df = table.to_pandas()
+    # Arrow returns list columns as numpy arrays, we restore python lists.
+    for field in table.schema:
+        if pa.types.is_list(field.type):
+            df[field.name] = df[field.name].map(list, na_action='ignore')
+    return df
+
+
+def write_cache(df: pd.DataFrame, cache_path: str) -> bool:
+    """
+    Write the given dataframe to a columnar cache file.
+
+    :param df: The dataframe to cache.
+    :param cache_path: Path to the cache file.
+
+    :return: True if the dataframe was cached, False if it cannot be represented in Arrow.
+    """
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    tmp_path = f"{cache_path}.tmp"
+    try:
+        feather.write_feather(df, tmp_path)
+    except (pa.ArrowException, TypeError, ValueError):
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return False
+    os.replace(tmp_path, cache_path)
+    clear_stale_cache(cache_path)
+    return True
+
+
+def load_with_cache(source_path: str, read_function, use_cache=True) -> pd.DataFrame:
+    """
+    Load a raw data file through its columnar cache.
+
+    On the first load the raw file is parsed with the given function and the typed
+    result is stored under DATA_PATH/cache. Later loads memory-map the cache file
+    as long as the source file keeps the same path, size and modification time, and
+    CACHE_SCHEMA_VERSION is unchanged. If pyarrow is not available the raw file is parsed every time.
+
+    :param source_path: Path to the raw data file.
+    :param read_function: Function parsing the raw file given its path.
+    :param use_cache: Indicator to use the cache, default True.
+
+    :return: A dataframe with the parsed data.
+    """
+    if not use_cache or feather is None:
+        return read_function(source_path)
+    cache_path = get_cache_path(source_path, read_function)
+    if os.path.exists(cache_path):
+        return read_cache(cache_path)
+    df = read_function(source_path)
+    write_cache(df, cache_path)
+    return df
+
+
+# Loaders
+
+
+def format_cmu_char_metadata(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Apply the date fixes and conversions to (a chunk of) the character metadata.
+
+    Only the columns present in the dataframe are formatted, so that it can be used
+    on projected chunks.
+
+    :param df: Dataframe with raw character metadata columns.
+
+    :return: The formatted dataframe.
+    """
+    if "release_date" in df.columns:
+        # Fix the release date
+        df.release_date.replace("1010-12-02", "2010-12-02", inplace=True)
+        df.release_date = dates_to_datetime(df.release_date)
+
+    if "actor_age_at_release_date" in df.columns:
+        # Fix the actor birth date
+        df["actor_age_at_release_date"].fillna(0, inplace=True)
+
+    if "actor_birth_date" in df.columns:
+        df.actor_birth_date = dates_to_datetime(df.actor_birth_date, errors='coerce')
+
+    return df
+
+
+def read_cmu_char_metadata(file_path: str) -> pd.DataFrame:
+    """
+    Parse the character metadata file from the CMU dataset.
+
+    :param file_path: Path to the character metadata file.
 
     :return: A dataframe with the character metadata.
     """
     dtypes = dtypes_map(DTYPES_CMU_CHAR_METADATA, COL_CMU_CHAR_METADATA)
     df = pd.read_csv(
-        f"{DATA_PATH}/{FOLDER_CMU}/character.metadata.tsv", sep="\t", names=COL_CMU_CHAR_METADATA, dtype=dtypes)
+        file_path, sep="\t", names=COL_CMU_CHAR_METADATA, dtype=dtypes)
 
-    # Fix the release date
-    df.release_date.replace("1010-12-02", "2010-12-02", inplace=True)
+    return format_cmu_char_metadata(df)
 
-    # Fix the actor birth date
-    df["actor_age_at_release_date"].fillna(0, inplace=True)
 
-    df.release_date = pd.to_datetime(df.release_date)
-    df.actor_birth_date = pd.to_datetime(df.actor_birth_date, errors='coerce')
+def iter_cmu_char_metadata(chunk_size=CHUNK_SIZE, columns=None, row_filter=None):
+    """
+    Stream the character metadata from the CMU dataset by typed chunks.
 
-    return df
+    The peak memory is bounded by the chunk size, whatever the size of the file.
 
+    :param chunk_size: Number of raw rows parsed per chunk.
+    :param columns: Columns to keep, all the columns if None.
+    :param row_filter: Function mapping a raw chunk, before the date fixes, to a boolean mask
+                       of the rows to keep.
 
-def load_cmu_movie_metadata() -> pd.DataFrame:
+    :return: A generator of dataframes with the character metadata.
     """
-    Load the movie metadata from the CMU dataset.
+    dtypes = dtypes_map(DTYPES_CMU_CHAR_METADATA, COL_CMU_CHAR_METADATA)
+    return iter_tsv_chunks(f"{DATA_PATH}/{FOLDER_CMU}/character.metadata.tsv",
+                           COL_CMU_CHAR_METADATA, dtypes, chunk_size=chunk_size,
+                           columns=columns, row_filter=row_filter,
+                           format_function=format_cmu_char_metadata)
+
+
+def load_cmu_char_metadata(use_cache=True) -> pd.DataFrame:
+    """
+    Load the character metadata from the CMU dataset.
+
+    :param use_cache: Indicator to use the columnar cache, default True.
+
+    :return: A dataframe with the character metadata.
+    """
+    return load_with_cache(f"{DATA_PATH}/{FOLDER_CMU}/character.metadata.tsv",
+                           read_cmu_char_metadata, use_cache=use_cache)
+
+
+def read_cmu_movie_metadata(file_path: str) -> pd.DataFrame:
+    """
+    Parse the movie metadata file from the CMU dataset.
+
+    :param file_path: Path to the movie metadata file.
 
     :return: A dataframe with the movie metadata.
     """
     dtypes = dtypes_map(DTYPES_CMU_MOVIE_METADATA, COL_CMU_MOVIE_METADATA)
     df = pd.read_csv(
-        f"{DATA_PATH}/{FOLDER_CMU}/movie.metadata.tsv", sep="\t", names=COL_CMU_MOVIE_METADATA, dtype=dtypes)
+        file_path, sep="\t", names=COL_CMU_MOVIE_METADATA, dtype=dtypes)
 
     # Fix the release date
     df.release_date.replace("1010-12-02", "2010-12-02", inplace=True)
 
     df.runtime.fillna(0, inplace=True)
 
-    df.languages = df.languages.apply(parse_dict)
-    df.countries = df.countries.apply(parse_dict)
-    df.genres = df.genres.apply(parse_dict)
+    for col in ["languages", "countries", "genres"]:
+        exploded_df = parse_freebase_dict_column(df[col], df.wikipedia_movie_id)
+        df[col] = freebase_table_to_lists(exploded_df, df.wikipedia_movie_id)
 
-    df.release_date = pd.to_datetime(df.release_date)
+    df.release_date = dates_to_datetime(df.release_date)
 
     return df
 
 
-def load_cmu_name_clusters() -> pd.DataFrame:
+def load_cmu_movie_metadata(use_cache=True) -> pd.DataFrame:
     """
-    Load the name clusters from the CMU dataset.
+    Load the movie metadata from the CMU dataset.
+
+    :param use_cache: Indicator to use the columnar cache, default True.
+
+    :return: A dataframe with the movie metadata.
+    """
+    return load_with_cache(f"{DATA_PATH}/{FOLDER_CMU}/movie.metadata.tsv",
+                           read_cmu_movie_metadata, use_cache=use_cache)
+
+
+def read_cmu_name_clusters(file_path: str) -> pd.DataFrame:
+    """
+    Parse the name clusters file from the CMU dataset.
+
+    :param file_path: Path to the name clusters file.
 
     :return: A dataframe with the name clusters.
     """
     dtypes = dtypes_map(DTYPES_CMU_NAME_CLUSTERS, COL_CMU_NAME_CLUSTERS)
     df = pd.read_csv(
-        f"{DATA_PATH}/{FOLDER_CMU}/name.clusters.tsv", sep="\t", names=COL_CMU_NAME_CLUSTERS, dtype=dtypes)
+        file_path, sep="\t", names=COL_CMU_NAME_CLUSTERS, dtype=dtypes)
 
     return df
 
 
-def load_cmu_plot_summaries() -> pd.DataFrame:
+def load_cmu_name_clusters(use_cache=True) -> pd.DataFrame:
     """
-    Load the plot summaries from the CMU dataset.
+    Load the name clusters from the CMU dataset.
+
+    :param use_cache: Indicator to use the columnar cache, default True.
+
+    :return: A dataframe with the name clusters.
+    """
+    return load_with_cache(f"{DATA_PATH}/{FOLDER_CMU}/name.clusters.tsv",
+                           read_cmu_name_clusters, use_cache=use_cache)
+
+
+def read_cmu_plot_summaries(file_path: str) -> pd.DataFrame:
+    """
+    Parse the plot summaries file from the CMU dataset.
+
+    :param file_path: Path to the plot summaries file.
 
     :return: A dataframe with the plot summaries.
     """
     dtypes = dtypes_map(DTYPES_CMU_PLOT_SUMMARIES, COL_CMU_PLOT_SUMMARIES)
     df = pd.read_csv(
-        f"{DATA_PATH}/{FOLDER_CMU}/plot_summaries.txt", sep="\t", names=COL_CMU_PLOT_SUMMARIES, dtype=dtypes)
+        file_path, sep="\t", names=COL_CMU_PLOT_SUMMARIES, dtype=dtypes)
     return df
 
 
-def load_cmu_tvtropes_clusters() -> pd.DataFrame:
+def load_cmu_plot_summaries(use_cache=True) -> pd.DataFrame:
     """
-    Load the TVTropes clusters from the CMU dataset.
+    Load the plot summaries from the CMU dataset.
+
+    :param use_cache: Indicator to use the columnar cache, default True.
+
+    :return: A dataframe with the plot summaries.
+    """
+    return load_with_cache(f"{DATA_PATH}/{FOLDER_CMU}/plot_summaries.txt",
+                           read_cmu_plot_summaries, use_cache=use_cache)
+
+
+def read_cmu_tvtropes_clusters(file_path: str) -> pd.DataFrame:
+    """
+    Parse the TVTropes clusters file from the CMU dataset.
+
+    :param file_path: Path to the TVTropes clusters file.
 
     :return: A dataframe with the TVTropes clusters.
     """
     dtypes = dtypes_map(DTYPES_CMU_TVTROPES_CLUSTERS,
                         COL_CMU_TVTROPES_CLUSTERS)
     df = pd.read_csv(
-        f"{DATA_PATH}/{FOLDER_CMU}/tvtropes.clusters.txt", sep="\t", names=COL_CMU_TVTROPES_CLUSTERS, dtype=dtypes)
-    df.char_actor_map = df.char_actor_map.apply(eval)
+        file_path, sep="\t", names=COL_CMU_TVTROPES_CLUSTERS, dtype=dtypes)
+    char_actor_df = parse_json_string_fields(df.char_actor_map, TVTROPES_MAP_KEYS)
+    df.char_actor_map = char_actor_df.to_dict("records")
     return df
 
 
-def load_imdb_name_basics() -> pd.DataFrame:
+def load_cmu_tvtropes_clusters(use_cache=True) -> pd.DataFrame:
     """
-    Load the name basics from the IMDB dataset.
+    Load the TVTropes clusters from the CMU dataset.
 
-    :return: A dataframe with the name basics.
+    :param use_cache: Indicator to use the columnar cache, default True.
+
+    :return: A dataframe with the TVTropes clusters.
     """
-    dtypes = dtypes_map(DTYPES_IMDB_NAME_BASICS, COL_IMDB_NAME_BASICS)
-    df = pd.read_csv(
-        f"{DATA_PATH}/{FOLDER_IMDB}/name.basics.tsv.gz", sep="\t", compression="gzip", skiprows=1, names=COL_IMDB_NAME_BASICS, dtype=dtypes, na_values=NA_IMDB)
+    return load_with_cache(f"{DATA_PATH}/{FOLDER_CMU}/tvtropes.clusters.txt",
+                           read_cmu_tvtropes_clusters, use_cache=use_cache)
+
+
+def format_imdb_name_basics(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Parse the list columns of the name basics.
+
+    :param df: Dataframe with raw name basics columns.
 
+    :return: The formatted dataframe.
+    """
     df.primary_profession = df.primary_profession.map(
         parse_imdb_list, na_action='ignore')
     df.known_for_titles = df.known_for_titles.map(
@@ -553,66 +1397,506 @@ def load_imdb_name_basics() -> pd.DataFrame:
     return df
 
 
-def load_imdb_title_basics() -> pd.DataFrame:
+def read_imdb_name_basics(file_path: str) -> pd.DataFrame:
     """
-    Load the title basics from the IMDB dataset.
+    Parse the name basics file from the IMDB dataset.
+
+    :param file_path: Path to the name basics file.
+
+    :return: A dataframe with the name basics.
+    """
+    dtypes = dtypes_map(DTYPES_IMDB_NAME_BASICS, COL_IMDB_NAME_BASICS)
+    df = pd.read_csv(
+        file_path, sep="\t", compression="gzip", skiprows=1, names=COL_IMDB_NAME_BASICS, dtype=dtypes, na_values=NA_IMDB)
+
+    return format_imdb_name_basics(df)
+
+
+def load_imdb_name_basics(use_cache=True) -> pd.DataFrame:
+    """
+    Load the name basics from the IMDB dataset.
+
+    :param use_cache: Indicator to use the columnar cache, default True.
+
+    :return: A dataframe with the name basics.
+    """
+    return load_with_cache(f"{DATA_PATH}/{FOLDER_IMDB}/name.basics.tsv.gz",
+                           read_imdb_name_basics, use_cache=use_cache)
+
+
+def format_imdb_title_basics(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Clean the runtime and parse the genres of (a chunk of) the title basics.
+
+    Only the columns present in the dataframe are formatted, so that it can be used
+    on projected chunks.
+
+    :param df: Dataframe with raw title basics columns.
+
+    :return: The formatted dataframe.
+    """
+    if "runtime_minutes" in df.columns:
+        # remove invalid runtime values
+        invalids = ['Reality-TV', 'Talk-Show', 'Documentary',
+                    'Game-Show', 'Animation,Comedy,Family', 'Game-Show,Reality-TV']
+        df.runtime_minutes = df.runtime_minutes.map(
+            lambda r: np.NaN if r in invalids else r).astype(pd.Int64Dtype())
+
+        df.runtime_minutes.fillna(0, inplace=True)
+
+    if "genres" in df.columns:
+        df.genres = df.genres.map(parse_imdb_list, na_action='ignore')
+    return df
+
+
+def read_imdb_title_basics(file_path: str) -> pd.DataFrame:
+    """
+    Parse the title basics file from the IMDB dataset.
+
+    :param file_path: Path to the title basics file.
 
     :return: A dataframe with the title basics.
     """
     dtypes = dtypes_map(DTYPES_IMDB_TITLE_BASICS, COL_IMDB_TITLE_BASICS)
     df = pd.read_csv(
-        f"{DATA_PATH}/{FOLDER_IMDB}/title.basics.tsv.gz", sep="\t", compression="gzip", skiprows=1, names=COL_IMDB_TITLE_BASICS, dtype=dtypes, na_values=NA_IMDB)
+        file_path, sep="\t", compression="gzip", skiprows=1, names=COL_IMDB_TITLE_BASICS, dtype=dtypes, na_values=NA_IMDB)
+
+    return format_imdb_title_basics(df)
 
-    # remove invalid runtime values
-    invalids = ['Reality-TV', 'Talk-Show', 'Documentary',
-                'Game-Show', 'Animation,Comedy,Family', 'Game-Show,Reality-TV']
-    df.runtime_minutes = df.runtime_minutes.map(
-        lambda r: np.NaN if r in invalids else r).astype(pd.Int64Dtype())
 
-    df.runtime_minutes.fillna(0, inplace=True)
+def title_basics_filter(title_types=None, start_year_range=None, tconsts=None):
+    """
+    Create the row filter for the title basics given the requested predicates.
 
-    df.genres = df.genres.map(parse_imdb_list, na_action='ignore')
+    :param title_types: Title types to keep, e.g. ["movie"].
+    :param start_year_range: Tuple with the first and last start years to keep, inclusive.
+    :param tconsts: Collection of IMDB title ids to keep.
+
+    :return: Tuple with the row filter function, or None without predicate, and the
+             list of columns it needs.
+    """
+    predicates, needed_columns = [], []
+    if title_types is not None:
+        title_types = [title_types] if isinstance(title_types, str) else list(title_types)
+        predicates.append(lambda df: df.title_type.isin(title_types))
+        needed_columns.append("title_type")
+    if start_year_range is not None:
+        first_year, last_year = start_year_range
+        predicates.append(lambda df: df.start_year.between(first_year, last_year).fillna(False))
+        needed_columns.append("start_year")
+    if tconsts is not None:
+        tconsts = pd.Index(list(tconsts))
+        predicates.append(lambda df: df.tconst.isin(tconsts))
+        needed_columns.append("tconst")
+    if len(predicates) == 0:
+        return None, needed_columns
+
+    def row_filter(df: pd.DataFrame) -> pd.Series:
+        mask = predicates[0](df)
+        for predicate in predicates[1:]:
+            mask &= predicate(df)
+        return mask.astype(bool)
+    return row_filter, needed_columns
+
+
+def iter_imdb_title_basics(columns=None, title_types=None, start_year_range=None,
+                           tconsts=None, chunk_size=CHUNK_SIZE):
+    """
+    Stream the title basics from the IMDB dataset with projection and predicate pushdown.
+
+    The predicates are applied on each chunk while decompressing the file, so that only
+    the surviving rows are ever kept in memory.
+
+    :param columns: Columns to keep, all the columns if None.
+    :param title_types: Title types to keep, e.g. ["movie"].
+    :param start_year_range: Tuple with the first and last start years to keep, inclusive.
+    :param tconsts: Collection of IMDB title ids to keep.
+    :param chunk_size: Number of raw rows parsed per chunk.
+
+    :return: A generator of dataframes with the title basics.
+    """
+    row_filter, needed_columns = title_basics_filter(title_types, start_year_range, tconsts)
+    read_columns = None
+    if columns is not None:
+        read_columns = list(columns) + [c for c in needed_columns if c not in columns]
+    dtypes = dtypes_map(DTYPES_IMDB_TITLE_BASICS, COL_IMDB_TITLE_BASICS)
+    for chunk in iter_tsv_chunks(f"{DATA_PATH}/{FOLDER_IMDB}/title.basics.tsv.gz",
+                                 COL_IMDB_TITLE_BASICS, dtypes, chunk_size=chunk_size,
+                                 columns=read_columns, row_filter=row_filter,
+                                 format_function=format_imdb_title_basics,
+                                 compression="gzip", skiprows=1, na_values=NA_IMDB):
+        yield chunk if columns is None else chunk[list(columns)]
+
+
+def load_imdb_title_basics(use_cache=True, columns=None, title_types=None,
+                           start_year_range=None, tconsts=None, chunk_size=CHUNK_SIZE) -> pd.DataFrame:
+    """
+    Load the title basics from the IMDB dataset.
+
+    Without projection nor predicate the whole table is loaded through the columnar cache,
+    otherwise the file is streamed and filtered by chunks, see iter_imdb_title_basics.
+
+    :param use_cache: Indicator to use the columnar cache, default True.
+    :param columns: Columns to keep, all the columns if None.
+    :param title_types: Title types to keep, e.g. ["movie"].
+    :param start_year_range: Tuple with the first and last start years to keep, inclusive.
+    :param tconsts: Collection of IMDB title ids to keep.
+    :param chunk_size: Number of raw rows parsed per chunk when streaming.
+
+    :return: A dataframe with the title basics.
+    """
+    if columns is None and title_types is None and start_year_range is None and tconsts is None:
+        return load_with_cache(f"{DATA_PATH}/{FOLDER_IMDB}/title.basics.tsv.gz",
+                               read_imdb_title_basics, use_cache=use_cache)
+    dtypes = dtypes_map(DTYPES_IMDB_TITLE_BASICS, COL_IMDB_TITLE_BASICS)
+    empty_chunk = empty_tsv_chunk(COL_IMDB_TITLE_BASICS, dtypes, columns, format_imdb_title_basics)
+    if columns is not None:
+        empty_chunk = empty_chunk[list(columns)]
+    df = concat_chunks(iter_imdb_title_basics(columns, title_types, start_year_range,
+                                              tconsts, chunk_size), empty_chunk=empty_chunk)
+    return df.reset_index(drop=True)
+
+
+def format_imdb_title_crew(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Parse the list columns of the title crew.
+
+    :param df: Dataframe with raw title crew columns.
+
+    :return: The formatted dataframe.
+    """
+    df.directors = df.directors.map(parse_imdb_list, na_action='ignore')
+    df.writers = df.writers.map(parse_imdb_list, na_action='ignore')
     return df
 
 
-def load_imdb_title_crew() -> pd.DataFrame:
+def read_imdb_title_crew(file_path: str) -> pd.DataFrame:
     """
-    Load the title crew from the IMDB dataset.
+    Parse the title crew file from the IMDB dataset.
+
+    :param file_path: Path to the title crew file.
 
     :return: A dataframe with the title crew.
     """
     dtypes = dtypes_map(DTYPES_IMDB_TITLE_CREW, COL_IMDB_TITLE_CREW)
     df = pd.read_csv(
-        f"{DATA_PATH}/{FOLDER_IMDB}/title.crew.tsv.gz", sep="\t", compression="gzip", skiprows=1, names=COL_IMDB_TITLE_CREW, dtype=dtypes, na_values=NA_IMDB)
+        file_path, sep="\t", compression="gzip", skiprows=1, names=COL_IMDB_TITLE_CREW, dtype=dtypes, na_values=NA_IMDB)
 
-    df.directors = df.directors.map(parse_imdb_list, na_action='ignore')
-    df.writers = df.writers.map(parse_imdb_list, na_action='ignore')
+    return format_imdb_title_crew(df)
+
+
+def load_imdb_title_crew(use_cache=True) -> pd.DataFrame:
+    """
+    Load the title crew from the IMDB dataset.
+
+    :param use_cache: Indicator to use the columnar cache, default True.
+
+    :return: A dataframe with the title crew.
+    """
+    return load_with_cache(f"{DATA_PATH}/{FOLDER_IMDB}/title.crew.tsv.gz",
+                           read_imdb_title_crew, use_cache=use_cache)
+
+
+def format_imdb_title_principals(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Parse the characters column of the title principals.
+
+    :param df: Dataframe with raw title principals columns.
+
+    :return: The formatted dataframe.
+    """
+    characters = parse_json_string_array_column(df.characters)
+    character_lists = characters.groupby(level="row").agg(list)
+    character_lists = character_lists.reindex(np.arange(len(df))).to_numpy()
+    # Arrays without any string, e.g. "[]", are empty lists, only the missing values stay NaN
+    is_empty = pd.isna(character_lists) & df.characters.notna().to_numpy()
+    for position in np.flatnonzero(is_empty):
+        character_lists[position] = []
+    df.characters = pd.Series(character_lists, index=df.index)
     return df
 
 
-def load_imdb_title_principals() -> pd.DataFrame:
+def build_principal_characters_table(df: pd.DataFrame) -> pd.DataFrame:
     """
-    Load the title principals from the IMDB dataset.
+    Normalize the characters of the title principals into one row per character.
+
+    :param df: Dataframe with the tconst, ordering, nconst and raw characters columns.
+
+    :return: A dataframe with the tconst, ordering, nconst and character columns.
+    """
+    characters = parse_json_string_array_column(df.characters)
+    rows = characters.index.get_level_values("row")
+    characters_df = pd.DataFrame({
+        "tconst": df.tconst.to_numpy()[rows],
+        "ordering": df.ordering.to_numpy()[rows],
+        "nconst": df.nconst.to_numpy()[rows],
+        "character": characters.to_numpy()})
+    characters_df = characters_df.astype({"tconst": pd.StringDtype(), "ordering": pd.Int64Dtype(),
+                                          "nconst": pd.StringDtype(), "character": pd.StringDtype()})
+    return characters_df
+
+
+def load_imdb_principal_characters(tconsts=None, chunk_size=CHUNK_SIZE) -> pd.DataFrame:
+    """
+    Load the characters played in the IMDB titles as a normalized table.
+
+    The title principals file is streamed by chunks, optionally keeping only the given
+    titles, so that the memory usage stays bounded by the chunk size and the result.
+
+    :param tconsts: Collection of IMDB title ids to keep, all the titles if None.
+    :param chunk_size: Number of raw rows parsed per chunk.
+
+    :return: A dataframe with the tconst, ordering, nconst and character columns.
+    """
+    row_filter = None
+    if tconsts is not None:
+        tconsts = pd.Index(list(tconsts))
+        row_filter = lambda chunk: chunk.tconst.isin(tconsts)
+    dtypes = dtypes_map(DTYPES_IMDB_TITLE_PRINCIPALS, COL_IMDB_TITLE_PRINCIPALS)
+    columns = ["tconst", "ordering", "nconst", "characters"]
+    chunks = iter_tsv_chunks(f"{DATA_PATH}/{FOLDER_IMDB}/title.principals.tsv.gz",
+                             COL_IMDB_TITLE_PRINCIPALS, dtypes, chunk_size=chunk_size,
+                             columns=columns, row_filter=row_filter, compression="gzip",
+                             skiprows=1, na_values=NA_IMDB)
+    characters_df = concat_chunks(chunks, build_principal_characters_table,
+                                  empty_chunk=empty_tsv_chunk(COL_IMDB_TITLE_PRINCIPALS, dtypes, columns))
+    return characters_df.reset_index(drop=True)
+
+
+def read_imdb_title_principals(file_path: str) -> pd.DataFrame:
+    """
+    Parse the title principals file from the IMDB dataset.
+
+    :param file_path: Path to the title principals file.
 
     :return: A dataframe with the title principals.
     """
     dtypes = dtypes_map(DTYPES_IMDB_TITLE_PRINCIPALS,
                         COL_IMDB_TITLE_PRINCIPALS)
     df = pd.read_csv(
-        f"{DATA_PATH}/{FOLDER_IMDB}/title.principals.tsv.gz", sep="\t", compression="gzip", skiprows=1, names=COL_IMDB_TITLE_PRINCIPALS, dtype=dtypes, na_values=NA_IMDB)
+        file_path, sep="\t", compression="gzip", skiprows=1, names=COL_IMDB_TITLE_PRINCIPALS, dtype=dtypes, na_values=NA_IMDB)
 
-    df.characters = df.characters.map(eval, na_action='ignore')
-    return df
+    return format_imdb_title_principals(df)
 
 
-def load_imdb_title_ratings() -> pd.DataFrame:
+def load_imdb_title_principals(use_cache=True) -> pd.DataFrame:
     """
-    Load the title ratings from the IMDB dataset.
+    Load the title principals from the IMDB dataset.
+
+    :param use_cache: Indicator to use the columnar cache, default True.
+
+    :return: A dataframe with the title principals.
+    """
+    return load_with_cache(f"{DATA_PATH}/{FOLDER_IMDB}/title.principals.tsv.gz",
+                           read_imdb_title_principals, use_cache=use_cache)
+
+
+def read_imdb_title_ratings(file_path: str) -> pd.DataFrame:
+    """
+    Parse the title ratings file from the IMDB dataset.
+
+    :param file_path: Path to the title ratings file.
 
     :return: A dataframe with the title ratings.
     """
     dtypes = dtypes_map(DTYPES_IMDB_RATE, COL_IMDB_RATE)
     df = pd.read_csv(
-        f"{DATA_PATH}/{FOLDER_IMDB}/title.ratings.tsv.gz", sep="\t", compression="gzip", skiprows=1, names=COL_IMDB_RATE, dtype=dtypes, na_values=NA_IMDB)
+        file_path, sep="\t", compression="gzip", skiprows=1, names=COL_IMDB_RATE, dtype=dtypes, na_values=NA_IMDB)
 
     return df
+
+
+def load_imdb_title_ratings(use_cache=True) -> pd.DataFrame:
+    """
+    Load the title ratings from the IMDB dataset.
+
+    :param use_cache: Indicator to use the columnar cache, default True.
+
+    :return: A dataframe with the title ratings.
+    """
+    return load_with_cache(f"{DATA_PATH}/{FOLDER_IMDB}/title.ratings.tsv.gz",
+                           read_imdb_title_ratings, use_cache=use_cache)
+
+
+# Concurrent loading
+
+
+LOADERS = {
+    "cmu_char_metadata": load_cmu_char_metadata,
+    "cmu_movie_metadata": load_cmu_movie_metadata,
+    "cmu_name_clusters": load_cmu_name_clusters,
+    "cmu_plot_summaries": load_cmu_plot_summaries,
+    "cmu_tvtropes_clusters": load_cmu_tvtropes_clusters,
+    "imdb_name_basics": load_imdb_name_basics,
+    "imdb_title_basics": load_imdb_title_basics,
+    "imdb_title_crew": load_imdb_title_crew,
+    "imdb_title_principals": load_imdb_title_principals,
+    "imdb_title_ratings": load_imdb_title_ratings,
+}
+
+
+def load_table_timed(table_name: str, data_path: str, use_cache=True, compact=True) -> tuple:
+    """
+    Load a single table and measure the time spent.
+
+    :param table_name: Name of the table in LOADERS.
+    :param data_path: Path to the data folder, set in the worker before loading.
+    :param use_cache: Indicator to use the columnar cache.
+    :param compact: Indicator to apply the compact dtype policy.
+
+    :return: Tuple with the table and its timing information.
+    """
+    global DATA_PATH
+    DATA_PATH = data_path
+    start = time.perf_counter()
+    df = LOADERS[table_name](use_cache=use_cache)
+    memory_before = df.memory_usage(deep=True).sum() / 2**20
+    if compact:
+        df = compact_dtypes(df)
+    elapsed = time.perf_counter() - start
+    timing = {"table": table_name, "seconds": elapsed, "rows": len(df),
+              "columns": len(df.columns), "worker_pid": os.getpid(),
+              "memory_before_mb": memory_before}
+    return df, timing
+
+
+def load_all(tables=None, workers=None, use_processes=True, use_cache=True, compact=True) -> tuple:
+    """
+    Load several CMU and IMDB tables concurrently.
+
+    Parsing gzip TSV files is CPU bound, thus a process pool is used by default. A thread
+    pool avoids sending the tables back between processes and is enough when the tables
+    are served from the columnar cache.
+
+    :param tables: Names of the tables to load, see LOADERS. All the tables if None.
+    :param workers: Number of workers, default one per table up to the number of CPUs.
+    :param use_processes: Indicator to use a process pool rather than a thread pool.
+    :param use_cache: Indicator to use the columnar cache.
+    :param compact: Indicator to apply the compact dtype policy, see compact_dtypes.
+
+    :return: Tuple with a dictionnary mapping each table name to its dataframe and a
+             dataframe reporting the loading time, shape and memory usage, before and
+             after the compact dtype policy, per table.
+    """
+    tables = list(LOADERS) if tables is None else list(tables)
+    unknown_tables = set(tables) - set(LOADERS)
+    if len(unknown_tables) > 0:
+        raise ValueError(f"Unknown tables: {sorted(unknown_tables)}")
+    if workers is None:
+        workers = min(len(tables), os.cpu_count() or 1)
+    executor_class = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+    start = time.perf_counter()
+    loaded_tables, timings = dict(), []
+    with executor_class(max_workers=max(workers, 1)) as executor:
+        futures = {table_name: executor.submit(load_table_timed, table_name, DATA_PATH,
+                                                use_cache, compact)
+                   for table_name in tables}
+        for table_name, future in futures.items():
+            df, timing = future.result()
+            timing["memory_mb"] = df.memory_usage(deep=True).sum() / 2**20
+            loaded_tables[table_name] = df
+            timings.append(timing)
+    timing_df = pd.DataFrame(timings).set_index("table")
+    timing_df.loc["total", "seconds"] = time.perf_counter() - start
+    timing_df.loc["total", ["memory_before_mb", "memory_mb"]] = timing_df[
+        ["memory_before_mb", "memory_mb"]].sum()
+    timing_df[["rows", "columns", "worker_pid"]] = timing_df[
+        ["rows", "columns", "worker_pid"]].astype(pd.Int64Dtype())
+    return loaded_tables, timing_df
+
+
+# IMDB list columns as relation tables
+
+
+def explode_imdb_list_column(keys: pd.Series, column: pd.Series,
+                             key_name: str, value_name: str) -> pd.DataFrame:
+    """
+    Explode an IMDB list column into a two-column relation table.
+
+    With pyarrow the split and flatten run as Arrow compute kernels and the values are
+    dictionary encoded, without creating a python list per row. The values are returned
+    as a categorical column. The rows with missing or empty lists are dropped.
+
+    :param keys: Series with the key of each row, e.g. the tconst.
+    :param column: Series, aligned with keys, of raw lists such as "Action,Drama", or of
+                   parsed lists such as the directors of the formatted title crew.
+    :param key_name: Name of the key column in the relation table.
+    :param value_name: Name of the value column in the relation table.
+
+    :return: A dataframe with one row per (key, value) pair.
+    """
+    valid_values = column.dropna()
+    is_parsed = len(valid_values) > 0 and isinstance(valid_values.iloc[0], list)
+    if pc is None:
+        values = (column if is_parsed else column.str.split(IMDB_LIST_SEPARATOR)).explode().dropna()
+        return pd.DataFrame({key_name: keys.loc[values.index].to_numpy(),
+                             value_name: pd.Categorical(values.to_numpy())})
+    if is_parsed:
+        lists = pa.array(column.to_numpy(dtype=object, na_value=None), type=pa.list_(pa.string()))
+    else:
+        lists = pc.split_pattern(pa.array(column.to_numpy(dtype=object, na_value=None), type=pa.string()),
+                                 IMDB_LIST_SEPARATOR)
+    parents = pc.list_parent_indices(lists).to_numpy()
+    values = pc.list_flatten(lists).dictionary_encode()
+    return pd.DataFrame({
+        key_name: keys.to_numpy()[parents],
+        value_name: pd.Categorical.from_codes(values.indices.to_numpy(zero_copy_only=False),
+                                              categories=values.dictionary.to_pandas())})
+
+
+def concat_relation_chunks(relation_chunks: list, key_name: str, value_name: str,
+                           drop_duplicates=False) -> pd.DataFrame:
+    """
+    Concatenate relation tables built by chunks, the categorical values sharing categories.
+
+    :param relation_chunks: List of relation tables with the key and value columns.
+    :param key_name: Name of the key column.
+    :param value_name: Name of the value column.
+    :param drop_duplicates: Indicator to remove the pairs duplicated across chunks.
+
+    :return: The concatenated relation table.
+    """
+    if len(relation_chunks) == 0:
+        return pd.DataFrame({key_name: pd.Series(dtype=object), value_name: pd.Categorical([])})
+    values = [chunk[value_name] for chunk in relation_chunks]
+    if all(isinstance(value.dtype, pd.CategoricalDtype) for value in values):
+        values = pd.api.types.union_categoricals(values)
+    else:
+        values = pd.concat(values, ignore_index=True)
+    relation_df = pd.DataFrame({
+        key_name: pd.concat([chunk[key_name] for chunk in relation_chunks], ignore_index=True),
+        value_name: values})
+    if drop_duplicates:
+        relation_df = relation_df.drop_duplicates().reset_index(drop=True)
+    return relation_df
+
+
+def load_imdb_relation(relation_name: str, keys=None, chunk_size=CHUNK_SIZE) -> pd.DataFrame:
+    """
+    Load an IMDB list column directly as an exploded relation table.
+
+    Only the key and list columns are read, by chunks, and the chunks are merged with
+    shared categories. The available relations are listed in IMDB_LIST_RELATIONS:
+    title_genre, title_director, title_writer, person_profession and person_known_for.
+
+    :param relation_name: Name of the relation.
+    :param keys: Collection of keys (tconst or nconst) to keep, all the keys if None.
+    :param chunk_size: Number of raw rows parsed per chunk.
+
+    :return: A dataframe with the key and value columns of the relation.
+    """
+    file_name, columns, key_name, list_name, value_name = IMDB_LIST_RELATIONS[relation_name]
+    row_filter = None
+    if keys is not None:
+        keys = pd.Index(list(keys))
+        row_filter = lambda chunk: chunk[key_name].isin(keys)
+    chunks = iter_tsv_chunks(f"{DATA_PATH}/{FOLDER_IMDB}/{file_name}", columns,
+                             {key_name: pd.StringDtype(), list_name: pd.StringDtype()},
+                             chunk_size=chunk_size, columns=[key_name, list_name],
+                             row_filter=row_filter, compression="gzip", skiprows=1,
+                             na_values=NA_IMDB)
+    relation_chunks = [explode_imdb_list_column(chunk[key_name], chunk[list_name], key_name, value_name)
+                       for chunk in chunks]
+    relation_df = concat_relation_chunks(relation_chunks, key_name, value_name)
+    relation_df[key_name] = relation_df[key_name].astype(pd.StringDtype())
+    return relation_df
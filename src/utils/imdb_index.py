@@ -0,0 +1,279 @@
+"""
+Contain the logic for building and querying key-sorted, block-compressed copies of the IMDB tables.
+
+Each indexed table is stored as a sequence of zlib compressed blocks of rows sorted by key,
+together with a sparse index holding the first key and the position of every block. Looking
+up K ids then only decompresses the blocks that may contain them, in O(K log N), instead of
+the whole gzip file.
+"""
+
+import os
+import io
+import gzip
+import heapq
+import pickle
+import tempfile
+import zlib
+import pandas as pd
+import numpy as np
+
+from utils import data_load
+
+FOLDER_INDEX = "index"
+BLOCK_ROWS = 4096
+RUN_ROWS = 1_000_000
+COMPRESSION_LEVEL = 6
+
+# Table name: (file name, columns, dtypes, format function, key column)
+IMDB_TABLES = {
+    "name_basics": ("name.basics.tsv.gz", data_load.COL_IMDB_NAME_BASICS,
+                    data_load.DTYPES_IMDB_NAME_BASICS, data_load.format_imdb_name_basics, "nconst"),
+    "title_basics": ("title.basics.tsv.gz", data_load.COL_IMDB_TITLE_BASICS,
+                     data_load.DTYPES_IMDB_TITLE_BASICS, data_load.format_imdb_title_basics, "tconst"),
+    "title_crew": ("title.crew.tsv.gz", data_load.COL_IMDB_TITLE_CREW,
+                   data_load.DTYPES_IMDB_TITLE_CREW, data_load.format_imdb_title_crew, "tconst"),
+    "title_principals": ("title.principals.tsv.gz", data_load.COL_IMDB_TITLE_PRINCIPALS,
+                         data_load.DTYPES_IMDB_TITLE_PRINCIPALS, data_load.format_imdb_title_principals,
+                         "tconst"),
+    "title_ratings": ("title.ratings.tsv.gz", data_load.COL_IMDB_RATE,
+                      data_load.DTYPES_IMDB_RATE, None, "tconst"),
+}
+
+
+# Helpers for paths
+
+def get_source_path(table_name: str, data_path=None) -> str:
+    """
+    Return the path of the raw gzip file of the given IMDB table.
+
+    :param table_name: Name of the table in IMDB_TABLES.
+    :param data_path: Path to the data folder, default data_load.DATA_PATH.
+
+    :return: Path to the raw file.
+    """
+    data_path = data_load.DATA_PATH if data_path is None else data_path
+    return f"{data_path}/{data_load.FOLDER_IMDB}/{IMDB_TABLES[table_name][0]}"
+
+
+def get_index_paths(table_name: str, data_path=None) -> tuple:
+    """
+    Return the paths of the block file and of the sparse index of the given IMDB table.
+
+    :param table_name: Name of the table in IMDB_TABLES.
+    :param data_path: Path to the data folder, default data_load.DATA_PATH.
+
+    :return: Tuple with the block file path and the sparse index path.
+    """
+    data_path = data_load.DATA_PATH if data_path is None else data_path
+    index_folder = f"{data_path}/{data_load.FOLDER_IMDB}/{FOLDER_INDEX}"
+    return f"{index_folder}/{table_name}.blocks", f"{index_folder}/{table_name}.index.pkl"
+
+
+# Helpers for the index construction
+
+def line_key(line: str) -> str:
+    """
+    Extract the key, i.e. the first field, of a raw TSV line.
+
+    :param line: Raw TSV line.
+
+    :return: The key of the line.
+    """
+    return line[:line.index("\t")]
+
+
+def write_sorted_runs(source_path: str, run_folder: str, run_rows=RUN_ROWS) -> list[str]:
+    """
+    Split the raw gzip file into sorted runs of at most run_rows lines.
+
+    :param source_path: Path to the raw gzip TSV file.
+    :param run_folder: Folder where the runs are written.
+    :param run_rows: Maximum number of lines per run.
+
+    :return: List of the paths of the runs.
+    """
+    run_paths = []
+
+    def flush(lines: list):
+        lines.sort(key=line_key)
+        run_path = os.path.join(run_folder, f"run_{len(run_paths)}.tsv")
+        with open(run_path, "w", encoding="utf-8") as run_file:
+            run_file.writelines(lines)
+        run_paths.append(run_path)
+
+    with gzip.open(source_path, "rt", encoding="utf-8") as source_file:
+        next(source_file)  # header
+        lines = []
+        for line in source_file:
+            if not line.endswith("\n"):
+                line += "\n"
+            lines.append(line)
+            if len(lines) == run_rows:
+                flush(lines)
+                lines = []
+        if len(lines) > 0:
+            flush(lines)
+    return run_paths
+
+
+def write_blocks(sorted_lines, blocks_path: str, block_rows=BLOCK_ROWS) -> dict:
+    """
+    Write sorted lines as compressed blocks and collect the sparse index.
+
+    :param sorted_lines: Iterable of raw lines sorted by key.
+    :param blocks_path: Path of the block file.
+    :param block_rows: Number of lines per block.
+
+    :return: Dictionnary with the first key, offset and length of every block and the row count.
+    """
+    first_keys, offsets, lengths = [], [], []
+    row_count = 0
+    with open(blocks_path, "wb") as blocks_file:
+
+        def flush(lines: list):
+            compressed = zlib.compress("".join(lines).encode("utf-8"), COMPRESSION_LEVEL)
+            first_keys.append(line_key(lines[0]))
+            offsets.append(blocks_file.tell())
+            lengths.append(len(compressed))
+            blocks_file.write(compressed)
+
+        lines = []
+        for line in sorted_lines:
+            lines.append(line)
+            row_count += 1
+            if len(lines) == block_rows:
+                flush(lines)
+                lines = []
+        if len(lines) > 0:
+            flush(lines)
+    return {"first_keys": np.array(first_keys, dtype=str),
+            "offsets": np.array(offsets, dtype=np.int64),
+            "lengths": np.array(lengths, dtype=np.int64),
+            "row_count": row_count}
+
+
+def build_imdb_index(table_name: str, data_path=None, block_rows=BLOCK_ROWS, run_rows=RUN_ROWS) -> dict:
+    """
+    Build the key-sorted, block-compressed copy of an IMDB table and its sparse index.
+
+    The raw file is sorted externally: sorted runs of run_rows lines are written to disk
+    then merged, so the memory usage stays bounded whatever the size of the table.
+
+    :param table_name: Name of the table in IMDB_TABLES.
+    :param data_path: Path to the data folder, default data_load.DATA_PATH.
+    :param block_rows: Number of lines per compressed block.
+    :param run_rows: Number of lines per sorted run.
+
+    :return: The sparse index.
+    """
+    source_path = get_source_path(table_name, data_path)
+    blocks_path, index_path = get_index_paths(table_name, data_path)
+    os.makedirs(os.path.dirname(blocks_path), exist_ok=True)
+    with tempfile.TemporaryDirectory(dir=os.path.dirname(blocks_path)) as run_folder:
+        run_paths = write_sorted_runs(source_path, run_folder, run_rows)
+        run_files = [open(run_path, encoding="utf-8") for run_path in run_paths]
+        try:
+            index = write_blocks(heapq.merge(*run_files, key=line_key), blocks_path, block_rows)
+        finally:
+            for run_file in run_files:
+                run_file.close()
+    source_stat = os.stat(source_path)
+    index["source_size"] = source_stat.st_size
+    index["source_mtime_ns"] = source_stat.st_mtime_ns
+    with open(index_path, "wb") as handle:
+        pickle.dump(index, handle, protocol=pickle.HIGHEST_PROTOCOL)
+    return index
+
+
+def load_imdb_index(table_name: str, data_path=None, build_if_missing=True) -> dict:
+    """
+    Load the sparse index of an IMDB table, building it if missing or stale.
+
+    :param table_name: Name of the table in IMDB_TABLES.
+    :param data_path: Path to the data folder, default data_load.DATA_PATH.
+    :param build_if_missing: Indicator to build the index if it is missing or outdated.
+
+    :return: The sparse index.
+    """
+    _, index_path = get_index_paths(table_name, data_path)
+    index = None
+    if os.path.exists(index_path):
+        with open(index_path, "rb") as handle:
+            index = pickle.load(handle)
+        source_stat = os.stat(get_source_path(table_name, data_path))
+        if (index["source_size"] != source_stat.st_size
+                or index["source_mtime_ns"] != source_stat.st_mtime_ns):
+            index = None
+    if index is None:
+        if not build_if_missing:
+            raise FileNotFoundError(f"No up-to-date index for the IMDB table {table_name}.")
+        index = build_imdb_index(table_name, data_path)
+    return index
+
+
+# Lookups
+
+def find_blocks(index: dict, keys: np.ndarray) -> np.ndarray:
+    """
+    Find the blocks that may contain the given keys by binary search on the sparse index.
+
+    The rows of a key may span several blocks, e.g. in title_principals, thus every block
+    from the one before the first block starting with the key, up to the last block starting
+    with a smaller or equal key, is read.
+
+    :param index: Sparse index of the table.
+    :param keys: Array of keys.
+
+    :return: Sorted array of distinct block ids.
+    """
+    first_block_ids = np.maximum(np.searchsorted(index["first_keys"], keys, side="left") - 1, 0)
+    last_block_ids = np.searchsorted(index["first_keys"], keys, side="right") - 1
+    is_covered = last_block_ids >= 0
+    first_block_ids, last_block_ids = first_block_ids[is_covered], last_block_ids[is_covered]
+    block_counts = last_block_ids - first_block_ids + 1
+    offsets = np.arange(block_counts.sum()) - np.repeat(np.cumsum(block_counts) - block_counts, block_counts)
+    return np.unique(np.repeat(first_block_ids, block_counts) + offsets)
+
+
+def read_blocks(blocks_path: str, index: dict, block_ids: np.ndarray) -> str:
+    """
+    Read and decompress the given blocks.
+
+    :param blocks_path: Path of the block file.
+    :param index: Sparse index of the table.
+    :param block_ids: Ids of the blocks to read.
+
+    :return: The concatenated raw lines of the blocks.
+    """
+    texts = []
+    with open(blocks_path, "rb") as blocks_file:
+        for block_id in block_ids:
+            blocks_file.seek(index["offsets"][block_id])
+            compressed = blocks_file.read(index["lengths"][block_id])
+            texts.append(zlib.decompress(compressed).decode("utf-8"))
+    return "".join(texts)
+
+
+def lookup_imdb_table(table_name: str, keys, data_path=None, build_if_missing=True) -> pd.DataFrame:
+    """
+    Retrieve the rows of an IMDB table for the given keys (tconst or nconst).
+
+    :param table_name: Name of the table in IMDB_TABLES.
+    :param keys: Collection of keys to retrieve.
+    :param data_path: Path to the data folder, default data_load.DATA_PATH.
+    :param build_if_missing: Indicator to build the index if it is missing or outdated.
+
+    :return: A dataframe, typed like the corresponding loader, with the rows of the given keys.
+    """
+    _, columns, dtypes, format_function, key_column = IMDB_TABLES[table_name]
+    index = load_imdb_index(table_name, data_path, build_if_missing)
+    blocks_path, _ = get_index_paths(table_name, data_path)
+    keys = np.unique(np.array(list(keys), dtype=str))
+    block_ids = find_blocks(index, keys)
+    text = read_blocks(blocks_path, index, block_ids)
+    df = pd.read_csv(io.StringIO(text), sep="\t", names=columns,
+                     dtype=data_load.dtypes_map(dtypes, columns), na_values=data_load.NA_IMDB)
+    df = df[df[key_column].isin(keys)].reset_index(drop=True)
+    if format_function is not None:
+        df = format_function(df)
+    return df
@@ -0,0 +1,377 @@
+"""
+Contain the logic for ingesting new IMDB snapshots incrementally.
+
+The key and a hash of every row of the last ingested snapshot are kept on disk. A new
+snapshot is streamed by chunks and compared against them by key, so only the inserted,
+updated and deleted rows are returned and applied to the stored tables. The downstream
+artifacts depending on a changed table are recorded as stale until they are refreshed.
+"""
+
+import os
+import json
+import pickle
+import pandas as pd
+import numpy as np
+
+from utils import data_load
+from utils import imdb_index
+
+FOLDER_SNAPSHOT = "snapshot"
+STALE_ARTIFACTS_FILE_NAME = "stale_artifacts.json"
+KEY_SEPARATOR = "\t"
+
+# Table name: key columns, when the key is not only the first column
+SNAPSHOT_KEY_COLUMNS = {"title_principals": ["tconst", "ordering"]}
+
+# Table name: downstream artifacts computed from the table
+DOWNSTREAM_ARTIFACTS = {
+    "name_basics": ["director_df"],
+    "title_basics": ["wikipedia_imdb_mapping_df"],
+    "title_crew": ["is_directed_by_df", "is_written_by_df", "director_df"],
+    "title_principals": ["principal_characters"],
+    "title_ratings": ["movie_df.average_rating", "movie_df.num_votes"],
+}
+
+MOVIE_ID_COL_NAME = "movie_id"
+IMDB_ID_COL_NAME = "tconst"
+DIRECTOR_ID_COL_NAME = "director_id"
+WRITER_ID_COL_NAME = "writer_id"
+RATING_COLUMNS = ["average_rating", "num_votes"]
+
+
+# Helpers for paths
+
+def get_snapshot_path(table_name: str, data_path=None) -> str:
+    """
+    Return the path of the stored keys and row hashes of the given IMDB table.
+
+    :param table_name: Name of the table in imdb_index.IMDB_TABLES.
+    :param data_path: Path to the data folder, default data_load.DATA_PATH.
+
+    :return: Path to the snapshot file.
+    """
+    data_path = data_load.DATA_PATH if data_path is None else data_path
+    return f"{data_path}/{data_load.FOLDER_IMDB}/{FOLDER_SNAPSHOT}/{table_name}.snapshot.pkl"
+
+
+def get_stale_artifacts_path(data_path=None) -> str:
+    """
+    Return the path of the file listing the stale downstream artifacts.
+
+    :param data_path: Path to the data folder, default data_load.DATA_PATH.
+
+    :return: Path to the stale artifacts file.
+    """
+    data_path = data_load.DATA_PATH if data_path is None else data_path
+    return f"{data_path}/{data_load.FOLDER_IMDB}/{FOLDER_SNAPSHOT}/{STALE_ARTIFACTS_FILE_NAME}"
+
+
+# Helpers for the stored snapshots
+
+def load_snapshot(table_name: str, data_path=None) -> dict:
+    """
+    Load the sorted keys and row hashes of the last ingested snapshot.
+
+    :param table_name: Name of the table in imdb_index.IMDB_TABLES.
+    :param data_path: Path to the data folder, default data_load.DATA_PATH.
+
+    :return: The stored snapshot, with empty keys if the table was never ingested.
+    """
+    snapshot_path = get_snapshot_path(table_name, data_path)
+    if not os.path.exists(snapshot_path):
+        return {"keys": np.array([], dtype=str), "hashes": np.array([], dtype=np.uint64),
+                "source_size": None, "source_mtime_ns": None}
+    with open(snapshot_path, "rb") as handle:
+        return pickle.load(handle)
+
+
+def save_snapshot(table_name: str, snapshot: dict, data_path=None):
+    """
+    Store the keys and row hashes of the ingested snapshot.
+
+    :param table_name: Name of the table in imdb_index.IMDB_TABLES.
+    :param snapshot: Snapshot with the sorted keys, the row hashes and the source stats.
+    :param data_path: Path to the data folder, default data_load.DATA_PATH.
+    """
+    snapshot_path = get_snapshot_path(table_name, data_path)
+    os.makedirs(os.path.dirname(snapshot_path), exist_ok=True)
+    tmp_path = f"{snapshot_path}.tmp"
+    with open(tmp_path, "wb") as handle:
+        pickle.dump(snapshot, handle, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, snapshot_path)
+
+
+def load_stale_artifacts(data_path=None) -> dict:
+    """
+    Load the stale downstream artifacts.
+
+    :param data_path: Path to the data folder, default data_load.DATA_PATH.
+
+    :return: Dictionnary mapping each stale artifact to the tables that changed.
+    """
+    stale_path = get_stale_artifacts_path(data_path)
+    if not os.path.exists(stale_path):
+        return dict()
+    with open(stale_path, encoding="utf-8") as handle:
+        return json.load(handle)
+
+
+def save_stale_artifacts(stale_artifacts: dict, data_path=None):
+    """
+    Store the stale downstream artifacts.
+
+    :param stale_artifacts: Dictionnary mapping each stale artifact to the tables that changed.
+    :param data_path: Path to the data folder, default data_load.DATA_PATH.
+    """
+    stale_path = get_stale_artifacts_path(data_path)
+    os.makedirs(os.path.dirname(stale_path), exist_ok=True)
+    with open(stale_path, "w", encoding="utf-8") as handle:
+        json.dump(stale_artifacts, handle, indent=1, sort_keys=True)
+
+
+def mark_stale_artifacts(table_name: str, data_path=None) -> list[str]:
+    """
+    Record the downstream artifacts of a changed table as stale.
+
+    :param table_name: Name of the changed table.
+    :param data_path: Path to the data folder, default data_load.DATA_PATH.
+
+    :return: List of the artifacts marked as stale.
+    """
+    stale_artifacts = load_stale_artifacts(data_path)
+    artifacts = DOWNSTREAM_ARTIFACTS.get(table_name, [])
+    for artifact in artifacts:
+        stale_artifacts[artifact] = sorted(set(stale_artifacts.get(artifact, [])) | {table_name})
+    save_stale_artifacts(stale_artifacts, data_path)
+    return artifacts
+
+
+def clear_stale_artifacts(artifacts: list[str], data_path=None):
+    """
+    Record the given downstream artifacts as up to date.
+
+    :param artifacts: List of refreshed artifacts.
+    :param data_path: Path to the data folder, default data_load.DATA_PATH.
+    """
+    stale_artifacts = load_stale_artifacts(data_path)
+    for artifact in artifacts:
+        stale_artifacts.pop(artifact, None)
+    save_stale_artifacts(stale_artifacts, data_path)
+
+
+# Change detection
+
+def row_keys(chunk: pd.DataFrame, table_name: str) -> np.ndarray:
+    """
+    Compute the key of every row of a chunk.
+
+    :param chunk: Chunk of an IMDB table.
+    :param table_name: Name of the table in imdb_index.IMDB_TABLES.
+
+    :return: Array of string keys.
+    """
+    key_columns = SNAPSHOT_KEY_COLUMNS.get(table_name, [imdb_index.IMDB_TABLES[table_name][4]])
+    keys = chunk[key_columns[0]].astype(str)
+    for column in key_columns[1:]:
+        keys = keys.str.cat(chunk[column].astype(str), sep=KEY_SEPARATOR)
+    return keys.to_numpy(dtype=str)
+
+
+def diff_imdb_snapshot(table_name: str, data_path=None, chunk_size=data_load.CHUNK_SIZE) -> dict:
+    """
+    Compare the current raw file of an IMDB table against the last ingested snapshot.
+
+    The raw file is streamed by chunks and each row hash is looked up by binary search
+    among the stored sorted keys, so only the changed rows are kept in memory.
+
+    :param table_name: Name of the table in imdb_index.IMDB_TABLES.
+    :param data_path: Path to the data folder, default data_load.DATA_PATH.
+    :param chunk_size: Number of raw rows parsed per chunk.
+
+    :return: Dictionnary with the typed, unformatted "upserted" rows, the "inserted",
+             "updated" and "deleted" keys, and the new "snapshot" to store.
+    """
+    _, columns, dtypes, _, _ = imdb_index.IMDB_TABLES[table_name]
+    source_path = imdb_index.get_source_path(table_name, data_path)
+    old_snapshot = load_snapshot(table_name, data_path)
+    old_keys, old_hashes = old_snapshot["keys"], old_snapshot["hashes"]
+    seen = np.zeros(len(old_keys), dtype=bool)
+    upserted_chunks, inserted, updated, new_keys, new_hashes = [], [], [], [], []
+    chunks = data_load.iter_tsv_chunks(source_path, columns, data_load.dtypes_map(dtypes, columns),
+                                       chunk_size=chunk_size, compression="gzip", skiprows=1,
+                                       na_values=data_load.NA_IMDB)
+    for chunk in chunks:
+        keys = row_keys(chunk, table_name)
+        hashes = pd.util.hash_pandas_object(chunk, index=False).to_numpy()
+        is_inserted = np.ones(len(keys), dtype=bool)
+        is_updated = np.zeros(len(keys), dtype=bool)
+        if len(old_keys) > 0:
+            positions = np.searchsorted(old_keys, keys)
+            clipped = np.minimum(positions, len(old_keys) - 1)
+            found = (positions < len(old_keys)) & (old_keys[clipped] == keys)
+            seen[clipped[found]] = True
+            is_inserted = ~found
+            is_updated = found & (old_hashes[clipped] != hashes)
+        inserted.append(keys[is_inserted])
+        updated.append(keys[is_updated])
+        upserted_chunks.append(chunk[is_inserted | is_updated])
+        new_keys.append(keys)
+        new_hashes.append(hashes)
+    new_keys = np.concatenate(new_keys) if len(new_keys) > 0 else np.array([], dtype=str)
+    new_hashes = np.concatenate(new_hashes) if len(new_hashes) > 0 else np.array([], dtype=np.uint64)
+    order = np.argsort(new_keys, kind="stable")
+    source_stat = os.stat(source_path)
+    return {"upserted": pd.concat(upserted_chunks, ignore_index=True) if len(upserted_chunks) > 0
+                        else pd.DataFrame(columns=columns),
+            "inserted": np.concatenate(inserted) if len(inserted) > 0 else np.array([], dtype=str),
+            "updated": np.concatenate(updated) if len(updated) > 0 else np.array([], dtype=str),
+            "deleted": old_keys[~seen],
+            "snapshot": {"keys": new_keys[order], "hashes": new_hashes[order],
+                         "source_size": source_stat.st_size,
+                         "source_mtime_ns": source_stat.st_mtime_ns}}
+
+
+def ingest_imdb_snapshot(table_name: str, data_path=None, chunk_size=data_load.CHUNK_SIZE) -> dict:
+    """
+    Ingest the current raw file of an IMDB table incrementally.
+
+    Nothing is read if the raw file did not change since the last ingest. Otherwise the
+    changes are computed, the new snapshot is stored and, if any row changed, the
+    downstream artifacts of the table are marked as stale. The first ingest of a table
+    reports every row as inserted.
+
+    :param table_name: Name of the table in imdb_index.IMDB_TABLES.
+    :param data_path: Path to the data folder, default data_load.DATA_PATH.
+    :param chunk_size: Number of raw rows parsed per chunk.
+
+    :return: Dictionnary with the "upserted" rows, the "inserted", "updated" and "deleted"
+             keys, and the "stale" artifacts marked by this ingest.
+    """
+    old_snapshot = load_snapshot(table_name, data_path)
+    source_stat = os.stat(imdb_index.get_source_path(table_name, data_path))
+    if (old_snapshot["source_size"] == source_stat.st_size
+            and old_snapshot["source_mtime_ns"] == source_stat.st_mtime_ns):
+        columns = imdb_index.IMDB_TABLES[table_name][1]
+        empty_keys = np.array([], dtype=str)
+        return {"upserted": pd.DataFrame(columns=columns), "inserted": empty_keys,
+                "updated": empty_keys, "deleted": empty_keys, "stale": []}
+    delta = diff_imdb_snapshot(table_name, data_path, chunk_size)
+    save_snapshot(table_name, delta.pop("snapshot"), data_path)
+    changed = len(delta["inserted"]) + len(delta["updated"]) + len(delta["deleted"]) > 0
+    delta["stale"] = mark_stale_artifacts(table_name, data_path) if changed else []
+    return delta
+
+
+# Application of the changes to the stored tables
+
+def get_changed_movie_ids(mapping_table: pd.DataFrame, tconsts: np.ndarray, id_dictionary: dict) -> pd.Index:
+    """
+    Find the movies mapped to the given IMDB ids.
+
+    :param mapping_table: Wikipedia to IMDB mapping table, indexed by movie id, with interned tconst.
+    :param tconsts: Array of IMDB title ids.
+    :param id_dictionary: Dictionnary of the interned ids.
+
+    :return: Index of the movie ids.
+    """
+    title_keys = id_dictionary["title"].get_indexer(pd.Index(tconsts, dtype=object))
+    return mapping_table.index[mapping_table[IMDB_ID_COL_NAME].isin(title_keys[title_keys >= 0])]
+
+
+def apply_ratings_delta(movie_df: pd.DataFrame, mapping_table: pd.DataFrame, delta: dict,
+                        id_dictionary: dict, data_path=None) -> tuple:
+    """
+    Update the ratings of the movie table from a title ratings delta.
+
+    The updated ratings are written inplace on a copy of the movie table. Inserted or
+    deleted ratings of mapped movies change the set of kept movies, in which case the
+    movie table is left stale and the formatting notebook must be run again.
+
+    :param movie_df: Pandas DataFrame with movie information, indexed by movie id.
+    :param mapping_table: Wikipedia to IMDB mapping table, indexed by movie id, with interned tconst.
+    :param delta: Delta returned by ingest_imdb_snapshot for the title_ratings table.
+    :param id_dictionary: Dictionnary of the interned ids.
+    :param data_path: Path to the data folder, default data_load.DATA_PATH.
+
+    :return: Tuple with the updated movie table and an indicator of whether it is up to date.
+    """
+    movie_df = movie_df.copy()
+    ratings = delta["upserted"].set_index(IMDB_ID_COL_NAME)[RATING_COLUMNS]
+    updated_movies = mapping_table.loc[get_changed_movie_ids(mapping_table, delta["updated"], id_dictionary)]
+    updated_movies = updated_movies[updated_movies.index.isin(movie_df.index)]
+    tconsts = data_load.resolve_ids(updated_movies[IMDB_ID_COL_NAME], "title", id_dictionary)
+    for column in RATING_COLUMNS:
+        movie_df.loc[updated_movies.index, column] = ratings.loc[tconsts.to_numpy(), column].astype(
+            movie_df[column].dtype).to_numpy()
+    changed_set = get_changed_movie_ids(mapping_table,
+                                        np.concatenate([delta["inserted"], delta["deleted"]]), id_dictionary)
+    up_to_date = len(changed_set) == 0
+    if up_to_date:
+        clear_stale_artifacts(DOWNSTREAM_ARTIFACTS["title_ratings"], data_path)
+    return movie_df, up_to_date
+
+
+def replace_crew_relation(relation_df: pd.DataFrame, upserted: pd.DataFrame, changed_movies: pd.Index,
+                          mapping_table: pd.DataFrame, list_name: str, value_name: str,
+                          id_dictionary: dict) -> pd.DataFrame:
+    """
+    Replace the relation rows of the changed movies by the people of the upserted crew.
+
+    :param relation_df: Pandas DataFrame with the movie id and person id columns.
+    :param upserted: Raw title crew rows of the mapped movies inserted or updated by the delta.
+    :param changed_movies: Index of the movie ids whose crew changed.
+    :param mapping_table: Wikipedia to IMDB mapping table of the kept movies, with interned tconst.
+    :param list_name: Name of the raw list column in the title crew, e.g. "directors".
+    :param value_name: Name of the person id column in the relation, e.g. "director_id".
+    :param id_dictionary: Dictionnary of the interned ids.
+
+    :return: The updated relation.
+    """
+    new_relation = data_load.explode_imdb_list_column(
+        upserted[IMDB_ID_COL_NAME], upserted[list_name], IMDB_ID_COL_NAME, value_name)
+    new_relation[value_name] = new_relation[value_name].astype(object)
+    new_relation = data_load.intern_table_ids(new_relation, id_dictionary)
+    new_relation = new_relation.merge(mapping_table[[IMDB_ID_COL_NAME]].reset_index(), on=IMDB_ID_COL_NAME)
+    new_relation = new_relation[[MOVIE_ID_COL_NAME, value_name]]
+    relation_df = pd.concat([
+        relation_df[~relation_df[MOVIE_ID_COL_NAME].isin(changed_movies)],
+        new_relation.astype(relation_df.dtypes.to_dict())], ignore_index=True)
+    return relation_df.drop_duplicates().reset_index(drop=True)
+
+
+def apply_crew_delta(is_directed_by_df: pd.DataFrame, is_written_by_df: pd.DataFrame,
+                     director_df: pd.DataFrame, mapping_table: pd.DataFrame, delta: dict,
+                     id_dictionary: dict, data_path=None) -> tuple:
+    """
+    Update the movie to director and movie to writer relations from a title crew delta.
+
+    The relation rows of the changed movies are replaced by their new directors and writers.
+    If some new directors are missing from the director table, it is left stale and the
+    returned interned ids should be looked up in the name basics table.
+
+    :param is_directed_by_df: Pandas DataFrame with the movie id and director id columns.
+    :param is_written_by_df: Pandas DataFrame with the movie id and writer id columns.
+    :param director_df: Pandas DataFrame with director information, indexed by director id.
+    :param mapping_table: Wikipedia to IMDB mapping table of the kept movies, with interned tconst.
+    :param delta: Delta returned by ingest_imdb_snapshot for the title_crew table.
+    :param id_dictionary: Dictionnary of the interned ids.
+    :param data_path: Path to the data folder, default data_load.DATA_PATH.
+
+    :return: Tuple with the updated director and writer relations, and the interned ids of
+             the missing directors.
+    """
+    changed_tconsts = np.concatenate([delta["inserted"], delta["updated"], delta["deleted"]])
+    changed_movies = get_changed_movie_ids(mapping_table, changed_tconsts, id_dictionary)
+    # Only the titles of mapped movies are exploded, so that only their people are interned
+    upserted = delta["upserted"]
+    title_keys = id_dictionary["title"].get_indexer(pd.Index(upserted[IMDB_ID_COL_NAME], dtype=object))
+    upserted = upserted[np.isin(title_keys, mapping_table[IMDB_ID_COL_NAME].to_numpy())]
+    is_directed_by_df = replace_crew_relation(is_directed_by_df, upserted, changed_movies, mapping_table,
+                                              "directors", DIRECTOR_ID_COL_NAME, id_dictionary)
+    is_written_by_df = replace_crew_relation(is_written_by_df, upserted, changed_movies, mapping_table,
+                                             "writers", WRITER_ID_COL_NAME, id_dictionary)
+    missing_directors = pd.Index(is_directed_by_df[DIRECTOR_ID_COL_NAME].unique()).difference(director_df.index)
+    clear_stale_artifacts(["is_directed_by_df", "is_written_by_df"], data_path)
+    if len(missing_directors) == 0:
+        clear_stale_artifacts(["director_df"], data_path)
+    return is_directed_by_df, is_written_by_df, missing_directors
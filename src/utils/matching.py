@@ -0,0 +1,356 @@
+"""
+Contain the logic for linking the CMU movies to the IMDB titles.
+
+Candidate pairs are generated by blocking on the normalized title and the release year,
+with a tolerance of a year, so that a single hash join replaces the comparison of every
+pair of movies. The candidates are then scored on their title, year and runtime and
+resolved into a one-to-one mapping, without any manual list of ids.
+
+The movies left unmatched can be recovered by fuzzy matching: titles are compared on their
+character n-grams, and MinHash signatures split in bands (locality sensitive hashing) only
+bring together titles that are likely similar, within the same year blocks.
+"""
+
+import pandas as pd
+import numpy as np
+
+MOVIE_ID_COL_NAME = "movie_id"
+IMDB_ID_COL_NAME = "tconst"
+CMU_TITLE_COL_NAME = "name"
+CMU_DATE_COL_NAME = "release_date"
+CMU_RUNTIME_COL_NAME = "runtime"
+IMDB_TITLE_COL_NAME = "primary_title"
+IMDB_YEAR_COL_NAME = "start_year"
+IMDB_RUNTIME_COL_NAME = "runtime_minutes"
+SCORE_COL_NAME = "score"
+SIMILARITY_COL_NAME = "similarity"
+
+# Blocking
+YEAR_TOLERANCE = 1
+
+# Scoring
+TITLE_WEIGHT = 1.0
+YEAR_WEIGHT = 2.0
+RUNTIME_WEIGHT = 1.0
+NORMALIZED_TITLE_SCORE = 0.5
+RUNTIME_SCALE = 10.0
+MISSING_RUNTIME_SCORE = 0.5
+
+# Fuzzy matching
+NGRAM_SIZE = 3
+NUM_PERMUTATIONS = 32
+# 16 bands of 2 rows, a pair of similarity s is a candidate with probability 1 - (1 - s^2)^16,
+# i.e. ~99% at MIN_TITLE_SIMILARITY, the threshold (1/16)^(1/2) = 0.25 being below it
+BAND_ROWS = 2
+MINHASH_SEED = 0
+MIN_TITLE_SIMILARITY = 0.5
+TOP_CANDIDATES = 3
+
+
+# Helpers for blocking
+
+def normalize_titles(titles: pd.Series) -> pd.Series:
+    """
+    Normalize movie titles for blocking: accents, case, punctuation and spaces are removed.
+
+    :param titles: Series of raw titles.
+
+    :return: Series of normalized titles.
+    """
+    return (titles.astype(str)
+            .str.normalize("NFKD").str.encode("ascii", errors="ignore").str.decode("ascii")
+            .str.lower()
+            .str.replace(r"&", " and ", regex=True)
+            .str.replace(r"[^\w\s]", " ", regex=True)
+            .str.replace(r"\s+", " ", regex=True)
+            .str.strip())
+
+
+def build_cmu_blocks(movie_df: pd.DataFrame, year_tolerance=YEAR_TOLERANCE) -> pd.DataFrame:
+    """
+    Build the blocking keys of the CMU movies, one per year within the tolerance.
+
+    Movies without title or release date cannot be blocked and are left out.
+
+    :param movie_df: Pandas DataFrame with CMU movie information, indexed by movie id.
+    :param year_tolerance: Maximum difference, in years, between matched release years.
+
+    :return: Pandas DataFrame with the movie id, the raw title, year and runtime, and the
+             normalized title and block year.
+    """
+    cmu_df = pd.DataFrame({
+        MOVIE_ID_COL_NAME: movie_df.index.to_numpy(),
+        "cmu_title": movie_df[CMU_TITLE_COL_NAME].to_numpy(),
+        "cmu_year": pd.to_datetime(movie_df[CMU_DATE_COL_NAME], errors="coerce").dt.year.to_numpy(),
+        "cmu_runtime": pd.to_numeric(movie_df[CMU_RUNTIME_COL_NAME], errors="coerce").to_numpy(),
+    })
+    cmu_df = cmu_df[~cmu_df["cmu_title"].isna() & ~cmu_df["cmu_year"].isna()]
+    cmu_df["block_title"] = normalize_titles(cmu_df["cmu_title"]).to_numpy()
+    cmu_df["cmu_year"] = cmu_df["cmu_year"].astype(np.int32)
+    offsets = np.arange(-year_tolerance, year_tolerance + 1, dtype=np.int32)
+    cmu_blocks_df = cmu_df.loc[cmu_df.index.repeat(len(offsets))].reset_index(drop=True)
+    cmu_blocks_df["block_year"] = cmu_blocks_df["cmu_year"].to_numpy() + np.tile(offsets, len(cmu_df))
+    return cmu_blocks_df
+
+
+def build_imdb_blocks(imdb_movie_df: pd.DataFrame, block_titles=None) -> pd.DataFrame:
+    """
+    Build the blocking keys of the IMDB titles.
+
+    :param imdb_movie_df: Pandas DataFrame with the tconst, primary title, start year and
+                          runtime of the IMDB titles.
+    :param block_titles: Normalized titles to keep, all the titles if None.
+
+    :return: Pandas DataFrame with the tconst, the raw title, year and runtime, and the
+             normalized title and block year.
+    """
+    imdb_df = imdb_movie_df[~imdb_movie_df[IMDB_TITLE_COL_NAME].isna()
+                            & ~imdb_movie_df[IMDB_YEAR_COL_NAME].isna()]
+    imdb_blocks_df = pd.DataFrame({
+        IMDB_ID_COL_NAME: imdb_df[IMDB_ID_COL_NAME].to_numpy(),
+        "imdb_title": imdb_df[IMDB_TITLE_COL_NAME].to_numpy(),
+        "block_year": imdb_df[IMDB_YEAR_COL_NAME].to_numpy(dtype=np.int32),
+        "imdb_runtime": pd.to_numeric(imdb_df[IMDB_RUNTIME_COL_NAME], errors="coerce").to_numpy(
+            dtype=float, na_value=np.nan),
+        "block_title": normalize_titles(imdb_df[IMDB_TITLE_COL_NAME]).to_numpy(),
+    })
+    if block_titles is not None:
+        imdb_blocks_df = imdb_blocks_df[imdb_blocks_df["block_title"].isin(block_titles)]
+    return imdb_blocks_df.reset_index(drop=True)
+
+
+# Helpers for scoring
+
+def generate_candidates(movie_df: pd.DataFrame, imdb_movie_df: pd.DataFrame,
+                        year_tolerance=YEAR_TOLERANCE) -> pd.DataFrame:
+    """
+    Generate the candidate pairs sharing a blocking key, i.e. the same normalized title
+    and release years within the tolerance.
+
+    :param movie_df: Pandas DataFrame with CMU movie information, indexed by movie id.
+    :param imdb_movie_df: Pandas DataFrame with the IMDB titles.
+    :param year_tolerance: Maximum difference, in years, between matched release years.
+
+    :return: Pandas DataFrame with one row per candidate pair.
+    """
+    cmu_blocks_df = build_cmu_blocks(movie_df, year_tolerance)
+    imdb_blocks_df = build_imdb_blocks(imdb_movie_df, set(cmu_blocks_df["block_title"]))
+    return cmu_blocks_df.merge(imdb_blocks_df, on=["block_title", "block_year"], how="inner")
+
+
+def score_candidates(candidates_df: pd.DataFrame, year_tolerance=YEAR_TOLERANCE) -> pd.Series:
+    """
+    Score the candidate pairs on their title, release year and runtime.
+
+    Pairs from the fuzzy matching have a title score proportional to their similarity,
+    thus always lower than the one of pairs with the same normalized title.
+
+    :param candidates_df: Pandas DataFrame with the candidate pairs.
+    :param year_tolerance: Maximum difference, in years, between matched release years.
+
+    :return: Series with the score of each pair, the higher the better.
+    """
+    if SIMILARITY_COL_NAME in candidates_df.columns:
+        title_score = NORMALIZED_TITLE_SCORE * candidates_df[SIMILARITY_COL_NAME].to_numpy()
+    else:
+        title_score = np.where(candidates_df["cmu_title"].to_numpy() == candidates_df["imdb_title"].to_numpy(),
+                               1.0, NORMALIZED_TITLE_SCORE)
+    year_difference = np.abs(candidates_df["cmu_year"].to_numpy() - candidates_df["block_year"].to_numpy())
+    year_score = 1.0 - year_difference / (year_tolerance + 1)
+    runtime_difference = np.abs(candidates_df["cmu_runtime"].to_numpy(dtype=float)
+                                - candidates_df["imdb_runtime"].to_numpy(dtype=float))
+    runtime_score = np.where(np.isnan(runtime_difference), MISSING_RUNTIME_SCORE,
+                             np.exp(-np.nan_to_num(runtime_difference) / RUNTIME_SCALE))
+    return pd.Series(TITLE_WEIGHT * title_score + YEAR_WEIGHT * year_score + RUNTIME_WEIGHT * runtime_score,
+                     index=candidates_df.index)
+
+
+# Helpers for fuzzy matching
+
+def title_ngrams(titles: pd.Series, ngram_size=NGRAM_SIZE) -> tuple:
+    """
+    Split normalized titles into their character n-grams, padded with a space on each side.
+
+    :param titles: Series of normalized titles.
+    :param ngram_size: Number of characters per n-gram.
+
+    :return: Tuple with the list of n-gram sets of each title, and the flat array of the
+             n-gram hashes with the position of their title.
+    """
+    ngram_sets = [frozenset(padded[i:i + ngram_size] for i in range(max(len(padded) - ngram_size + 1, 1)))
+                  for padded in (f" {title} " for title in titles)]
+    lengths = np.fromiter((len(ngrams) for ngrams in ngram_sets), dtype=np.int64, count=len(ngram_sets))
+    flat_ngrams = np.fromiter((ngram for ngrams in ngram_sets for ngram in ngrams),
+                              dtype=object, count=lengths.sum())
+    ngram_hashes = pd.util.hash_array(flat_ngrams)
+    parents = np.repeat(np.arange(len(ngram_sets)), lengths)
+    return ngram_sets, ngram_hashes, parents
+
+
+def minhash_signatures(ngram_hashes: np.ndarray, parents: np.ndarray, num_titles: int,
+                       num_permutations=NUM_PERMUTATIONS, seed=MINHASH_SEED) -> np.ndarray:
+    """
+    Compute the MinHash signatures of the titles from their n-gram hashes.
+
+    :param ngram_hashes: Flat array of the n-gram hashes, grouped by title.
+    :param parents: Position of the title of each n-gram, in increasing order.
+    :param num_titles: Number of titles.
+    :param num_permutations: Number of hash permutations, i.e. length of the signatures.
+    :param seed: Seed of the random permutations.
+
+    :return: Array of shape (num_titles, num_permutations) with the signatures.
+    """
+    rng = np.random.default_rng(seed)
+    multipliers = rng.integers(1, 2**63, size=num_permutations, dtype=np.uint64) | np.uint64(1)
+    increments = rng.integers(0, 2**63, size=num_permutations, dtype=np.uint64)
+    signatures = np.full((num_titles, num_permutations), np.iinfo(np.uint64).max, dtype=np.uint64)
+    if len(ngram_hashes) == 0:
+        return signatures
+    starts = np.flatnonzero(np.r_[True, parents[1:] != parents[:-1]])
+    for permutation in range(num_permutations):
+        permuted = ngram_hashes * multipliers[permutation] + increments[permutation]
+        signatures[parents[starts], permutation] = np.minimum.reduceat(permuted, starts)
+    return signatures
+
+
+def band_keys(signatures: np.ndarray, band_rows=BAND_ROWS) -> pd.DataFrame:
+    """
+    Hash the bands of the MinHash signatures, titles sharing a band key are candidates.
+
+    :param signatures: Array of shape (num_titles, num_permutations) with the signatures.
+    :param band_rows: Number of signature values per band.
+
+    :return: Pandas DataFrame with the position of the title, the band and its key.
+    """
+    num_bands = signatures.shape[1] // band_rows
+    keys = [pd.util.hash_pandas_object(pd.DataFrame(signatures[:, band * band_rows:(band + 1) * band_rows]),
+                                       index=False).to_numpy()
+            for band in range(num_bands)]
+    return pd.DataFrame({"position": np.tile(np.arange(len(signatures)), num_bands),
+                         "band": np.repeat(np.arange(num_bands), len(signatures)),
+                         "band_key": np.concatenate(keys) if num_bands > 0 else np.array([], dtype=np.uint64)})
+
+
+def fuzzy_match_titles(movie_df: pd.DataFrame, imdb_movie_df: pd.DataFrame,
+                       year_tolerance=YEAR_TOLERANCE, top_candidates=TOP_CANDIDATES,
+                       min_similarity=MIN_TITLE_SIMILARITY) -> pd.DataFrame:
+    """
+    Find the IMDB titles most similar to the titles of the CMU movies.
+
+    Candidates share a band of their MinHash signatures and have release years within the
+    tolerance, which keeps their generation sub-quadratic. They are then ranked by the
+    Jaccard similarity of their n-gram sets.
+
+    :param movie_df: Pandas DataFrame with CMU movie information, indexed by movie id.
+    :param imdb_movie_df: Pandas DataFrame with the IMDB titles.
+    :param year_tolerance: Maximum difference, in years, between matched release years.
+    :param top_candidates: Number of candidates kept per movie.
+    :param min_similarity: Minimum Jaccard similarity of the candidates.
+
+    :return: Pandas DataFrame with the candidate pairs, their similarity and their rank.
+    """
+    cmu_blocks_df = build_cmu_blocks(movie_df, year_tolerance)
+    imdb_blocks_df = build_imdb_blocks(imdb_movie_df)
+    imdb_blocks_df = imdb_blocks_df[imdb_blocks_df["block_year"].isin(set(cmu_blocks_df["block_year"]))
+                                    ].reset_index(drop=True)
+    title_sets, band_years = [], []
+    for blocks_df in [cmu_blocks_df, imdb_blocks_df]:
+        title_years = blocks_df[["block_title", "block_year"]].drop_duplicates()
+        titles = pd.Index(title_years["block_title"].unique())
+        ngram_sets, ngram_hashes, parents = title_ngrams(titles)
+        title_sets.append((titles, ngram_sets))
+        keys_df = band_keys(minhash_signatures(ngram_hashes, parents, len(titles)))
+        title_years = pd.DataFrame({"position": titles.get_indexer(title_years["block_title"]),
+                                    "block_year": title_years["block_year"].to_numpy()})
+        band_years.append(keys_df.merge(title_years, on="position"))
+    # Titles are candidates when they share a band key within the same year block.
+    title_pairs = band_years[0].merge(band_years[1], on=["band", "band_key", "block_year"],
+                                      suffixes=("_cmu", "_imdb"))[["position_cmu", "position_imdb"]]
+    title_pairs = title_pairs.drop_duplicates()
+    (cmu_titles, cmu_sets), (imdb_titles, imdb_sets) = title_sets
+    title_pairs["cmu_block_title"] = cmu_titles.to_numpy()[title_pairs["position_cmu"].to_numpy()]
+    title_pairs["block_title"] = imdb_titles.to_numpy()[title_pairs["position_imdb"].to_numpy()]
+    title_pairs[SIMILARITY_COL_NAME] = [len(cmu_sets[i] & imdb_sets[j]) / len(cmu_sets[i] | imdb_sets[j])
+                                        for i, j in zip(title_pairs["position_cmu"], title_pairs["position_imdb"])]
+    title_pairs = title_pairs[title_pairs[SIMILARITY_COL_NAME] >= min_similarity]
+    candidates_df = cmu_blocks_df.merge(
+        title_pairs[["cmu_block_title", "block_title", SIMILARITY_COL_NAME]].rename(
+            columns={"block_title": "imdb_block_title", "cmu_block_title": "block_title"}),
+        on="block_title")
+    candidates_df = candidates_df.merge(
+        imdb_blocks_df.rename(columns={"block_title": "imdb_block_title"}),
+        on=["imdb_block_title", "block_year"])
+    candidates_df = candidates_df.sort_values([MOVIE_ID_COL_NAME, SIMILARITY_COL_NAME, IMDB_ID_COL_NAME],
+                                              ascending=[True, False, True])
+    candidates_df = candidates_df.drop_duplicates([MOVIE_ID_COL_NAME, IMDB_ID_COL_NAME])
+    candidates_df["rank"] = candidates_df.groupby(MOVIE_ID_COL_NAME).cumcount() + 1
+    return candidates_df[candidates_df["rank"] <= top_candidates].reset_index(drop=True)
+
+
+# Assignment
+
+def resolve_one_to_one(candidates_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Resolve scored candidate pairs into a one-to-one mapping.
+
+    At each round, a pair is accepted when it is the unique best candidate of both its
+    movie and its title. The accepted movies and titles are removed and the rounds go on
+    until no pair can be accepted. The result does not depend on the order of the rows,
+    and movies whose best candidates are tied stay unmatched.
+
+    :param candidates_df: Pandas DataFrame with the movie id, tconst and score columns.
+
+    :return: Pandas DataFrame with the accepted pairs.
+    """
+    remaining_df = candidates_df[[MOVIE_ID_COL_NAME, IMDB_ID_COL_NAME, SCORE_COL_NAME]]
+    accepted = []
+    while len(remaining_df) > 0:
+        is_best = pd.Series(True, index=remaining_df.index)
+        for key in [MOVIE_ID_COL_NAME, IMDB_ID_COL_NAME]:
+            best_score = remaining_df.groupby(key)[SCORE_COL_NAME].transform("max")
+            is_key_best = remaining_df[SCORE_COL_NAME] == best_score
+            best_count = is_key_best.groupby(remaining_df[key]).transform("sum")
+            is_best &= is_key_best & (best_count == 1)
+        accepted_df = remaining_df[is_best]
+        if len(accepted_df) == 0:
+            break
+        accepted.append(accepted_df)
+        remaining_df = remaining_df[~remaining_df[MOVIE_ID_COL_NAME].isin(accepted_df[MOVIE_ID_COL_NAME])
+                                    & ~remaining_df[IMDB_ID_COL_NAME].isin(accepted_df[IMDB_ID_COL_NAME])]
+    if len(accepted) == 0:
+        return candidates_df[[MOVIE_ID_COL_NAME, IMDB_ID_COL_NAME, SCORE_COL_NAME]].iloc[:0]
+    return pd.concat(accepted).sort_values(MOVIE_ID_COL_NAME).reset_index(drop=True)
+
+
+def match_cmu_to_imdb(movie_df: pd.DataFrame, imdb_movie_df: pd.DataFrame,
+                      year_tolerance=YEAR_TOLERANCE, fuzzy=False) -> pd.DataFrame:
+    """
+    Link the CMU movies to the IMDB titles.
+
+    With fuzzy matching, the movies left unmatched by the normalized titles are matched
+    in a second pass against the remaining IMDB titles, see fuzzy_match_titles.
+
+    :param movie_df: Pandas DataFrame with CMU movie information, indexed by movie id,
+                     with the name, release date and runtime columns.
+    :param imdb_movie_df: Pandas DataFrame with the tconst, primary title, start year and
+                          runtime of the IMDB titles.
+    :param year_tolerance: Maximum difference, in years, between matched release years.
+    :param fuzzy: Indicator to recover the unmatched movies by fuzzy title matching.
+
+    :return: Pandas DataFrame with the movie id, the matched tconst, the match score and
+             an indicator of fuzzy matching.
+    """
+    candidates_df = generate_candidates(movie_df, imdb_movie_df, year_tolerance)
+    candidates_df[SCORE_COL_NAME] = score_candidates(candidates_df, year_tolerance)
+    matches_df = resolve_one_to_one(candidates_df)
+    matches_df["fuzzy"] = False
+    if not fuzzy:
+        return matches_df
+    fuzzy_candidates_df = fuzzy_match_titles(
+        movie_df[~movie_df.index.isin(matches_df[MOVIE_ID_COL_NAME])],
+        imdb_movie_df[~imdb_movie_df[IMDB_ID_COL_NAME].isin(matches_df[IMDB_ID_COL_NAME])],
+        year_tolerance)
+    fuzzy_candidates_df[SCORE_COL_NAME] = score_candidates(fuzzy_candidates_df, year_tolerance)
+    fuzzy_matches_df = resolve_one_to_one(fuzzy_candidates_df)
+    fuzzy_matches_df["fuzzy"] = True
+    return pd.concat([matches_df, fuzzy_matches_df]).sort_values(MOVIE_ID_COL_NAME).reset_index(drop=True)
@@ -0,0 +1,179 @@
+"""
+Contain the lazy and shared access to the formatted data tables.
+"""
+
+import os
+import pickle
+import pandas as pd
+import numpy as np
+
+DATA_PATH = "../data"
+
+FOLDER_GENERATED = "generated"
+FOLDER_POST_PROCESSING = "post_processing"
+
+# Table name: (folder, file name, reader)
+TABLE_FILES = {
+    "country_df": (FOLDER_POST_PROCESSING, "country_df.pkl", "pickle_df"),
+    "comes_from_df": (FOLDER_POST_PROCESSING, "comes_from_df.pkl", "pickle_df"),
+    "genre_df": (FOLDER_POST_PROCESSING, "genre_df.pkl", "pickle_df"),
+    "is_of_type_df": (FOLDER_POST_PROCESSING, "is_of_type_df.pkl", "pickle_df"),
+    "language_df": (FOLDER_POST_PROCESSING, "language_df.pkl", "pickle_df"),
+    "spoken_languages_df": (FOLDER_POST_PROCESSING, "spoken_languages_df.pkl", "pickle_df"),
+    "character_df": (FOLDER_POST_PROCESSING, "character_df.pkl", "pickle_df"),
+    "actor_df": (FOLDER_POST_PROCESSING, "actor_df.pkl", "pickle_df"),
+    "movie_df": (FOLDER_POST_PROCESSING, "movie_df.pkl", "pickle_df"),
+    "belongs_to_df": (FOLDER_POST_PROCESSING, "belongs_to_df.pkl", "pickle_df"),
+    "play_df": (FOLDER_POST_PROCESSING, "play_df.pkl", "pickle_df"),
+    "appears_in_df": (FOLDER_POST_PROCESSING, "appears_in_df.pkl", "pickle_df"),
+    "is_directed_by_df": (FOLDER_POST_PROCESSING, "is_directed_by_df.pkl", "pickle_df"),
+    "is_written_by_df": (FOLDER_POST_PROCESSING, "is_written_by_df.pkl", "pickle_df"),
+    "director_df": (FOLDER_POST_PROCESSING, "director_df.pkl", "pickle_df"),
+    "plot_df": (FOLDER_POST_PROCESSING, "plot_df.pkl", "pickle_df"),
+    "BOW_matrix": (FOLDER_POST_PROCESSING, "BOW_matrix.npz", "npz"),
+    "BOW_dict": (FOLDER_POST_PROCESSING, "BOW_mapping.pkl", "pickle"),
+    "wikipedia_imdb_mapping_table": (FOLDER_GENERATED, "wikipedia_imdb_mapping_df.pkl", "pickle_df"),
+}
+
+# Process-wide memoization of the loaded tables, keyed by absolute file path, with the
+# size and modification time of the file when it was read.
+LOADED_TABLES = dict()
+
+
+# Readers
+
+def read_pickle_file(file_path: str):
+    """
+    Read a python object stored with pickle.
+
+    :param file_path: Path to the pickle file.
+
+    :return: The unpickled object.
+    """
+    with open(file_path, 'rb') as handle:
+        return pickle.load(handle)
+
+
+def read_npz_file(file_path: str):
+    """
+    Read a scipy sparse matrix stored in npz format.
+
+    :param file_path: Path to the npz file.
+
+    :return: The sparse matrix.
+    """
+    from scipy.sparse import load_npz
+    return load_npz(file_path)
+
+
+READERS = {"pickle_df": pd.read_pickle, "pickle": read_pickle_file, "npz": read_npz_file}
+
+
+# Dtype normalization
+
+def normalize_movie_df(movie_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Normalize the dtypes of the movie table.
+
+    :param movie_df: Pandas DataFrame with movie information.
+
+    :return: The normalized movie table.
+    """
+    if "release_date" in movie_df.columns:
+        movie_df["release_date"] = pd.to_datetime(movie_df["release_date"])
+    if "num_votes" in movie_df.columns and not movie_df["num_votes"].isna().any():
+        movie_df["num_votes"] = movie_df["num_votes"].astype(np.int32)
+    return movie_df
+
+
+TABLE_NORMALIZERS = {"movie_df": normalize_movie_df}
+
+
+# Loading
+
+def get_table_path(data_path: str, table_name: str) -> str:
+    """
+    Compute the absolute path of the file storing the given table.
+
+    :param data_path: Path to the data folder.
+    :param table_name: Name of the table.
+
+    :return: Absolute path to the table file.
+    """
+    folder, file_name, _ = TABLE_FILES[table_name]
+    return os.path.abspath(os.path.join(data_path, folder, file_name))
+
+
+def get_file_version(file_path: str) -> tuple:
+    """
+    Return the version of a file, i.e. its size and modification time.
+
+    :param file_path: Path to the file.
+
+    :return: Tuple with the size and the modification time in nanoseconds.
+    """
+    file_stat = os.stat(file_path)
+    return file_stat.st_size, file_stat.st_mtime_ns
+
+
+def load_table(data_path: str, table_name: str):
+    """
+    Load a table once per process and normalize its dtypes.
+
+    The same object is returned to every caller, thus it should not be modified inplace.
+    The table is read again if its file was rewritten since, e.g. by the pipeline.
+
+    :param data_path: Path to the data folder.
+    :param table_name: Name of the table.
+
+    :return: The loaded table.
+    """
+    table_path = get_table_path(data_path, table_name)
+    file_version = get_file_version(table_path)
+    if table_path not in LOADED_TABLES or LOADED_TABLES[table_path][0] != file_version:
+        table = READERS[TABLE_FILES[table_name][2]](table_path)
+        if table_name in TABLE_NORMALIZERS:
+            table = TABLE_NORMALIZERS[table_name](table)
+        LOADED_TABLES[table_path] = (file_version, table)
+    return LOADED_TABLES[table_path][1]
+
+
+class MovieDataset:
+    """
+    Facade over the formatted tables of the data folder.
+
+    Every table listed in TABLE_FILES is exposed as an attribute, e.g. dataset.movie_df.
+    A table is only read when its attribute is first accessed, and it is memoized for the
+    whole process so that several datasets or pipeline calls share the loaded data, until
+    its file changes.
+    """
+
+    def __init__(self, data_path=DATA_PATH):
+        """
+        :param data_path: Path to the data folder, relative to the working directory.
+        """
+        self.data_path = data_path
+
+    def __getattr__(self, name: str):
+        if name in TABLE_FILES:
+            return load_table(self.data_path, name)
+        raise AttributeError(f"'{type(self).__name__}' object has no attribute '{name}'")
+
+    def __dir__(self):
+        return list(super().__dir__()) + list(TABLE_FILES)
+
+    def loaded_tables(self) -> list[str]:
+        """
+        List the tables of this dataset that are already in memory.
+
+        :return: List of table names.
+        """
+        return [name for name in TABLE_FILES
+                if get_table_path(self.data_path, name) in LOADED_TABLES]
+
+    def clear(self):
+        """
+        Release the tables of this dataset from the process-wide memoization.
+        """
+        for name in TABLE_FILES:
+            LOADED_TABLES.pop(get_table_path(self.data_path, name), None)
@@ -0,0 +1,242 @@
+"""
+Contain the logic for resolving persons, i.e. actors and IMDB people, by hashed keys.
+
+A person key is the hash of the normalized name and the birth date, or only the birth
+year for fuzzier matches. Duplicates are then the rows sharing a key, found in O(N) by
+hashing instead of comparing names, which scales to the ~12M people of IMDB name.basics.
+The same keys link the Freebase actors of the CMU dataset to the IMDB nconsts.
+"""
+
+import pandas as pd
+import numpy as np
+
+from utils import data_load
+from utils import matching
+
+ACTOR_ID_COL_NAME = "actor_id"
+NCONST_COL_NAME = "nconst"
+CLUSTER_COL_NAME = "cluster_id"
+KEY_COL_NAME = "person_key"
+ACTOR_NAME_COL_NAME = "name"
+ACTOR_BIRTHDATE_COL_NAME = "birth_date"
+IMDB_NAME_COL_NAME = "primary_name"
+IMDB_BIRTH_YEAR_COL_NAME = "birth_year"
+
+BIRTH_PRECISIONS = {"date": 10, "year": 4}
+NCONST_PREFIX = "nm"
+NCONST_DIGITS = 7
+
+
+# Helpers for person keys
+
+def normalize_person_names(names: pd.Series, sort_tokens=False) -> pd.Series:
+    """
+    Normalize person names: accents, case, punctuation and spaces are removed.
+
+    :param names: Series of raw names.
+    :param sort_tokens: Indicator to sort the words of the names, so that e.g.
+                        "Smith, John" and "John Smith" are the same name.
+
+    :return: Series of normalized names.
+    """
+    normalized = matching.normalize_titles(names)
+    if sort_tokens:
+        normalized = normalized.str.split(" ").map(lambda tokens: " ".join(sorted(tokens)))
+    return normalized
+
+
+def normalize_birth_dates(birth_dates: pd.Series, precision="date") -> pd.Series:
+    """
+    Normalize birth dates to ISO strings of the given precision.
+
+    Dates less precise than required, e.g. only a year when the full date is required,
+    are considered missing.
+
+    :param birth_dates: Series of birth dates, as strings, datetimes or years.
+    :param precision: Either "date" (YYYY-MM-DD) or "year" (YYYY).
+
+    :return: Series of normalized birth dates, missing when unknown.
+    """
+    length = BIRTH_PRECISIONS[precision]
+    if pd.api.types.is_numeric_dtype(birth_dates.dtype):
+        birth_dates = birth_dates.astype("Int64").astype(pd.StringDtype())
+    elif pd.api.types.is_datetime64_any_dtype(birth_dates.dtype):
+        birth_dates = birth_dates.dt.strftime("%Y-%m-%d").astype(pd.StringDtype())
+    else:
+        birth_dates = birth_dates.astype(pd.StringDtype()).str.strip()
+    birth_dates = birth_dates.str[:length]
+    return birth_dates.where(birth_dates.str.len() == length)
+
+
+def person_keys(names: pd.Series, birth_dates: pd.Series, precision="date", sort_tokens=False) -> pd.Series:
+    """
+    Hash the normalized name and birth date of every person.
+
+    Keys are 64 bits hashes, thus the probability that two different persons share a key
+    is negligible even for the whole IMDB table.
+
+    :param names: Series of raw names.
+    :param birth_dates: Series of birth dates, aligned with names.
+    :param precision: Either "date" or "year", precision of the birth dates in the key.
+    :param sort_tokens: Indicator to sort the words of the names, see normalize_person_names.
+
+    :return: Series of uint64 keys, restricted to the persons with a name and a birth date.
+    """
+    birth_dates = normalize_birth_dates(birth_dates, precision)
+    is_defined = (names.notna() & birth_dates.notna()).to_numpy()
+    key_df = pd.DataFrame({"name": normalize_person_names(names[is_defined], sort_tokens).to_numpy(),
+                           "birth": birth_dates[is_defined].to_numpy(dtype=object)},
+                          index=names.index[is_defined])
+    key_df = key_df[key_df["name"].str.len() > 0]
+    return pd.Series(pd.util.hash_pandas_object(key_df, index=False).to_numpy(),
+                     index=key_df.index, name=KEY_COL_NAME)
+
+
+def find_key_clusters(keys: pd.Series) -> pd.DataFrame:
+    """
+    Group the ids sharing a key into clusters of duplicates, in O(N).
+
+    :param keys: Series of keys indexed by id.
+
+    :return: Pandas DataFrame with the id and the cluster of every duplicated id,
+             clusters being numbered by first appearance.
+    """
+    duplicated_keys = keys[keys.duplicated(keep=False)]
+    cluster_ids, _ = pd.factorize(duplicated_keys)
+    return pd.DataFrame({keys.index.name or "id": duplicated_keys.index,
+                         CLUSTER_COL_NAME: cluster_ids})
+
+
+def clusters_to_lists(cluster_df: pd.DataFrame) -> list:
+    """
+    Convert clusters to the list of lists of ids expected by
+    data_load.rematch_duplicated_actor_ids.
+
+    :param cluster_df: Pandas DataFrame with an id column and the cluster id column.
+
+    :return: List of lists of duplicated ids.
+    """
+    id_column = [column for column in cluster_df.columns if column != CLUSTER_COL_NAME][0]
+    return cluster_df.groupby(CLUSTER_COL_NAME, sort=True)[id_column].apply(list).to_list()
+
+
+# Helpers for IMDB person ids
+
+def nconst_to_codes(nconsts: pd.Series) -> np.ndarray:
+    """
+    Encode nconsts as integers to keep the ids of all the IMDB people in memory.
+
+    :param nconsts: Series of nconsts such as "nm0000001".
+
+    :return: Array of int64 codes.
+    """
+    return nconsts.str[len(NCONST_PREFIX):].astype(np.int64).to_numpy()
+
+
+def codes_to_nconst(codes: np.ndarray) -> pd.Series:
+    """
+    Decode integer codes back to nconsts.
+
+    :param codes: Array of int64 codes.
+
+    :return: Series of nconsts.
+    """
+    return pd.Series(codes).map(lambda code: f"{NCONST_PREFIX}{code:0{NCONST_DIGITS}d}").astype(
+        pd.StringDtype())
+
+
+def iter_imdb_person_keys(sort_tokens=False, chunk_size=data_load.CHUNK_SIZE):
+    """
+    Stream the keys of the IMDB people by chunks. IMDB only gives the birth years,
+    thus the keys have the year precision.
+
+    :param sort_tokens: Indicator to sort the words of the names, see normalize_person_names.
+    :param chunk_size: Number of raw rows parsed per chunk.
+
+    :return: A generator of tuples with the nconst codes and the keys of each chunk.
+    """
+    columns = [NCONST_COL_NAME, IMDB_NAME_COL_NAME, IMDB_BIRTH_YEAR_COL_NAME]
+    chunks = data_load.iter_tsv_chunks(
+        f"{data_load.DATA_PATH}/{data_load.FOLDER_IMDB}/name.basics.tsv.gz",
+        data_load.COL_IMDB_NAME_BASICS,
+        data_load.dtypes_map(data_load.DTYPES_IMDB_NAME_BASICS, data_load.COL_IMDB_NAME_BASICS),
+        chunk_size=chunk_size, columns=columns, compression="gzip", skiprows=1,
+        na_values=data_load.NA_IMDB)
+    for chunk in chunks:
+        keys = person_keys(chunk[IMDB_NAME_COL_NAME], chunk[IMDB_BIRTH_YEAR_COL_NAME], "year", sort_tokens)
+        yield nconst_to_codes(chunk.loc[keys.index, NCONST_COL_NAME]), keys.to_numpy()
+
+
+# Resolvers
+
+def find_duplicate_actor_clusters(actor_dataframe: pd.DataFrame, precision="date", sort_tokens=False) -> list:
+    """
+    Find the clusters of actors sharing the same normalized name and birth date.
+
+    :param actor_dataframe: Pandas Dataframe containing actor information, indexed by actor id.
+    :param precision: Either "date" or "year", "year" gives fuzzier matches.
+    :param sort_tokens: Indicator to sort the words of the names, see normalize_person_names.
+
+    :return: List of lists of duplicated actor ids, see data_load.rematch_duplicated_actor_ids.
+    """
+    keys = person_keys(actor_dataframe[ACTOR_NAME_COL_NAME], actor_dataframe[ACTOR_BIRTHDATE_COL_NAME],
+                       precision, sort_tokens)
+    return clusters_to_lists(find_key_clusters(keys))
+
+
+def find_imdb_duplicate_clusters(sort_tokens=False, chunk_size=data_load.CHUNK_SIZE) -> pd.DataFrame:
+    """
+    Find the clusters of IMDB people sharing the same normalized name and birth year.
+
+    Only the integer codes of the nconsts and the 64 bits keys are kept in memory while
+    the table is streamed.
+
+    :param sort_tokens: Indicator to sort the words of the names, see normalize_person_names.
+    :param chunk_size: Number of raw rows parsed per chunk.
+
+    :return: Pandas DataFrame with the nconst and the cluster of every duplicated person.
+    """
+    codes, keys = [], []
+    for chunk_codes, chunk_keys in iter_imdb_person_keys(sort_tokens, chunk_size):
+        codes.append(chunk_codes)
+        keys.append(chunk_keys)
+    if len(codes) == 0:
+        return pd.DataFrame({NCONST_COL_NAME: pd.Series(dtype=pd.StringDtype()),
+                             CLUSTER_COL_NAME: pd.Series(dtype=np.int64)})
+    keys = pd.Series(np.concatenate(keys), index=pd.Index(np.concatenate(codes), name=NCONST_COL_NAME))
+    cluster_df = find_key_clusters(keys)
+    cluster_df[NCONST_COL_NAME] = codes_to_nconst(cluster_df[NCONST_COL_NAME].to_numpy()).to_numpy()
+    return cluster_df
+
+
+def match_actors_to_imdb(actor_dataframe: pd.DataFrame, sort_tokens=False,
+                         chunk_size=data_load.CHUNK_SIZE) -> pd.DataFrame:
+    """
+    Link the Freebase actors to the IMDB people sharing their normalized name and birth year.
+
+    The IMDB table is streamed and only the people whose key is one of the actor keys are
+    kept. Keys shared by several actors or several IMDB people are ambiguous and dropped,
+    so that the links are one-to-one.
+
+    :param actor_dataframe: Pandas Dataframe containing actor information, indexed by actor id.
+    :param sort_tokens: Indicator to sort the words of the names, see normalize_person_names.
+    :param chunk_size: Number of raw rows parsed per chunk.
+
+    :return: Pandas DataFrame with the actor id and the nconst of every linked actor.
+    """
+    actor_keys = person_keys(actor_dataframe[ACTOR_NAME_COL_NAME], actor_dataframe[ACTOR_BIRTHDATE_COL_NAME],
+                             "year", sort_tokens)
+    actor_keys = actor_keys[~actor_keys.duplicated(keep=False)]
+    lookup_keys = np.sort(actor_keys.to_numpy())
+    hit_codes, hit_keys = [], []
+    for chunk_codes, chunk_keys in iter_imdb_person_keys(sort_tokens, chunk_size):
+        is_hit = np.isin(chunk_keys, lookup_keys, assume_unique=False)
+        hit_codes.append(chunk_codes[is_hit])
+        hit_keys.append(chunk_keys[is_hit])
+    imdb_hits = pd.DataFrame({NCONST_COL_NAME: np.concatenate(hit_codes) if hit_codes else np.array([], dtype=np.int64),
+                              KEY_COL_NAME: np.concatenate(hit_keys) if hit_keys else np.array([], dtype=np.uint64)})
+    imdb_hits = imdb_hits[~imdb_hits[KEY_COL_NAME].duplicated(keep=False)]
+    links_df = pd.DataFrame({ACTOR_ID_COL_NAME: actor_keys.index, KEY_COL_NAME: actor_keys.to_numpy()}).merge(
+        imdb_hits, on=KEY_COL_NAME)
+    links_df[NCONST_COL_NAME] = codes_to_nconst(links_df[NCONST_COL_NAME].to_numpy()).to_numpy()
+    return links_df[[ACTOR_ID_COL_NAME, NCONST_COL_NAME]].sort_values(ACTOR_ID_COL_NAME).reset_index(drop=True)
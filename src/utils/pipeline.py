@@ -0,0 +1,561 @@
+"""
+Contain the logic for running the data pipeline as a graph of cached stages.
+
+Each stage, either a notebook or a function, declares the data files it reads and writes.
+A stage is identified by the hash of its inputs, code and parameters, and only reruns when
+this hash changes. The outputs of every run are also stored under this hash, so going back
+to a previous version restores them instead of recomputing. Inputs produced by an upstream
+stage are hashed by content: a stage that rewrites identical files, e.g. data_formatting
+after a change of COUNTRY_MAPPING that does not alter movie_df, does not trigger the
+stages downstream of these files. Stages whose inputs are ready run in parallel.
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import hashlib
+import resource
+import importlib
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+import pandas as pd
+import numpy as np
+
+from utils import data_load
+from utils import imdb_index
+
+SRC_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+FOLDER_PIPELINE = "pipeline"
+FOLDER_PIPELINE_CACHE = "cache"
+MANIFEST_FILE_NAME = "manifest.json"
+CACHE_ENTRY_FILE_NAME = "entry.json"
+DIGEST_CHUNK_SIZE = 1 << 20
+ROW_COUNTED_EXTENSIONS = (".pkl", ".npz")
+MAX_WORKERS = 2
+# Number of runs kept in the cache of every stage, the least recently used ones being evicted
+MAX_CACHED_RUNS = 3
+NOTEBOOK_MAGIC_PREFIXES = ("%", "!")
+
+STAGE_FRESH = "fresh"
+STAGE_CACHED = "cached"
+STAGE_RUN = "run"
+
+GENERATED_TABLES = ["country_df", "comes_from_df", "genre_df", "is_of_type_df", "language_df",
+                    "spoken_languages_df", "character_df", "actor_df", "movie_df", "belongs_to_df",
+                    "play_df", "appears_in_df", "wikipedia_imdb_mapping_df", "actor_id_mapping_df"]
+POST_PROCESSING_TABLES = ["country_df", "comes_from_df", "genre_df", "is_of_type_df", "language_df",
+                          "spoken_languages_df", "character_df", "actor_df", "movie_df", "belongs_to_df",
+                          "play_df", "appears_in_df", "is_directed_by_df", "is_written_by_df",
+                          "director_df"]
+IMDB_LOOKUP_TABLES = ["title_ratings", "title_crew", "name_basics"]
+ID_DICTIONARY_FILE = f"{data_load.FOLDER_GENERATED}/{data_load.ID_DICTIONARY_FILE_NAME}"
+
+
+# Helpers for the stage declarations
+
+def imdb_index_stage(table_name: str) -> dict:
+    """
+    Declare the stage building the sorted, block-compressed index of an IMDB table.
+
+    :param table_name: Name of the table in imdb_index.IMDB_TABLES.
+
+    :return: The stage declaration.
+    """
+    index_folder = f"{data_load.FOLDER_IMDB}/{imdb_index.FOLDER_INDEX}"
+    return {"function": "utils.imdb_index.build_imdb_index",
+            "params": {"table_name": table_name},
+            "inputs": [f"{data_load.FOLDER_IMDB}/{imdb_index.IMDB_TABLES[table_name][0]}"],
+            "outputs": [f"{index_folder}/{table_name}.blocks", f"{index_folder}/{table_name}.index.pkl"],
+            "modules": ["utils/data_load.py", "utils/imdb_index.py"]}
+
+
+# Stage name: declaration, in topological order. Paths are relative to the data folder,
+# modules to the src folder. The id dictionary is only extended by the stages, thus it is
+# not an input of create_data, which would otherwise depend on its own output.
+PIPELINE_STAGES = {
+    **{f"imdb_index_{table_name}": imdb_index_stage(table_name) for table_name in IMDB_LOOKUP_TABLES},
+    "create_data": {
+        "notebook": "create_data.ipynb",
+        "inputs": [f"{data_load.FOLDER_CMU}/movie.metadata.tsv",
+                   f"{data_load.FOLDER_CMU}/plot_summaries.txt",
+                   f"{data_load.FOLDER_CMU}/character.metadata.tsv",
+                   "Wikipedia/no_release_date_movies.jsonl",
+                   f"{data_load.FOLDER_IMDB}/title.basics.tsv.gz"],
+        "outputs": [f"{data_load.FOLDER_GENERATED}/{table}.pkl" for table in GENERATED_TABLES]
+                   + [ID_DICTIONARY_FILE],
+        "modules": ["utils/data_load.py", "utils/matching.py", "utils/checkpoint.py"]},
+    "data_formatting": {
+        "notebook": "data_formatting.ipynb",
+        "inputs": [f"{data_load.FOLDER_GENERATED}/{table}.pkl" for table in GENERATED_TABLES]
+                  + [ID_DICTIONARY_FILE]
+                  + [f"{data_load.FOLDER_IMDB}/{imdb_index.FOLDER_INDEX}/{table_name}.blocks"
+                     for table_name in IMDB_LOOKUP_TABLES],
+        "outputs": [f"post_processing/{table}.pkl" for table in POST_PROCESSING_TABLES]
+                   + [ID_DICTIONARY_FILE],
+        "modules": ["utils/data_load.py", "utils/imdb_index.py", "utils/pruning.py"]},
+    "plot_processing": {
+        "notebook": "features_engineering/plot_processing.ipynb",
+        "skip_cells": ["# Load data"],
+        "last_cell": "# Save data",
+        "inputs": ["post_processing/movie_df.pkl", "post_processing/is_of_type_df.pkl"],
+        "outputs": ["post_processing/plot_df.pkl", "post_processing/BOW_matrix.npz",
+                    "post_processing/BOW_mapping.pkl"]},
+}
+
+
+# Helpers for paths
+
+def get_data_folder() -> str:
+    """
+    Return the absolute path of the data folder, data_load.DATA_PATH being relative to src.
+
+    :return: Path to the data folder.
+    """
+    return os.path.normpath(os.path.join(SRC_PATH, data_load.DATA_PATH))
+
+
+def get_data_file_path(relative_path: str) -> str:
+    """
+    Return the absolute path of a data file declared by a stage.
+
+    :param relative_path: Path relative to the data folder.
+
+    :return: Absolute path of the file.
+    """
+    return os.path.join(get_data_folder(), relative_path)
+
+
+def get_manifest_path() -> str:
+    """
+    Return the path of the manifest recording the last run of every stage.
+
+    :return: Path to the manifest.
+    """
+    return os.path.join(get_data_folder(), FOLDER_PIPELINE, MANIFEST_FILE_NAME)
+
+
+def get_stage_cache_folder(stage_name: str, key: str) -> str:
+    """
+    Return the folder holding the outputs of a stage for the given key.
+
+    :param stage_name: Name of the stage.
+    :param key: Hash of the inputs, code and parameters of the stage.
+
+    :return: Path to the cache folder.
+    """
+    return os.path.join(get_data_folder(), FOLDER_PIPELINE, FOLDER_PIPELINE_CACHE, stage_name, key)
+
+
+# Helpers for hashing
+
+def file_digest(path: str) -> str:
+    """
+    Hash the content of a file by chunks.
+
+    :param path: Path to the file.
+
+    :return: Hexadecimal SHA-256 digest.
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as handle:
+        for chunk in iter(lambda: handle.read(DIGEST_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def select_notebook_cells(notebook_path: str, skip_cells=(), last_cell=None) -> list[str]:
+    """
+    Select the code cells of a notebook run by a stage.
+
+    :param notebook_path: Path to the notebook.
+    :param skip_cells: First lines of the cells to skip, e.g. cells loading precomputed results.
+    :param last_cell: First line of the last cell to run, None to run the whole notebook.
+
+    :return: List of the sources of the selected cells.
+    """
+    with open(notebook_path, encoding="utf-8") as handle:
+        notebook = json.load(handle)
+    sources = []
+    for cell in notebook["cells"]:
+        if cell["cell_type"] != "code":
+            continue
+        source = "".join(cell["source"])
+        first_line = source.strip().split("\n")[0].strip()
+        if first_line not in skip_cells:
+            sources.append(source)
+        if first_line == last_cell:
+            break
+    return sources
+
+
+def code_digest(stage: dict) -> str:
+    """
+    Hash the code run by a stage: the selected notebook cells or the module of the function,
+    and the helper modules it declares.
+
+    :param stage: Stage declaration.
+
+    :return: Hexadecimal SHA-256 digest.
+    """
+    digest = hashlib.sha256()
+    if "notebook" in stage:
+        sources = select_notebook_cells(os.path.join(SRC_PATH, stage["notebook"]),
+                                        stage.get("skip_cells", ()), stage.get("last_cell"))
+        for source in sources:
+            digest.update(source.encode("utf-8"))
+            digest.update(b"\0")
+    else:
+        module_name = stage["function"].rsplit(".", 1)[0]
+        digest.update(stage["function"].encode("utf-8"))
+        digest.update(file_digest(importlib.import_module(module_name).__file__).encode("utf-8"))
+    for module in stage.get("modules", []):
+        digest.update(file_digest(os.path.join(SRC_PATH, module)).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def stage_key(stage: dict, input_digests: dict, params: dict) -> str:
+    """
+    Hash the inputs, code and parameters of a stage.
+
+    :param stage: Stage declaration.
+    :param input_digests: Dictionnary mapping the inputs of the stage to their digest.
+    :param params: Parameters of the stage.
+
+    :return: Hexadecimal SHA-256 digest identifying the run of the stage.
+    """
+    description = {"code": code_digest(stage),
+                   "inputs": input_digests,
+                   "outputs": stage["outputs"],
+                   "params": params}
+    return hashlib.sha256(json.dumps(description, sort_keys=True, default=repr).encode("utf-8")).hexdigest()
+
+
+# Helpers for the graph
+
+def find_producers(stages: dict) -> dict:
+    """
+    Find the stage producing every input, i.e. the last stage declared before the one
+    reading it that writes it. Inputs without producer are raw data.
+
+    :param stages: Dictionnary of the stage declarations, in topological order.
+
+    :return: Dictionnary mapping each stage to a dictionnary between its inputs and their producer.
+    """
+    last_producers, producers = dict(), dict()
+    for stage_name, stage in stages.items():
+        producers[stage_name] = {path: last_producers[path] for path in stage["inputs"]
+                                 if path in last_producers}
+        for path in stage["outputs"]:
+            last_producers[path] = stage_name
+    return producers
+
+
+def select_stages(stages: dict, producers: dict, targets=None) -> list[str]:
+    """
+    Select the target stages and all the stages upstream of them.
+
+    :param stages: Dictionnary of the stage declarations, in topological order.
+    :param producers: Producers of the inputs of every stage, see find_producers.
+    :param targets: Names of the stages to bring up to date, None for all of them.
+
+    :return: List of the selected stage names, in topological order.
+    """
+    if targets is None:
+        return list(stages)
+    selected = set()
+    to_visit = list(targets)
+    while len(to_visit) > 0:
+        stage_name = to_visit.pop()
+        if stage_name not in stages:
+            raise KeyError(f"Unknown pipeline stage {stage_name}.")
+        if stage_name not in selected:
+            selected.add(stage_name)
+            to_visit.extend(producers[stage_name].values())
+    return [stage_name for stage_name in stages if stage_name in selected]
+
+
+# Helpers for the manifest and the cache
+
+def load_manifest() -> dict:
+    """
+    Load the manifest recording, for every stage, the key and the output digests of its last run.
+
+    :return: The manifest, empty if the pipeline never ran.
+    """
+    path = get_manifest_path()
+    if not os.path.exists(path):
+        return dict()
+    with open(path, encoding="utf-8") as handle:
+        return json.load(handle)
+
+
+def save_manifest(manifest: dict):
+    """
+    Persist the manifest, atomically so that an interrupted run cannot corrupt it.
+
+    :param manifest: The manifest.
+    """
+    path = get_manifest_path()
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path + ".tmp", "w", encoding="utf-8") as handle:
+        json.dump(manifest, handle, indent=1, sort_keys=True)
+    os.replace(path + ".tmp", path)
+
+
+def store_stage_outputs(stage_name: str, key: str, manifest_entry: dict):
+    """
+    Copy the outputs of a stage run into the cache. Files are copied, not linked, because
+    the stages rewrite their outputs in place.
+
+    :param stage_name: Name of the stage.
+    :param key: Key of the run.
+    :param manifest_entry: Entry of the run in the manifest, with the output digests and row counts.
+    """
+    cache_folder = get_stage_cache_folder(stage_name, key)
+    for path in manifest_entry["outputs"]:
+        cache_path = os.path.join(cache_folder, path)
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        shutil.copyfile(get_data_file_path(path), cache_path)
+    with open(os.path.join(cache_folder, CACHE_ENTRY_FILE_NAME), "w", encoding="utf-8") as handle:
+        json.dump(manifest_entry, handle, indent=1, sort_keys=True)
+    evict_stage_cache(stage_name)
+
+
+def evict_stage_cache(stage_name: str, max_cached_runs=MAX_CACHED_RUNS):
+    """
+    Remove the least recently used runs of a stage from the cache, so that its size stays bounded.
+
+    :param stage_name: Name of the stage.
+    :param max_cached_runs: Number of runs to keep.
+    """
+    stage_folder = os.path.join(get_data_folder(), FOLDER_PIPELINE, FOLDER_PIPELINE_CACHE, stage_name)
+    if not os.path.isdir(stage_folder):
+        return
+    entry_times = dict()
+    for key in os.listdir(stage_folder):
+        entry_path = os.path.join(stage_folder, key, CACHE_ENTRY_FILE_NAME)
+        # A run without entry is incomplete, e.g. interrupted while copying
+        entry_times[key] = os.path.getmtime(entry_path) if os.path.exists(entry_path) else 0
+    for key in sorted(entry_times, key=entry_times.get, reverse=True)[max_cached_runs:]:
+        shutil.rmtree(os.path.join(stage_folder, key), ignore_errors=True)
+
+
+def restore_stage_outputs(stage_name: str, key: str):
+    """
+    Restore the outputs of a previous run of a stage from the cache.
+
+    :param stage_name: Name of the stage.
+    :param key: Key of the run.
+
+    :return: Entry of the run in the manifest, None if the run is not cached.
+    """
+    cache_folder = get_stage_cache_folder(stage_name, key)
+    entry_path = os.path.join(cache_folder, CACHE_ENTRY_FILE_NAME)
+    if not os.path.exists(entry_path):
+        return None
+    with open(entry_path, encoding="utf-8") as handle:
+        manifest_entry = json.load(handle)
+    for path in manifest_entry["outputs"]:
+        os.makedirs(os.path.dirname(get_data_file_path(path)), exist_ok=True)
+        shutil.copyfile(os.path.join(cache_folder, path), get_data_file_path(path))
+    # Mark the run as recently used for the eviction
+    os.utime(entry_path)
+    return manifest_entry
+
+
+# Helpers for the execution
+
+def run_notebook(notebook_path: str, params: dict, skip_cells=(), last_cell=None):
+    """
+    Execute the code cells of a notebook from its folder, without Jupyter.
+
+    Magic and shell lines are ignored. The parameters are defined before the first cell and
+    override the constants of the same name right after the cell defining them.
+
+    :param notebook_path: Path to the notebook.
+    :param params: Dictionnary of the constants to override.
+    :param skip_cells: First lines of the cells to skip.
+    :param last_cell: First line of the last cell to run.
+
+    :return: The namespace of the notebook after the execution.
+    """
+    namespace = {"__name__": "__main__", **params}
+    pending_params = dict(params)
+    for cell_id, source in enumerate(select_notebook_cells(notebook_path, skip_cells, last_cell)):
+        lines = [line for line in source.split("\n") if not line.lstrip().startswith(NOTEBOOK_MAGIC_PREFIXES)]
+        exec(compile("\n".join(lines), f"{notebook_path}[{cell_id}]", "exec"), namespace)
+        for name, value in list(pending_params.items()):
+            if namespace.get(name) is not value:
+                namespace[name] = value
+                del pending_params[name]
+    return namespace
+
+
+def count_rows(path: str):
+    """
+    Count the rows of a data file: the length of a pickled table, the number of rows of a
+    sparse matrix or the row count of an IMDB index.
+
+    :param path: Path to the file.
+
+    :return: The number of rows, None for other files.
+    """
+    if not path.endswith(ROW_COUNTED_EXTENSIONS):
+        return None
+    if path.endswith(".npz"):
+        with np.load(path) as npz_file:
+            return int(npz_file["shape"][0]) if "shape" in npz_file.files else None
+    data = pd.read_pickle(path)
+    if isinstance(data, dict) and "row_count" in data:
+        return int(data["row_count"])
+    return len(data) if hasattr(data, "__len__") else None
+
+
+def execute_stage(stage: dict, params: dict, data_folder: str) -> dict:
+    """
+    Run a stage, hash its outputs and measure its cost. Notebooks run from their folder and
+    functions from the src folder, so that the relative data paths resolve as in Jupyter.
+
+    Every stage runs in its own worker process, the peak memory is thus the maximum resident
+    size of this process.
+
+    :param stage: Stage declaration.
+    :param params: Parameters of the stage.
+    :param data_folder: Absolute path of the data folder, set as data_load.DATA_PATH in the worker.
+
+    :return: Entry of the run in the manifest, with the output digests, the row count of
+             every output and the wall time and peak memory of the run.
+    """
+    start_time = time.perf_counter()
+    os.environ.setdefault("MPLBACKEND", "Agg")
+    if SRC_PATH not in sys.path:
+        sys.path.insert(0, SRC_PATH)
+    data_load.DATA_PATH = data_folder
+    for path in stage["outputs"]:
+        os.makedirs(os.path.dirname(get_data_file_path(path)), exist_ok=True)
+    if "notebook" in stage:
+        notebook_path = os.path.join(SRC_PATH, stage["notebook"])
+        os.chdir(os.path.dirname(notebook_path))
+        run_notebook(notebook_path, params, stage.get("skip_cells", ()), stage.get("last_cell"))
+    else:
+        os.chdir(SRC_PATH)
+        module_name, function_name = stage["function"].rsplit(".", 1)
+        getattr(importlib.import_module(module_name), function_name)(**params)
+    wall_time = time.perf_counter() - start_time
+    missing_outputs = [path for path in stage["outputs"] if not os.path.exists(get_data_file_path(path))]
+    if len(missing_outputs) > 0:
+        raise FileNotFoundError(f"The stage did not write its outputs {missing_outputs}.")
+    return {"outputs": {path: file_digest(get_data_file_path(path)) for path in stage["outputs"]},
+            "rows": {path: count_rows(get_data_file_path(path)) for path in stage["outputs"]},
+            "wall_time_s": wall_time,
+            # ru_maxrss is in kilobytes on Linux
+            "peak_memory_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024}
+
+
+def get_input_digests(stage: dict, stage_producers: dict, manifest: dict) -> dict:
+    """
+    Hash the inputs of a stage. The inputs produced by an upstream stage take the digest
+    recorded by its last run, so that a stage updating one of its inputs in place, like the
+    id dictionary, does not invalidate itself.
+
+    :param stage: Stage declaration.
+    :param stage_producers: Dictionnary mapping the inputs of the stage to their producer.
+    :param manifest: The manifest.
+
+    :return: Dictionnary mapping the inputs to their digest.
+    """
+    input_digests = dict()
+    for path in stage["inputs"]:
+        if path in stage_producers:
+            input_digests[path] = manifest[stage_producers[path]]["outputs"][path]
+        else:
+            input_digests[path] = file_digest(get_data_file_path(path))
+    return input_digests
+
+
+def is_stage_fresh(stage: dict, key: str, manifest_entry) -> bool:
+    """
+    Check whether the last run of a stage has the given key and its outputs still exist.
+
+    :param stage: Stage declaration.
+    :param key: Current key of the stage.
+    :param manifest_entry: Entry of the stage in the manifest, None if it never ran.
+
+    :return: True if the stage does not need to run.
+    """
+    return (manifest_entry is not None and manifest_entry["key"] == key
+            and all(os.path.exists(get_data_file_path(path)) for path in stage["outputs"]))
+
+
+# Runner
+
+def run_pipeline(stages=PIPELINE_STAGES, targets=None, params=None, force=(),
+                 use_cache=True, max_workers=MAX_WORKERS) -> dict:
+    """
+    Bring the outputs of the target stages up to date, running only the stale stages.
+
+    A stage is stale when the hash of its inputs, code or parameters differs from its last
+    run or when one of its outputs is missing. Stale stages are restored from the cache when
+    they already ran with the same key, and run otherwise, in parallel when independent.
+
+    :param stages: Dictionnary of the stage declarations, in topological order.
+    :param targets: Names of the stages to bring up to date, None for all of them.
+    :param params: Dictionnary mapping stage names to parameters overriding their declared ones.
+    :param force: Names of the stages to run even if fresh.
+    :param use_cache: Indicator to restore and store the outputs in the cache.
+    :param max_workers: Maximum number of stages running at the same time.
+
+    :return: Dictionnary mapping each selected stage to its report: its status (fresh, cached
+             or run), its key, the time spent on it by this call, and the row counts, wall
+             time and peak memory of the run that produced its outputs.
+    """
+    params = dict() if params is None else params
+    producers = find_producers(stages)
+    pending = select_stages(stages, producers, targets)
+    manifest = load_manifest()
+    reports, running = dict(), dict()
+
+    def record(stage_name: str, key: str, status: str, manifest_entry: dict, start_time: float):
+        manifest[stage_name] = {**manifest_entry, "key": key}
+        save_manifest(manifest)
+        reports[stage_name] = {"status": status, "key": key,
+                               "elapsed_s": time.perf_counter() - start_time,
+                               **{name: value for name, value in manifest_entry.items()
+                                  if name not in ("key", "outputs")}}
+
+    # A fresh process per stage, so that the peak memory of a worker is the one of its stage.
+    with ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn"),
+                             max_tasks_per_child=1) as executor:
+        while len(pending) > 0 or len(running) > 0:
+            ready = [stage_name for stage_name in pending
+                     if all(producer in reports for producer in producers[stage_name].values())]
+            for stage_name in ready:
+                start_time = time.perf_counter()
+                pending.remove(stage_name)
+                stage = stages[stage_name]
+                stage_params = {**stage.get("params", dict()), **params.get(stage_name, dict())}
+                key = stage_key(stage, get_input_digests(stage, producers[stage_name], manifest), stage_params)
+                manifest_entry = None
+                if stage_name not in force and is_stage_fresh(stage, key, manifest.get(stage_name)):
+                    record(stage_name, key, STAGE_FRESH, manifest[stage_name], start_time)
+                    continue
+                if use_cache and stage_name not in force:
+                    manifest_entry = restore_stage_outputs(stage_name, key)
+                if manifest_entry is not None:
+                    record(stage_name, key, STAGE_CACHED, manifest_entry, start_time)
+                else:
+                    future = executor.submit(execute_stage, stage, stage_params, get_data_folder())
+                    running[future] = (stage_name, key, start_time)
+            if len(running) == 0:
+                continue
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                stage_name, key, start_time = running.pop(future)
+                manifest_entry = future.result()
+                if use_cache:
+                    store_stage_outputs(stage_name, key, manifest_entry)
+                record(stage_name, key, STAGE_RUN, manifest_entry, start_time)
+    return reports
@@ -0,0 +1,137 @@
+"""
+Contain the logic for pruning a set of tables to the rows reachable from a root key set.
+
+The tables are linked by a declared graph of semi-joins: a table keeps the rows whose
+key column is in the key column of another table, or in the root keys. The semi-joins
+are applied in a single pass, in topological order, so that every table is pruned once,
+after all the tables it depends on. Membership is tested with binary searches in the
+sorted keys, which is fast for the interned integer ids, without building Python sets.
+"""
+
+from graphlib import TopologicalSorter
+
+import numpy as np
+import pandas as pd
+
+ROOT_TABLE = "root"
+ROWS_BEFORE_COL_NAME = "rows_before"
+ROWS_KEPT_COL_NAME = "rows_kept"
+ROWS_DROPPED_COL_NAME = "rows_dropped"
+
+# Semi-joins between the formatted tables: (table, key column, source table, source key column).
+# A key column equal to the index name stands for the index. The root keys are the movie ids.
+MOVIE_SEMI_JOINS = [
+    ("comes_from_df", "movie_id", ROOT_TABLE, None),
+    ("is_of_type_df", "movie_id", ROOT_TABLE, None),
+    ("spoken_languages_df", "movie_id", ROOT_TABLE, None),
+    ("belongs_to_df", "movie_id", ROOT_TABLE, None),
+    ("appears_in_df", "movie_id", ROOT_TABLE, None),
+    ("character_df", "character_id", "belongs_to_df", "character_id"),
+    ("actor_df", "actor_id", "appears_in_df", "actor_id"),
+    ("play_df", "actor_id", "actor_df", "actor_id"),
+    ("play_df", "character_id", "character_df", "character_id"),
+]
+
+
+# Helpers for the keys
+
+def get_key_values(df: pd.DataFrame, key_column: str) -> np.ndarray:
+    """
+    Return the values of a key column, or of the index if the key column is its name.
+
+    :param df: Pandas Dataframe.
+    :param key_column: Name of the key column or of the index.
+
+    :return: Array of the keys, aligned with the rows.
+    """
+    if key_column in df.columns:
+        return df[key_column].to_numpy()
+    if key_column == df.index.name:
+        return df.index.to_numpy()
+    raise KeyError(f"No column nor index {key_column}.")
+
+
+def sorted_keys(values) -> np.ndarray:
+    """
+    Sort and deduplicate keys, the missing ones being dropped.
+
+    :param values: Array-like of keys.
+
+    :return: Sorted array of the unique keys.
+    """
+    values = pd.Series(values).dropna().to_numpy()
+    return np.unique(values)
+
+
+def is_in_sorted(values: np.ndarray, keys: np.ndarray) -> np.ndarray:
+    """
+    Test the membership of values in sorted keys with binary searches.
+
+    :param values: Array of values.
+    :param keys: Sorted array of unique keys.
+
+    :return: Boolean mask of the values present in the keys.
+    """
+    if len(keys) == 0:
+        return np.zeros(len(values), dtype=bool)
+    positions = np.searchsorted(keys, values)
+    positions[positions == len(keys)] = 0
+    return keys[positions] == values
+
+
+def order_semi_joins(semi_joins: list) -> list:
+    """
+    Order the tables so that each one comes after the tables its semi-joins depend on.
+
+    :param semi_joins: List of (table, key column, source table, source key column).
+
+    :return: List of the table names in topological order, without the root.
+    """
+    graph = dict()
+    for table_name, _, source_name, _ in semi_joins:
+        graph.setdefault(table_name, set())
+        if source_name != ROOT_TABLE:
+            graph[table_name].add(source_name)
+            graph.setdefault(source_name, set())
+    return list(TopologicalSorter(graph).static_order())
+
+
+# Pruning
+
+def prune_tables(tables: dict, root_keys, semi_joins=MOVIE_SEMI_JOINS) -> tuple:
+    """
+    Keep only the rows of the tables reachable from the root keys through the semi-joins.
+
+    A table with several semi-joins keeps the rows satisfying all of them. The tables not
+    involved in any semi-join are returned unchanged.
+
+    :param tables: Dictionnary mapping the table names to their dataframes.
+    :param root_keys: Collection of the root keys, e.g. the movie ids matched with IMDB.
+    :param semi_joins: List of (table, key column, source table, source key column), the
+                       source key column being ignored for the root table.
+
+    :return: Tuple with the dictionnary of the pruned tables, and a Pandas Dataframe with
+             the number of rows before, kept and dropped of every pruned table.
+    """
+    table_semi_joins = dict()
+    for table_name, key_column, source_name, source_column in semi_joins:
+        table_semi_joins.setdefault(table_name, []).append((key_column, source_name, source_column))
+
+    pruned_tables = dict(tables)
+    source_keys = {(ROOT_TABLE, None): sorted_keys(np.asarray(list(root_keys)))}
+    report = dict()
+    for table_name in order_semi_joins(semi_joins):
+        if table_name not in table_semi_joins:
+            continue
+        df = tables[table_name]
+        is_kept = np.ones(len(df), dtype=bool)
+        for key_column, source_name, source_column in table_semi_joins[table_name]:
+            if (source_name, source_column) not in source_keys:
+                source_keys[(source_name, source_column)] = sorted_keys(
+                    get_key_values(pruned_tables[source_name], source_column))
+            is_kept &= is_in_sorted(get_key_values(df, key_column), source_keys[(source_name, source_column)])
+        pruned_tables[table_name] = df[is_kept]
+        report[table_name] = (len(df), int(is_kept.sum()), len(df) - int(is_kept.sum()))
+    report_df = pd.DataFrame.from_dict(report, orient="index", columns=[
+        ROWS_BEFORE_COL_NAME, ROWS_KEPT_COL_NAME, ROWS_DROPPED_COL_NAME])
+    return pruned_tables, report_df
@@ -0,0 +1,480 @@
+"""
+Contain the logic for extracting the movie infoboxes from a local Wikipedia dump.
+
+The dump is read offline, e.g. enwiki-latest-pages-articles-multistream.xml.bz2. A
+multistream dump is a concatenation of independent bz2 streams of 100 pages, thus it is
+split into byte ranges aligned on the stream boundaries and decompressed by parallel
+workers. With the index of the dump, only the streams holding the requested pages are
+read. Infobox fields are extracted straight from the wikitext, and are formatted as the
+lists of strings given by the HTML infobox (see utils.wikipedia_fetch), so that the
+output can replace the data fetched online.
+"""
+
+import os
+import re
+import bz2
+import html
+import codecs
+from concurrent.futures import ProcessPoolExecutor
+
+from utils import data_load
+from utils.wikipedia_fetch import DEFAULT_MOVIE_ENTRIES, SUMMARY_KEY, FOLDER_WIKIPEDIA
+
+DUMP_FILE_NAME = "enwiki-latest-pages-articles-multistream.xml.bz2"
+INDEX_FILE_NAME = "enwiki-latest-pages-articles-multistream-index.txt.bz2"
+
+STREAM_MAGIC_PATTERN = re.compile(rb"BZh[1-9]1AY&SY")
+STREAM_MAGIC_LENGTH = 10
+READ_CHUNK_SIZE = 1 << 20
+RANGE_SIZE = 256 << 20
+MAX_WORKERS = os.cpu_count()
+ARTICLE_NAMESPACE = "0"
+
+# Patterns of the dump XML
+PAGE_PATTERN = re.compile(r"<page>(.*?)</page>", re.S)
+PAGE_ID_PATTERN = re.compile(r"<id>(\d+)</id>")
+PAGE_NS_PATTERN = re.compile(r"<ns>(\d+)</ns>")
+PAGE_TEXT_PATTERN = re.compile(r"<text[^>]*>(.*?)</text>", re.S)
+
+# Patterns of the wikitext
+COMMENT_PATTERN = re.compile(r"<!--.*?-->", re.S)
+REF_PATTERN = re.compile(r"<ref[^>]*/>|<ref[^>]*>.*?</ref>", re.S | re.I)
+BREAK_PATTERN = re.compile(r"<br\s*/?>", re.I)
+TAG_PATTERN = re.compile(r"<[^>]+>")
+FILE_LINK_PATTERN = re.compile(r"\[\[(?:File|Image):[^\[\]]*(?:\[\[[^\]]*\]\][^\[\]]*)*\]\]", re.I)
+LINK_PATTERN = re.compile(r"\[\[(?:[^|\]]*\|)?([^\]]*)\]\]")
+EXTERNAL_LINK_PATTERN = re.compile(r"\[https?://[^\s\]]+\s*([^\]]*)\]")
+INNER_TEMPLATE_PATTERN = re.compile(r"\{\{([^{}]*)\}\}")
+QUOTES_PATTERN = re.compile(r"'{2,}")
+HEADING_PATTERN = re.compile(r"^==", re.M)
+INFOBOX_START_PATTERN = re.compile(r"\{\{\s*Infobox[ _]+film", re.I)
+
+# Separator of the items of a rendered value, split into the list of strings
+ITEM_SEPARATOR = "\n"
+
+# Infobox parameter: label of the HTML infobox, as in DEFAULT_MOVIE_ENTRIES
+INFOBOX_FIELD_LABELS = {
+    "director": "Directed by", "writer": "Written by", "producer": "Produced by",
+    "producers": "Produced by", "starring": "Starring", "cinematography": "Cinematography",
+    "editing": "Edited by", "music": "Music by", "distributor": "Distributed by",
+    "released": "Release date", "runtime": "Running time", "country": "Country",
+    "language": "Language", "budget": "Budget", "gross": "Box office",
+    "screenplay": "Screenplay by", "based_on": "Based on", "story": "Story by",
+    "studio": "Production company", "production_companies": "Production company",
+    "executive_producer": "Executive producer",
+}
+
+DATE_TEMPLATES = {"film date", "filmdate", "start date", "release date", "start date and age",
+                  "release date and age", "date"}
+LIST_TEMPLATES = {"plainlist", "plain list", "unbulleted list", "ubl", "ublist", "flatlist",
+                  "flat list", "bulleted list", "hlist", "collapsible list", "pagelist"}
+INLINE_TEMPLATES = {"nowrap", "nobr", "small", "nobold", "lang", "noitalic", "abbr"}
+CURRENCY_TEMPLATES = {"us$": "$", "usd": "$", "£": "£", "gbp": "£", "€": "€", "inr": "₹", "₹": "₹"}
+
+
+# Helpers for the wikitext
+
+def split_template_arguments(content: str) -> tuple:
+    """
+    Split the content of an innermost template into its name, positional and named arguments.
+
+    :param content: Text between the braces of the template.
+
+    :return: Tuple with the lowercase name, the list of positional and the dictionnary of named arguments.
+    """
+    parts = content.split("|")
+    positional, named = [], dict()
+    for part in parts[1:]:
+        key, separator, value = part.partition("=")
+        if separator and re.fullmatch(r"\s*[\w ]+\s*", key):
+            named[key.strip().lower()] = value.strip()
+        else:
+            positional.append(part.strip())
+    return parts[0].strip().lower().replace("_", " "), positional, named
+
+
+def render_date_template(positional: list, name: str) -> str:
+    """
+    Render a date template as ISO dates, followed by their locations for the film dates.
+
+    :param positional: Positional arguments, year, month and day then location, repeated.
+    :param name: Name of the template.
+
+    :return: The rendered items.
+    """
+    group_size = 4 if name in ("film date", "filmdate") else 3
+    items = []
+    for start in range(0, len(positional), group_size):
+        date_parts = [p for p in positional[start:start + 3] if p.isdigit()]
+        if len(date_parts) == 0:
+            continue
+        items.append("-".join([date_parts[0]] + [p.zfill(2) for p in date_parts[1:]]))
+        if group_size == 4 and start + 3 < len(positional) and len(positional[start + 3]) > 0:
+            items.append(positional[start + 3])
+    return ITEM_SEPARATOR.join(items)
+
+
+def render_template(match: re.Match) -> str:
+    """
+    Render an innermost template: dates, lists and inline formatting keep their content,
+    the other templates, e.g. citations, are dropped.
+
+    :param match: Match of INNER_TEMPLATE_PATTERN.
+
+    :return: The rendered text.
+    """
+    name, positional, named = split_template_arguments(match.group(1))
+    if name in DATE_TEMPLATES:
+        return render_date_template(positional, name)
+    if name in LIST_TEMPLATES:
+        return ITEM_SEPARATOR + ITEM_SEPARATOR.join(positional) + ITEM_SEPARATOR
+    if name in INLINE_TEMPLATES and len(positional) > 0:
+        return positional[-1]
+    if name in CURRENCY_TEMPLATES and len(positional) > 0:
+        return CURRENCY_TEMPLATES[name] + positional[0]
+    if name == "based on":
+        return ITEM_SEPARATOR.join(positional)
+    return ""
+
+
+def render_templates(text: str) -> str:
+    """
+    Render all the templates of a text, from the innermost ones.
+
+    :param text: Wikitext.
+
+    :return: The text without templates.
+    """
+    previous_text = None
+    while previous_text != text:
+        previous_text = text
+        text = INNER_TEMPLATE_PATTERN.sub(render_template, text)
+    return text
+
+
+def wikitext_to_items(value: str) -> list[str]:
+    """
+    Convert a wikitext value to the list of its plain text items, like the strings of
+    the HTML infobox.
+
+    :param value: Wikitext value.
+
+    :return: List of plain text items.
+    """
+    value = FILE_LINK_PATTERN.sub("", value)
+    value = LINK_PATTERN.sub(r"\1", value)
+    value = EXTERNAL_LINK_PATTERN.sub(r"\1", value)
+    value = render_templates(value)
+    value = BREAK_PATTERN.sub(ITEM_SEPARATOR, value)
+    value = QUOTES_PATTERN.sub("", TAG_PATTERN.sub("", value))
+    value = html.unescape(value)
+    items = [item.strip().lstrip("*#").strip() for item in value.split(ITEM_SEPARATOR)]
+    return [item for item in items if len(item) > 0]
+
+
+def find_template_end(text: str, start: int) -> int:
+    """
+    Find the end of the template opening at the given position, by matching the braces.
+
+    :param text: Wikitext.
+    :param start: Position of the opening braces.
+
+    :return: Position right after the closing braces, the text length if unbalanced.
+    """
+    depth, position = 0, start
+    while position < len(text) - 1:
+        pair = text[position:position + 2]
+        if pair == "{{":
+            depth += 1
+            position += 2
+        elif pair == "}}":
+            depth -= 1
+            position += 2
+            if depth == 0:
+                return position
+        else:
+            position += 1
+    return len(text)
+
+
+def split_top_level(text: str, separator="|") -> list[str]:
+    """
+    Split a text on the separators that are not nested in templates or links.
+
+    :param text: Wikitext.
+    :param separator: Separator character.
+
+    :return: List of the parts.
+    """
+    parts, depth, last = [], 0, 0
+    position = 0
+    while position < len(text):
+        pair = text[position:position + 2]
+        if pair in ("{{", "[["):
+            depth += 1
+            position += 2
+        elif pair in ("}}", "]]"):
+            depth -= 1
+            position += 2
+        else:
+            if text[position] == separator and depth == 0:
+                parts.append(text[last:position])
+                last = position + 1
+            position += 1
+    parts.append(text[last:])
+    return parts
+
+
+def extract_infobox(wikitext: str, entry_keys=DEFAULT_MOVIE_ENTRIES) -> dict:
+    """
+    Extract the fields of the film infobox of a page.
+
+    :param wikitext: Wikitext of the page.
+    :param entry_keys: Set of the infobox labels to keep.
+
+    :return: Dictionnary mapping each label to its list of strings, None if the page has
+             no film infobox.
+    """
+    wikitext = REF_PATTERN.sub("", COMMENT_PATTERN.sub("", wikitext))
+    start_match = INFOBOX_START_PATTERN.search(wikitext)
+    if start_match is None:
+        return None
+    start = start_match.start()
+    body = wikitext[start + 2:find_template_end(wikitext, start) - 2]
+    infobox = dict()
+    for parameter in split_top_level(body)[1:]:
+        key, separator, value = parameter.partition("=")
+        label = INFOBOX_FIELD_LABELS.get(key.strip().lower().replace(" ", "_"))
+        if not separator or label is None or label not in entry_keys or label in infobox:
+            continue
+        items = wikitext_to_items(value)
+        if len(items) > 0:
+            infobox[label] = items
+    return infobox
+
+
+def extract_summary(wikitext: str) -> str:
+    """
+    Extract the plain text of the lead section of a page.
+
+    :param wikitext: Wikitext of the page.
+
+    :return: The summary.
+    """
+    heading_match = HEADING_PATTERN.search(wikitext)
+    lead = wikitext if heading_match is None else wikitext[:heading_match.start()]
+    lead = REF_PATTERN.sub("", COMMENT_PATTERN.sub("", lead))
+    lead = FILE_LINK_PATTERN.sub("", lead)
+    lead = LINK_PATTERN.sub(r"\1", lead)
+    lead = EXTERNAL_LINK_PATTERN.sub(r"\1", lead)
+    # Templates in the lead are maintenance and infobox templates, all dropped
+    previous_lead = None
+    while previous_lead != lead:
+        previous_lead = lead
+        lead = INNER_TEMPLATE_PATTERN.sub("", lead)
+    lead = html.unescape(QUOTES_PATTERN.sub("", TAG_PATTERN.sub("", lead)))
+    return "\n".join(line.strip() for line in lead.split("\n") if len(line.strip()) > 0)
+
+
+# Helpers for the dump
+
+def get_dump_path() -> str:
+    """
+    Return the default path of the dump, in the Wikipedia data folder.
+
+    :return: Path to the dump.
+    """
+    return f"{data_load.DATA_PATH}/{FOLDER_WIKIPEDIA}/{DUMP_FILE_NAME}"
+
+
+def find_stream_start(handle, position: int, limit: int) -> int:
+    """
+    Find the first bz2 stream starting at or after the given position.
+
+    :param handle: Binary handle of the dump.
+    :param position: Position where the search starts.
+    :param limit: Position where the search stops.
+
+    :return: Position of the stream, limit if there is none.
+    """
+    while position < limit:
+        handle.seek(position)
+        chunk = handle.read(min(READ_CHUNK_SIZE, limit - position) + STREAM_MAGIC_LENGTH - 1)
+        match = STREAM_MAGIC_PATTERN.search(chunk)
+        if match is not None and position + match.start() < limit:
+            return position + match.start()
+        position += READ_CHUNK_SIZE
+    return limit
+
+
+def iter_span_text(handle, start: int, end: int):
+    """
+    Decompress the bz2 streams of a byte span by chunks.
+
+    :param handle: Binary handle of the dump.
+    :param start: Position of the first stream of the span.
+    :param end: Position of the end of the span, on a stream boundary.
+
+    :return: A generator of decoded text chunks.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    decompressor = bz2.BZ2Decompressor()
+    handle.seek(start)
+    position = start
+    while position < end:
+        data = handle.read(min(READ_CHUNK_SIZE, end - position))
+        if len(data) == 0:
+            break
+        position += len(data)
+        while len(data) > 0:
+            if decompressor.eof:
+                decompressor = bz2.BZ2Decompressor()
+            yield decoder.decode(decompressor.decompress(data))
+            data = decompressor.unused_data if decompressor.eof else b""
+    yield decoder.decode(b"", final=True)
+
+
+def iter_span_pages(handle, start: int, end: int):
+    """
+    Stream the pages of a byte span of the dump.
+
+    :param handle: Binary handle of the dump.
+    :param start: Position of the first stream of the span.
+    :param end: Position of the end of the span, on a stream boundary.
+
+    :return: A generator of tuples with the page id, namespace and XML body of every page.
+    """
+    buffer = ""
+    for text in iter_span_text(handle, start, end):
+        buffer += text
+        last_end = 0
+        for match in PAGE_PATTERN.finditer(buffer):
+            page = match.group(1)
+            yield int(PAGE_ID_PATTERN.search(page).group(1)), PAGE_NS_PATTERN.search(page).group(1), page
+            last_end = match.end()
+        buffer = buffer[last_end:]
+
+
+def extract_span_data(dump_path: str, spans: list, page_ids: set, entry_keys=DEFAULT_MOVIE_ENTRIES,
+                      align=True) -> dict:
+    """
+    Extract the infobox data of the requested pages in the given byte spans.
+
+    :param dump_path: Path to the dump.
+    :param spans: List of (start, end) byte spans.
+    :param page_ids: Set of the requested page ids.
+    :param entry_keys: Set of the infobox labels to keep.
+    :param align: Indicator that the span bounds must be moved to the next stream boundary,
+                  False when they come from the index.
+
+    :return: Dictionnary mapping the page ids found to their data, None for pages without
+             film infobox.
+    """
+    wikipedia_data_dict = dict()
+    file_size = os.path.getsize(dump_path)
+    with open(dump_path, "rb") as handle:
+        for start, end in spans:
+            if align:
+                start = 0 if start == 0 else find_stream_start(handle, start, file_size)
+                end = find_stream_start(handle, end, file_size)
+            for page_id, namespace, page in iter_span_pages(handle, start, end):
+                if page_id not in page_ids or namespace != ARTICLE_NAMESPACE:
+                    continue
+                text_match = PAGE_TEXT_PATTERN.search(page)
+                wikitext = html.unescape(text_match.group(1)) if text_match is not None else ""
+                movie_data = extract_infobox(wikitext, entry_keys)
+                if movie_data is not None:
+                    movie_data[SUMMARY_KEY] = extract_summary(wikitext)
+                wikipedia_data_dict[page_id] = movie_data
+    return wikipedia_data_dict
+
+
+def read_index_spans(index_path: str, page_ids: set, file_size: int) -> list:
+    """
+    Find the streams holding the requested pages with the index of a multistream dump,
+    whose lines are offset:page_id:title.
+
+    :param index_path: Path to the bz2 index of the dump.
+    :param page_ids: Set of the requested page ids.
+    :param file_size: Size of the dump, end of the last stream.
+
+    :return: Sorted list of the (start, end) spans of the streams holding requested pages.
+    """
+    offsets, requested_offsets = set(), set()
+    with bz2.open(index_path, "rt", encoding="utf-8") as index_file:
+        for line in index_file:
+            offset, page_id, _ = line.split(":", 2)
+            offset = int(offset)
+            offsets.add(offset)
+            if int(page_id) in page_ids:
+                requested_offsets.add(offset)
+    offsets = sorted(offsets) + [file_size]
+    return [(offsets[i], offsets[i + 1]) for i in range(len(offsets) - 1) if offsets[i] in requested_offsets]
+
+
+def group_spans(spans: list, range_size=RANGE_SIZE) -> list:
+    """
+    Group consecutive spans into tasks of about range_size bytes.
+
+    :param spans: Sorted list of (start, end) spans.
+    :param range_size: Number of bytes per task.
+
+    :return: List of lists of spans.
+    """
+    tasks, task, task_size = [], [], 0
+    for start, end in spans:
+        task.append((start, end))
+        task_size += end - start
+        if task_size >= range_size:
+            tasks.append(task)
+            task, task_size = [], 0
+    if len(task) > 0:
+        tasks.append(task)
+    return tasks
+
+
+# Pipeline
+
+def extract_wikipedia_data(page_ids, dump_path=None, index_path=None, entry_keys=DEFAULT_MOVIE_ENTRIES,
+                           max_workers=MAX_WORKERS, range_size=RANGE_SIZE) -> tuple:
+    """
+    Collect the infobox data of the given pages from a local dump.
+
+    Without index, the dump is cut into byte ranges of range_size bytes, each worker
+    decompressing the streams starting in its range. A dump made of a single stream is
+    then read by one worker. With the index, only the streams holding the requested
+    pages are read.
+
+    :param page_ids: Iterable of Wikipedia page ids, i.e. CMU wikipedia movie ids.
+    :param dump_path: Path to the dump, default in the Wikipedia data folder.
+    :param index_path: Path to the index of a multistream dump, None to scan the whole dump.
+    :param entry_keys: Set of the infobox labels to keep.
+    :param max_workers: Number of worker processes.
+    :param range_size: Number of compressed bytes per task.
+
+    :return: Tuple with the dictionnary mapping the page ids to their data, as
+             utils.wikipedia_fetch.fetch_wikipedia_data, and the list of the page ids
+             missing from the dump or without film infobox.
+    """
+    dump_path = get_dump_path() if dump_path is None else dump_path
+    page_ids = list(page_ids)
+    requested_ids = set(int(page_id) for page_id in page_ids)
+    file_size = os.path.getsize(dump_path)
+    if index_path is not None:
+        tasks = group_spans(read_index_spans(index_path, requested_ids, file_size), range_size)
+    else:
+        tasks = [[(start, min(start + range_size, file_size))] for start in range(0, file_size, range_size)]
+    extracted_data = dict()
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(extract_span_data, dump_path, spans, requested_ids, entry_keys,
+                                   index_path is None) for spans in tasks]
+        for future in futures:
+            extracted_data.update(future.result())
+    wikipedia_data_dict, faulty_ids = dict(), []
+    for page_id in page_ids:
+        movie_data = extracted_data.get(int(page_id))
+        if movie_data is None:
+            faulty_ids.append(page_id)
+        else:
+            wikipedia_data_dict[page_id] = movie_data
+    return wikipedia_data_dict, faulty_ids
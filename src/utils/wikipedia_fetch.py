@@ -0,0 +1,400 @@
+"""
+Contain the logic for fetching the infoboxes of Wikipedia movie pages concurrently.
+
+Pages are requested through the MediaWiki parse API, which returns the HTML of the lead
+section, i.e. the infobox and the summary, in a single request. A pool of threads issues
+the requests under a global rate limit, transient failures (timeouts, 429 and 5xx) are
+retried with an exponential backoff, and every response, including the definitive API
+errors such as unknown page ids, is cached on disk by page id, so that re-runs cost no
+request at all. The parsed data can be checkpointed as it is fetched, see utils.checkpoint.
+"""
+
+import os
+import re
+import json
+import time
+import random
+import itertools
+import threading
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    from bs4 import BeautifulSoup
+except ImportError:
+    BeautifulSoup = None
+
+from utils import data_load
+from utils import checkpoint
+
+WIKIPEDIA_API_URL = "https://en.wikipedia.org/w/api.php"
+USER_AGENT = "ada-2022-project-zozoz/1.0 (movie infobox retrieval)"
+
+FOLDER_WIKIPEDIA = "Wikipedia"
+FOLDER_WIKIPEDIA_CACHE = "cache"
+
+MAX_CONCURRENCY = 8
+# Number of pages submitted ahead of the consumer, per thread
+IN_FLIGHT_FACTOR = 4
+REQUESTS_PER_SECOND = 20
+MAX_RETRIES = 5
+BACKOFF_BASE_S = 0.5
+BACKOFF_MAX_S = 30
+REQUEST_TIMEOUT_S = 30
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+# API errors that are transient, the other ones (e.g. nosuchpageid) are definitive
+RETRY_API_ERROR_CODES = {"ratelimited", "maxlag", "readonly", "internal_api_error_DBQueryError"}
+
+DEFAULT_MOVIE_ENTRIES = frozenset(["Directed by","Written by","Produced by","Starring",
+                                   "Cinematography","Edited by","Music by","Distributed by",
+                                   "Release date","Running time","Country","Language",
+                                   "Budget","Box office","Screenplay by","Based on",
+                                   "Release dates","Story by","Director of Animation",
+                                   "Languages","Country of origin","Original language",
+                                   "Executive producer","Producer","Production","Production company",
+                                   "Distributor","Original release","Picture format","Audio format",
+                                   "Original network","Release","Editor","Composer", "Countries",
+                                   "Production locations","Camera setup"])
+SUMMARY_KEY = "Summary"
+INFOBOX_SKIPPED_STRING_PATTERN = re.compile(r"\A[(,),\n,\[,\]]")
+REFERENCE_PATTERN = re.compile(r"\[\d+\]|\[[a-z]\]|\[citation needed\]")
+
+
+class RateLimiter:
+    """
+    Space out the requests of all the threads to at most the given rate.
+    """
+
+    def __init__(self, requests_per_second=REQUESTS_PER_SECOND):
+        self.interval = 1 / requests_per_second
+        self.next_time = time.monotonic()
+        self.lock = threading.Lock()
+
+    def wait(self):
+        """
+        Block until the next request slot.
+        """
+        with self.lock:
+            now = time.monotonic()
+            wait_time = self.next_time - now
+            self.next_time = max(now, self.next_time) + self.interval
+        if wait_time > 0:
+            time.sleep(wait_time)
+
+
+class TransientFetchError(Exception):
+    """
+    Raised when a request failed in a way that may succeed if retried.
+    """
+
+
+# Helpers for the cache
+
+def get_cache_folder() -> str:
+    """
+    Return the default folder of the cached responses.
+
+    :return: Path to the cache folder.
+    """
+    return f"{data_load.DATA_PATH}/{FOLDER_WIKIPEDIA}/{FOLDER_WIKIPEDIA_CACHE}"
+
+
+def get_cache_path(page_id: int, cache_folder: str) -> str:
+    """
+    Return the path of the cached response of a page.
+
+    :param page_id: Wikipedia page id.
+    :param cache_folder: Folder of the cached responses.
+
+    :return: Path to the cached response.
+    """
+    return os.path.join(cache_folder, f"{page_id}.json")
+
+
+def read_cached_response(page_id: int, cache_folder: str):
+    """
+    Read the cached response of a page.
+
+    :param page_id: Wikipedia page id.
+    :param cache_folder: Folder of the cached responses.
+
+    :return: The response, None if the page was never fetched.
+    """
+    cache_path = get_cache_path(page_id, cache_folder)
+    if not os.path.exists(cache_path):
+        return None
+    with open(cache_path, encoding="utf-8") as handle:
+        return json.load(handle)
+
+
+def write_cached_response(page_id: int, response: dict, cache_folder: str):
+    """
+    Cache the response of a page, atomically so that a crash never leaves a partial file.
+
+    :param page_id: Wikipedia page id.
+    :param response: Decoded API response.
+    :param cache_folder: Folder of the cached responses.
+    """
+    os.makedirs(cache_folder, exist_ok=True)
+    cache_path = get_cache_path(page_id, cache_folder)
+    with open(f"{cache_path}.{threading.get_ident()}.tmp", "w", encoding="utf-8") as handle:
+        json.dump(response, handle)
+    os.replace(f"{cache_path}.{threading.get_ident()}.tmp", cache_path)
+
+
+# Helpers for the requests
+
+def build_parse_url(page_id: int, api_url=WIKIPEDIA_API_URL) -> str:
+    """
+    Build the URL of the parse API returning the HTML of the lead section of a page.
+
+    :param page_id: Wikipedia page id.
+    :param api_url: URL of the MediaWiki API.
+
+    :return: The request URL.
+    """
+    query = {"action": "parse", "pageid": page_id, "prop": "text", "section": 0,
+             "format": "json", "formatversion": 2, "redirects": 1}
+    return f"{api_url}?{urllib.parse.urlencode(query)}"
+
+
+def backoff_delay(attempt: int, retry_after=None) -> float:
+    """
+    Compute the delay before retrying: exponential with jitter, or the delay requested by
+    the server through the Retry-After header.
+
+    :param attempt: Number of the failed attempt, starting at 0.
+    :param retry_after: Value of the Retry-After header, if any.
+
+    :return: Delay in seconds.
+    """
+    if retry_after is not None and retry_after.isdigit():
+        return min(float(retry_after), BACKOFF_MAX_S)
+    return min(BACKOFF_BASE_S * 2 ** attempt, BACKOFF_MAX_S) * random.uniform(0.5, 1)
+
+
+def request_json(url: str, timeout=REQUEST_TIMEOUT_S) -> dict:
+    """
+    Issue a single GET request and decode its JSON response.
+
+    An HTTP error that is not retried, e.g. 404, is definitive and returned as an API
+    error response, so that it is cached like the other API errors.
+
+    :param url: Request URL.
+    :param timeout: Timeout in seconds.
+
+    :return: The decoded response.
+    """
+    request = urllib.request.Request(url, headers={"User-Agent": USER_AGENT})
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            decoded = json.loads(response.read().decode("utf-8"))
+    except urllib.error.HTTPError as error:
+        if error.code in RETRY_STATUS_CODES:
+            raise TransientFetchError(error.headers.get("Retry-After")) from error
+        return {"error": {"code": f"http_{error.code}", "info": str(error.reason)}}
+    except (urllib.error.URLError, TimeoutError, ConnectionError) as error:
+        raise TransientFetchError(None) from error
+    if decoded.get("error", {}).get("code") in RETRY_API_ERROR_CODES:
+        raise TransientFetchError(None)
+    return decoded
+
+
+def fetch_page_response(page_id: int, rate_limiter: RateLimiter, cache_folder: str,
+                        api_url=WIKIPEDIA_API_URL, max_retries=MAX_RETRIES) -> dict:
+    """
+    Return the parse API response of a page, from the cache or by requesting it with retries.
+
+    :param page_id: Wikipedia page id.
+    :param rate_limiter: Rate limiter shared by all the threads.
+    :param cache_folder: Folder of the cached responses.
+    :param api_url: URL of the MediaWiki API.
+    :param max_retries: Maximum number of retries of the transient failures.
+
+    :return: The decoded response, possibly an API error.
+    """
+    response = read_cached_response(page_id, cache_folder)
+    if response is not None:
+        return response
+    url = build_parse_url(page_id, api_url)
+    for attempt in range(max_retries + 1):
+        rate_limiter.wait()
+        try:
+            response = request_json(url)
+            break
+        except TransientFetchError as error:
+            if attempt == max_retries:
+                raise
+            time.sleep(backoff_delay(attempt, error.args[0]))
+    write_cached_response(page_id, response, cache_folder)
+    return response
+
+
+# Helpers for the parsing
+
+def parse_infobox(page_parser, entry_keys=DEFAULT_MOVIE_ENTRIES) -> dict:
+    """
+    Extract the entries of the infobox: each entry key is followed by its list of strings.
+
+    :param page_parser: BeautifulSoup parser of the page HTML.
+    :param entry_keys: Set of the infobox entries to keep.
+
+    :return: Dictionnary mapping each entry to its list of strings.
+    """
+    table_data = page_parser.find("table", class_="infobox")
+    if table_data is None:
+        raise ValueError("The page has no infobox.")
+    table_data_list = [s for s in table_data.strings
+                       if INFOBOX_SKIPPED_STRING_PATTERN.match(s) is None]
+    entry_indices = [idx for (idx, entry) in enumerate(table_data_list) if entry in entry_keys]
+    entry_indices.append(len(table_data_list))
+    return dict([(table_data_list[entry_indices[i]],
+                  table_data_list[entry_indices[i] + 1:entry_indices[i + 1]])
+                 for i in range(len(entry_indices) - 1)])
+
+
+def parse_summary(page_parser) -> str:
+    """
+    Extract the summary of the page, i.e. the paragraphs of its lead section.
+
+    :param page_parser: BeautifulSoup parser of the page HTML.
+
+    :return: The summary, without reference markers.
+    """
+    root = page_parser.find("div", class_="mw-parser-output") or page_parser
+    paragraphs = [p.get_text() for p in root.find_all("p", recursive=False)]
+    summary = "\n".join(p.strip() for p in paragraphs if len(p.strip()) > 0)
+    return REFERENCE_PATTERN.sub("", summary)
+
+
+def parse_movie_data(response: dict, entry_keys=DEFAULT_MOVIE_ENTRIES) -> dict:
+    """
+    Extract the infobox entries and the summary from a parse API response.
+
+    :param response: Decoded parse API response.
+    :param entry_keys: Set of the infobox entries to keep.
+
+    :return: Dictionnary mapping each infobox entry to its list of strings, and the
+             summary key to the summary.
+    """
+    if BeautifulSoup is None:
+        raise ImportError("The infobox parsing requires the beautifulsoup4 package.")
+    if "error" in response:
+        raise ValueError(f"Wikipedia API error {response['error'].get('code')}.")
+    page_parser = BeautifulSoup(response["parse"]["text"], "html.parser")
+    movie_data = parse_infobox(page_parser, entry_keys)
+    movie_data[SUMMARY_KEY] = parse_summary(page_parser)
+    return movie_data
+
+
+# Pipeline
+
+def iter_wikipedia_data(page_ids, entry_keys=DEFAULT_MOVIE_ENTRIES, cache_folder=None,
+                        api_url=WIKIPEDIA_API_URL, max_concurrency=MAX_CONCURRENCY,
+                        requests_per_second=REQUESTS_PER_SECOND, max_retries=MAX_RETRIES,
+                        verbose=False):
+    """
+    Stream the infobox data of the given pages, fetched concurrently, in the order of the ids.
+
+    :param page_ids: Iterable of Wikipedia page ids, i.e. CMU wikipedia movie ids.
+    :param entry_keys: Set of the infobox entries to keep.
+    :param cache_folder: Folder of the cached responses, default in the Wikipedia data folder.
+    :param api_url: URL of the MediaWiki API, e.g. a local stub server for testing.
+    :param max_concurrency: Maximum number of requests in flight.
+    :param requests_per_second: Maximum request rate over all the threads.
+    :param max_retries: Maximum number of retries of the transient failures.
+    :param verbose: Indicator to print the reason of every failure.
+
+    :return: A generator of tuples with the page id and its data, None if the data could
+             not be retrieved.
+    """
+    cache_folder = get_cache_folder() if cache_folder is None else cache_folder
+    rate_limiter = RateLimiter(requests_per_second)
+
+    def fetch(page_id):
+        response = fetch_page_response(page_id, rate_limiter, cache_folder, api_url, max_retries)
+        return parse_movie_data(response, entry_keys)
+
+    # Only a bounded window of pages is submitted, so that the results do not pile up in
+    # memory and an interruption does not wait for all the queued pages.
+    page_ids = iter(page_ids)
+    executor = ThreadPoolExecutor(max_workers=max_concurrency)
+    pending = deque()
+    try:
+        for page_id in itertools.islice(page_ids, max_concurrency * IN_FLIGHT_FACTOR):
+            pending.append((page_id, executor.submit(fetch, page_id)))
+        while len(pending) > 0:
+            page_id, future = pending.popleft()
+            try:
+                movie_data = future.result()
+            except (TransientFetchError, urllib.error.HTTPError, ValueError, KeyError) as error:
+                if verbose:
+                    print(f"Unable to fetch data for id {page_id}: {error!r}.")
+                movie_data = None
+            for next_page_id in itertools.islice(page_ids, 1):
+                pending.append((next_page_id, executor.submit(fetch, next_page_id)))
+            yield page_id, movie_data
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def fetch_wikipedia_data(page_ids, entry_keys=DEFAULT_MOVIE_ENTRIES, cache_folder=None,
+                         api_url=WIKIPEDIA_API_URL, max_concurrency=MAX_CONCURRENCY,
+                         requests_per_second=REQUESTS_PER_SECOND, max_retries=MAX_RETRIES,
+                         verbose=False) -> tuple:
+    """
+    Collect the infobox data of the given pages concurrently.
+
+    :param page_ids: Iterable of Wikipedia page ids, i.e. CMU wikipedia movie ids.
+    :param entry_keys: Set of the infobox entries to keep.
+    :param cache_folder: Folder of the cached responses, default in the Wikipedia data folder.
+    :param api_url: URL of the MediaWiki API, e.g. a local stub server for testing.
+    :param max_concurrency: Maximum number of requests in flight.
+    :param requests_per_second: Maximum request rate over all the threads.
+    :param max_retries: Maximum number of retries of the transient failures.
+    :param verbose: Indicator to print the reason of every failure.
+
+    :return: Tuple with the dictionnary mapping the page ids to their data, and the list of
+             the page ids whose data could not be retrieved.
+    """
+    wikipedia_data_dict, faulty_ids = dict(), []
+    for page_id, movie_data in iter_wikipedia_data(page_ids, entry_keys, cache_folder, api_url,
+                                                   max_concurrency, requests_per_second,
+                                                   max_retries, verbose):
+        if movie_data is None:
+            faulty_ids.append(page_id)
+        else:
+            wikipedia_data_dict[page_id] = movie_data
+    return wikipedia_data_dict, faulty_ids
+
+
+def checkpoint_wikipedia_data(page_ids, checkpoint_path: str, entry_keys=DEFAULT_MOVIE_ENTRIES,
+                              cache_folder=None, retry_faulty=False,
+                              fsync_interval=checkpoint.FSYNC_INTERVAL, **fetch_options) -> tuple:
+    """
+    Fetch the infobox data of the given pages into an append-only checkpoint, resuming
+    after the pages already recorded.
+
+    :param page_ids: Iterable of Wikipedia page ids, i.e. CMU wikipedia movie ids.
+    :param checkpoint_path: Path to the JSONL checkpoint, see utils.checkpoint.
+    :param entry_keys: Set of the infobox entries to keep.
+    :param cache_folder: Folder of the cached responses, default in the Wikipedia data folder.
+    :param retry_faulty: Indicator to fetch again the pages recorded as faulty.
+    :param fsync_interval: Number of records between two syncs to disk.
+    :param fetch_options: Other keyword arguments of iter_wikipedia_data.
+
+    :return: Tuple with the number of pages fetched and the number of faulty ones among them.
+    """
+    recorded_ids = checkpoint.get_checkpoint_ids(checkpoint_path, include_faulty=not retry_faulty)
+    remaining_ids = [page_id for page_id in page_ids if page_id not in recorded_ids]
+    fetched_count, faulty_count = 0, 0
+    with checkpoint.CheckpointWriter(checkpoint_path, fsync_interval) as writer:
+        for page_id, movie_data in iter_wikipedia_data(remaining_ids, entry_keys, cache_folder,
+                                                       **fetch_options):
+            writer.append(page_id, movie_data)
+            fetched_count += 1
+            faulty_count += movie_data is None
+    return fetched_count, faulty_count